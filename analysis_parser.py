@@ -0,0 +1,210 @@
+import json
+import re
+
+# Markers and score labels requested by the analyze_profile prompt
+ATS_START_MARKER = "ATS ASSESSMENT START"
+ATS_END_MARKER = "ATS ASSESSMENT END"
+SCORE_LABELS = ['Clarity', 'Impact', 'ATS', 'Keyword Match']
+
+# Matches "Clarity Score: 80%", "- **ATS Score::** 75 %", "2. **Impact Score**: 70/100" and similar
+SCORE_LINE_PATTERN = re.compile(
+    r"^[\s\-\*•\d\.\)]*(Clarity|Impact|ATS|Keyword Match) Score[\s\*]*:+[\s\*]*(\d{1,3})\s*(?:%|/\s*100)",
+    re.IGNORECASE,
+)
+# Markdown headings ("## Tone Analysis", "### 3. Grammar") start a new named section
+HEADING_PATTERN = re.compile(r"^\s{0,3}#{1,6}\s+(?:\d+\.\s*)?\**(.+?)\**:?\s*$")
+_CANONICAL_LABELS = {label.lower(): label for label in SCORE_LABELS}
+
+# Structured-output contract for analyze_profile(structured=True). The model is asked for a
+# JSON object in this shape; parse_analysis falls back to the text parser when it gets free-form text.
+ANALYSIS_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "sections": {
+            "type": "object",
+            "description": "Markdown body for each analysis section, keyed by section title",
+            "additionalProperties": {"type": "string"},
+        },
+        "ats_assessment": {"type": "string"},
+        "scores": {
+            "type": "object",
+            "properties": {
+                "clarity": {"type": "integer", "minimum": 0, "maximum": 100},
+                "impact": {"type": "integer", "minimum": 0, "maximum": 100},
+                "ats": {"type": "integer", "minimum": 0, "maximum": 100},
+            },
+        },
+    },
+    "required": ["sections", "ats_assessment", "scores"],
+}
+_JSON_SCORE_KEYS = {"clarity": 'Clarity', "impact": 'Impact', "ats": 'ATS', "keyword_match": 'Keyword Match'}
+
+
+# Convert a display score ("80%") to an int, or None when missing or out of range
+def score_value(score):
+    if score is None or score == 'N/A':
+        return None
+    try:
+        value = int(str(score).rstrip('%'))
+    except ValueError:
+        return None
+    return value if 0 <= value <= 100 else None
+
+
+class ParsedAnalysis:
+    """Parsed analysis with the same attributes the streaming parser exposes"""
+
+    def __init__(self, text, general_text, ats_text, scores, sections):
+        self.text = text
+        self.general_text = general_text
+        self.ats_text = ats_text
+        self.scores = scores
+        self.sections = sections
+
+    @property
+    def numeric_scores(self):
+        return {label: score_value(value) for label, value in self.scores.items()}
+
+
+class StreamingAnalysisParser:
+    """Incrementally split an analysis into general content, ATS content, sections and scores.
+
+    Every line is examined once, as soon as its newline arrives, so the same code serves
+    streamed output and complete responses.
+    """
+
+    def __init__(self):
+        self.general_lines = []
+        self.ats_lines = []
+        self.scores = {label: 'N/A' for label in SCORE_LABELS}
+        self._sections = {}
+        self._section_lines = None
+        self._chunks = []
+        self._partial_line = ""
+        self._in_ats = False
+        self._ats_closed = False
+
+    def feed(self, chunk):
+        """Consume a streamed chunk and return the parts ('general', 'ats', 'scores') that changed"""
+        self._chunks.append(chunk)
+        changed = set()
+        lines = (self._partial_line + chunk).split("\n")
+        # The last element is an unfinished line; keep it until its newline arrives
+        self._partial_line = lines.pop()
+        for line in lines:
+            changed |= self._consume_line(line)
+        return changed
+
+    def close(self):
+        """Flush the trailing line once the stream has ended"""
+        changed = set()
+        if self._partial_line:
+            changed |= self._consume_line(self._partial_line)
+            self._partial_line = ""
+        if self._in_ats and not self._ats_closed:
+            # Without an end marker the ATS block is not trustworthy; keep it with the rest
+            self.general_lines.extend(self.ats_lines)
+            self.ats_lines = []
+            self._in_ats = False
+            changed |= {'general', 'ats'}
+        return changed
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
+
+    @property
+    def general_text(self):
+        return "\n".join(self.general_lines).strip()
+
+    @property
+    def ats_text(self):
+        return "\n".join(self.ats_lines).strip()
+
+    @property
+    def sections(self):
+        return {title: "\n".join(lines).strip() for title, lines in self._sections.items()}
+
+    @property
+    def numeric_scores(self):
+        return {label: score_value(value) for label, value in self.scores.items()}
+
+    def _consume_line(self, line):
+        changed = set()
+        upper_line = line.upper()
+
+        score_match = SCORE_LINE_PATTERN.match(line)
+        if score_match:
+            self.scores[_CANONICAL_LABELS[score_match.group(1).lower()]] = f"{int(score_match.group(2))}%"
+            changed.add('scores')
+
+        if not self._in_ats and not self._ats_closed and ATS_START_MARKER in upper_line:
+            self._in_ats = True
+            self.ats_lines.append(line)
+            changed.add('ats')
+        elif self._in_ats:
+            self.ats_lines.append(line)
+            changed.add('ats')
+            if ATS_END_MARKER in upper_line:
+                self._in_ats = False
+                self._ats_closed = True
+        elif not score_match:
+            # Score lines are only displayed as progress bars in the ATS tab
+            self.general_lines.append(line)
+            changed.add('general')
+            heading = HEADING_PATTERN.match(line)
+            if heading:
+                self._section_lines = self._sections.setdefault(heading.group(1).strip(), [])
+            elif self._section_lines is not None and line.strip() != "---":
+                self._section_lines.append(line)
+        return changed
+
+
+# Strip a ```json fence that some models wrap around JSON output
+def _strip_code_fence(text):
+    stripped = text.strip()
+    if stripped.startswith("```"):
+        stripped = stripped.split("\n", 1)[-1]
+        if stripped.rstrip().endswith("```"):
+            stripped = stripped.rstrip()[:-3]
+    return stripped.strip()
+
+
+# Parse output that follows ANALYSIS_JSON_SCHEMA; returns None if the text is not such a JSON object
+def parse_structured_analysis(text):
+    candidate = _strip_code_fence(text)
+    if not candidate.startswith("{"):
+        return None
+    try:
+        data = json.loads(candidate)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("sections"), dict):
+        return None
+
+    sections = {str(title): str(body).strip() for title, body in data["sections"].items()}
+    general_text = "\n\n".join(f"## {title}\n{body}" for title, body in sections.items())
+    ats_body = str(data.get("ats_assessment") or "").strip()
+    ats_text = f"## {ATS_START_MARKER}\n\n{ats_body}\n\n## {ATS_END_MARKER}" if ats_body else ""
+
+    scores = {label: 'N/A' for label in SCORE_LABELS}
+    # Scores in any other shape than an object count as missing
+    raw_scores = data.get("scores")
+    for key, value in (raw_scores.items() if isinstance(raw_scores, dict) else ()):
+        label = _JSON_SCORE_KEYS.get(str(key).lower().replace(" ", "_"))
+        number = score_value(value)
+        if label and number is not None:
+            scores[label] = f"{number}%"
+    return ParsedAnalysis(text, general_text, ats_text, scores, sections)
+
+
+# Parse a complete analysis in one go (used for cached or non-streamed results).
+# Structured JSON output is used when present; anything else goes through the tolerant text parser.
+def parse_analysis(analysis_text):
+    structured = parse_structured_analysis(analysis_text)
+    if structured is not None:
+        return structured
+    parser = StreamingAnalysisParser()
+    parser.feed(analysis_text)
+    parser.close()
+    return parser
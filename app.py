@@ -1,29 +1,53 @@
 import streamlit as st
-import openai
-from openai import OpenAI
 import os
-import language_tool_python
-from dotenv import load_dotenv
-import PyPDF2
-import io
-import requests
-from bs4 import BeautifulSoup
-import re
-import time
-import random
-from fake_useragent import UserAgent
-import json
-import urllib.parse
-from streamlit_lottie import st_lottie
-
-# Load environment variables from .env file
-load_dotenv()
+import metrics
+from result_cache import get_result_cache
+from pdf_extract import PREVIEW_PAGES
+from analysis_parser import SCORE_LABELS, parse_analysis
+from auditor_core import analyze_profile, extract_text_and_preview_from_pdf, generate_cover_letter, generate_resume, iter_profile_fanout, merge_fanout_sections, submit_prescore
+from openai_clients import LLMError, MissingAPIKeyError, get_client_stats, get_rate_limit_stats
+from rate_limiter import set_owner
+from single_flight import single_flight_stats
+from keyword_score import keyword_match, tokenize
+from grammar_check import grammar_unavailable_reason, start_grammar_tool, submit_grammar_check
+from profile_fetch import fetch_urls
+from profile_sections import extract_profile_sections
+from job_corpus import get_job_corpus
+from incremental_analysis import analyze_profile_incremental
+from cover_letter_batch import build_cover_letter_zip, iter_cover_letters, parse_job_list
+from candidate_ranking import MAX_RERANK, RERANK_TOP_K, final_ranking, rank_candidates, ranking_csv
+from background_jobs import CANCELLED, DONE, FAILED, FINISHED, QUEUED, get_job_runner, job_stats, streamed_text
+
+# Heavy dependencies (openai, PyPDF2, numpy, bs4/lxml, requests) are imported at their point of use,
+# and long-lived resources are created once per process rather than on every Streamlit rerun.
+
+# Load environment variables from .env file, start the grammar checker in the background and
+# the metrics endpoint if METRICS_PORT is set. Cached as a resource, so this runs once per
+# server process instead of on every rerun.
+@st.cache_resource
+def initialize_process():
+    from dotenv import load_dotenv
+    load_dotenv()
+    start_grammar_tool()
+    metrics.start_from_env()
+
+initialize_process()
+
+# Queue this session's LLM requests separately for the shared API rate limit (rate_limiter.py),
+# so other sessions' bursts cannot starve it; background jobs inherit it with the script's context
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+script_context = get_script_run_ctx()
+set_owner(script_context.session_id if script_context else None)
+
+# Read a value from .streamlit/secrets.toml; Streamlit raises when no secrets file exists
+def read_secret(name):
+    try:
+        return st.secrets.get(name, None)
+    except Exception:
+        return None
 
 # Set up OpenAI API key
-openai_api_key = os.getenv("OPENAI_API_KEY") or st.secrets.get("OPENAI_API_KEY", None)
-
-# Initialize language tool for grammar checking
-language_tool = language_tool_python.LanguageToolPublicAPI('en-US')
+openai_api_key = os.getenv("OPENAI_API_KEY") or read_secret("OPENAI_API_KEY")
 
 
 # Set page configuration
@@ -44,120 +68,6 @@ This tool analyzes your LinkedIn profile or resume and provides feedback to make
 It checks for grammar, professional tone, keyword relevance, and gives you actionable suggestions.
 """)
 
-# Add the resume generation function
-def generate_resume(profile_sections_text, job_description=None, api_key=None):
-    if api_key:
-        client = OpenAI(api_key=api_key)
-    elif openai_api_key:
-        client = OpenAI(api_key=openai_api_key)
-    else:
-        return "Error: No OpenAI API key provided. Please enter your API key in the sidebar."
-
-    prompt = f"""Create a professional resume based on the following profile information:
-
-{profile_sections_text}
-
-"""
-    if job_description:
-        prompt += f"""Tailor the resume for the following job description:
-
-Job Description:
-{job_description}
-
-"""
-
-    prompt += """Format the resume as a professional document using markdown, closely following a standard resume structure.
-
-Include the following sections in this approximate order:
-- Name
-- Contact Information
-- Professional Summary / About Me
-- Technical Skills
-- Work Experience
-- Education
-- Projects
-- Awards, Honors, Certifications
-
-Use markdown headings (## for main sections) and bullet points (*) for lists within sections (e.g., job responsibilities, project details).
-Use markdown horizontal rules (---) to clearly separate each main section.
-
-For the Name, use a level 1 markdown heading (#) with the full name, but do NOT make the name text bold yourself (no ** stars).
-For Contact Information, place Phone, Email, LinkedIn, and GitHub on a single line separated by ' | '. Place this line immediately below the Name with minimal vertical space.
-
-Ensure the language is concise, uses action verbs and highlights achievements.
-Do not include placeholder text like '[Your Name]' - use the provided information directly.
-"""
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo", # Consider gpt-4 for better quality if available
-            messages=[
-                {"role": "system", "content": "You are an expert resume writer. Create a well-formatted, professional resume from the provided sections."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1500 # Adjust as needed for resume length
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error generating resume: {str(e)}. Ensure your API key is correct and you have sufficient credits."
-
-# Add the cover letter generation function
-def generate_cover_letter(profile_text, company_name, job_posting, api_key=None):
-    if api_key:
-        client = OpenAI(api_key=api_key)
-    elif openai_api_key:
-        client = OpenAI(api_key=openai_api_key)
-    else:
-        return "Error: No OpenAI API key provided. Please enter your API key in the sidebar."
-
-    prompt = f"""Write a professional cover letter for a job application.
-
-Use the following profile information:
-{profile_text}
-
-Use the following company name and job posting to tailor the letter:
-Company Name: {company_name}
-Job Posting:
-{job_posting}
-
-Address the letter to the hiring manager (use a general title like 'Hiring Manager' if no name is provided). Highlight relevant skills and experience from the profile that match the job posting. Explain why you are interested in this specific role and company. Keep the letter concise and professional.
-
-Include a professional closing.
-"""
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo", # Consider gpt-4 for better quality
-            messages=[
-                {"role": "system", "content": "You are an expert cover letter writer. Create a compelling and tailored cover letter."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500 # Adjust as needed for cover letter length
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error generating cover letter: {str(e)}. Ensure your API key is correct and you have sufficient credits."
-
-def get_random_user_agent():
-    try:
-        ua = UserAgent()
-        return ua.random
-    except:
-        return 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-
-def create_session():
-    session = requests.Session()
-    session.headers.update({
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Cache-Control': 'max-age=0',
-    })
-    return session
-
 def get_public_profile_url(url):
     """Convert LinkedIn URL to public profile format"""
     try:
@@ -183,105 +93,27 @@ def scrape_linkedin_profile(url):
         # Convert to public profile URL
         public_url = get_public_profile_url(url)
         
-        # Create a session with proper headers
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0'
-        })
-        
-        # First try to get the public profile page
-        response = session.get(public_url, timeout=10)
-        
-        if response.status_code == 999 or response.status_code == 403:
-            st.error("LinkedIn is blocking access. Trying alternative method...")
+        with metrics.span("scrape"):
+            # The shared fetcher retries blocked requests with mobile headers (backing off off-thread)
+            # and revalidates pages it has seen before instead of downloading them again
+            result = fetch_urls([public_url])[0]
             
-            # Try with mobile user agent
-            session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive'
-            })
+            if result['text'] is None:
+                if result['status'] is None:
+                    return f"{result['error']}. Please check your internet connection and try again."
+                return f"Error: Could not access the LinkedIn profile. Status code: {result['status']}. Please try copying and pasting your profile sections manually."
             
-            time.sleep(2)  # Add delay
-            response = session.get(public_url, timeout=10)
-        
-        if response.status_code != 200:
-            return f"Error: Could not access the LinkedIn profile. Status code: {response.status_code}. Please try copying and pasting your profile sections manually."
-        
-        # Parse HTML content
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        # Initialize profile sections
-        profile_sections = {
-            'about': '',
-            'experience': '',
-            'skills': ''
-        }
-        
-        # Try to find profile sections using multiple methods
-        # About/Summary section
-        about_selectors = [
-            'section.summary',
-            'section.about',
-            'div[data-section="summary"]',
-            'div[data-section="about"]',
-            'div[class*="summary"]',
-            'div[class*="about"]'
-        ]
-        
-        for selector in about_selectors:
-            section = soup.select_one(selector)
-            if section:
-                profile_sections['about'] = section.get_text(strip=True)
-                break
-        
-        # Experience section
-        exp_selectors = [
-            'section#experience',
-            'section.experience',
-            'div[data-section="experience"]',
-            'div[class*="experience"]'
-        ]
-        
-        for selector in exp_selectors:
-            section = soup.select_one(selector)
-            if section:
-                profile_sections['experience'] = section.get_text(strip=True)
-                break
-        
-        # Skills section
-        skills_selectors = [
-            'section#skills',
-            'section.skills',
-            'div[data-section="skills"]',
-            'div[class*="skills"]'
-        ]
-        
-        for selector in skills_selectors:
-            section = soup.select_one(selector)
-            if section:
-                profile_sections['skills'] = section.get_text(strip=True)
-                break
+            # Collect the about/experience/skills sections in a single pass over the page
+            # (selector lists live in profile_sections.SECTION_SELECTORS)
+            profile_sections = extract_profile_sections(result['text'])
         
         # Format the profile text
         profile_text = ""
-        if profile_sections['about']:
+        if profile_sections.get('about'):
             profile_text += "# ABOUT ME\n" + profile_sections['about'] + "\n\n"
-        if profile_sections['experience']:
+        if profile_sections.get('experience'):
             profile_text += "# EXPERIENCE\n" + profile_sections['experience'] + "\n\n"
-        if profile_sections['skills']:
+        if profile_sections.get('skills'):
             profile_text += "# SKILLS\n" + profile_sections['skills']
         
         if not profile_text.strip():
@@ -293,97 +125,304 @@ def scrape_linkedin_profile(url):
 Please copy and paste your profile sections manually for the best results."""
         
         return profile_text
-    except requests.exceptions.RequestException as e:
-        return f"Network Error: {str(e)}. Please check your internet connection and try again."
     except Exception as e:
         return f"Error scraping LinkedIn profile: {str(e)}. Please copy and paste your profile sections manually."
 
-# Function to extract text from PDF
-def extract_text_from_pdf(pdf_file):
-    try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file.read()))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        return f"Error extracting text from PDF: {str(e)}"
-
-# Function to analyze profile with OpenAI
-def analyze_profile(profile_text, job_description=None, api_key=None):
-    # Create OpenAI client with the appropriate API key
-    if api_key:
-        client = OpenAI(api_key=api_key)
-    elif openai_api_key:
-        client = OpenAI(api_key=openai_api_key)
-    else:
-        return "Error: No OpenAI API key provided. Please enter your API key in the sidebar."
-    
-    # Prepare prompt for GPT with expanded analysis requests
-    # Request ATS analysis to be clearly separated for later parsing
-    prompt = f"""Analyze this LinkedIn profile or resume content and provide professional feedback. Focus on the following aspects:
-
-{profile_text}
-
-"""
-    
-    if job_description:
-        prompt += f"""Compare this profile content with the following job description and analyze keyword relevance and job fit:
-
-Job Description:
-{job_description}
-
-"""
-    
-    prompt += """Provide a detailed analysis covering:
-
-1.  **Overall Impression:** Clarity, conciseness, and professional tone.
-2.  **Tone Analysis:** Evaluate the overall tone of the profile/resume.
-3.  **Grammar and Language Quality:** Assessment of writing mechanics.
-4.  **Action Verbs and Achievements:** Effective use of action verbs and quantifiable achievements.
-5.  **Red Flags/Weak Points:** Passive language, vague phrases, areas needing improvement.
-6.  **Buzzword Identification:** List any buzzwords or overused phrases.
-7.  **Professional Vocabulary:** Assess the use of industry-specific and professional language.
-8.  **Specific Improvement Suggestions:** Actionable recommendations for each section.
-
----
-## ATS ASSESSMENT START
-
-Provide an evaluation of the content's suitability for Applicant Tracking Systems, focusing on keywords, formatting, and structure. Be detailed in this section.
-
-## ATS ASSESSMENT END
----
-
-Include numerical scores as percentages (0-100%) for:
-
--   Clarity Score:
--   Impact Score:
--   (If job description provided) Keyword Match Score:
--   ATS Score:: [ATS_SCORE_PERCENTAGE]  <-- Provide the ATS score on this line using this format.
-
-Format the response with clear markdown headings (e.g., ## Overall Impression) and bullet points where appropriate. Place the scores at the very end of the analysis in a clear list as requested.
-
-"""
-
+# Text of the uploaded resume and a preview of its first pages, extracted once per upload rather than on every rerun
+def extract_uploaded_resume(uploaded_file):
+    extracted = st.session_state.get('extracted_resume')
+    if extracted is None or extracted[0] != uploaded_file.file_id:
+        extracted = (uploaded_file.file_id, *extract_text_and_preview_from_pdf(uploaded_file))
+        st.session_state['extracted_resume'] = extracted
+    return extracted[1], extracted[2]
+
+# Keyword match on the current profile and job description; reruns that change neither reuse the report
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_keyword_match(profile_text, job_description):
+    return keyword_match(profile_text, job_description)
+
+# Turn a typed LLM error into the message shown to the user
+def llm_error_message(error, action):
+    if isinstance(error, MissingAPIKeyError):
+        return f"Error: {error}"
+    return f"Error {action}: {error}. Ensure your API key is correct and you have sufficient credits."
+
+# Generations run as background jobs (see background_jobs.py), at most one of each kind ('analysis',
+# 'cover_letter', 'resume', 'ranking') per session, so they can all run at once without blocking reruns.
+# Their views are fragments that redraw every JOB_POLL_SECONDS while the job runs.
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "0.5"))
+
+# Start this session's job of a kind, cancelling the one it replaces
+def start_job(kind, function, *args, **kwargs):
+    cancel_job(kind)
+    st.session_state['job_messages'].pop(kind, None)
+    st.session_state['jobs'][kind] = get_job_runner().submit(kind, function, *args, **kwargs)
+
+# This session's job of a kind as a JobRunner.poll snapshot, or None when there is none
+def poll_job(kind):
+    job_id = st.session_state['jobs'].get(kind)
+    job = get_job_runner().poll(job_id) if job_id is not None else None
+    if job is None:
+        st.session_state['jobs'].pop(kind, None)  # Never started, or expired
+    return job
+
+def cancel_job(kind):
+    job_id = st.session_state['jobs'].pop(kind, None)
+    if job_id is not None:
+        get_job_runner().cancel(job_id)
+        get_job_runner().forget(job_id)
+
+# Take a finished job out of the session and return its result; a failed job leaves its error
+# message for show_job_message instead. Errors other than LLMError are raised as before.
+def collect_job(kind, job, action):
+    st.session_state['jobs'].pop(kind, None)
+    get_job_runner().forget(job['id'])
+    if job['status'] == FAILED:
+        if not isinstance(job['error'], LLMError):
+            raise job['error']
+        st.session_state['job_messages'][kind] = ('error', llm_error_message(job['error'], action))
+    return job['result'] if job['status'] == DONE else None
+
+# Show (once) the outcome a finished job left behind, in a placeholder or in place
+def show_job_message(kind, placeholder=None):
+    message = st.session_state['job_messages'].pop(kind, None)
+    if message is not None:
+        level, text = message
+        getattr(placeholder or st, level)(text)
+
+def job_state_text(job, action):
+    if job['status'] == QUEUED:
+        return f"Waiting to start {action} ({job['queued_seconds']:.0f}s)..."
+    return f"{action[0].upper()}{action[1:]}... ({job['elapsed_seconds']:.0f}s)"
+
+# Job bodies: each streams its reply as progress (see background_jobs.streamed_text) within its own trace
+def cover_letter_job(profile_text, company_name, job_posting, api_key):
+    with metrics.trace("generate_cover_letter"):
+        return (yield from streamed_text(generate_cover_letter(profile_text, company_name, job_posting, api_key, stream=True)))
+
+def resume_job(resume_input_text, job_description, api_key):
+    with metrics.trace("generate_resume"):
+        return (yield from streamed_text(generate_resume(resume_input_text, job_description, api_key, stream=True)))
+
+# The analysis job yields {'text', 'grammar', 'prescore'}: the analysis received so far, plus the
+# grammar check and quick scores, which run alongside it as futures. It returns the analysis text
+# with what the app stores next to it.
+def analysis_job(profile_text, job_description, api_key, mode, quick_scores_first, previous_incremental):
+    progress = {'text': "", 'grammar': submit_grammar_check(profile_text), 'prescore': None}
+    if quick_scores_first:
+        try:
+            progress['prescore'] = submit_prescore(profile_text, job_description, api_key)
+        except LLMError:
+            pass  # The full analysis reports a missing key itself
+    yield progress
+    result = {'profile_text': profile_text, 'mode': mode, 'incremental_state': None, 'incremental_report': None}
+    with metrics.trace("analyze", mode=mode):
+        if mode == "incremental":
+            # Only the sections edited since this session's previous run are sent again
+            result['text'], result['incremental_state'], result['incremental_report'] = analyze_profile_incremental(
+                profile_text, job_description, api_key, previous=previous_incremental)
+        elif mode == "fanout":
+            # Sections arrive in completion order; re-merge in the standard order as each one lands
+            fanout_sections = {}
+            for aspect, section_text in iter_profile_fanout(profile_text, job_description, api_key):
+                fanout_sections[aspect] = section_text
+                yield {**progress, 'text': merge_fanout_sections(fanout_sections)}
+            result['text'] = merge_fanout_sections(fanout_sections)
+        else:
+            chunks = []
+            for chunk in analyze_profile(profile_text, job_description, api_key, stream=True):
+                chunks.append(chunk)
+                yield {**progress, 'text': "".join(chunks)}
+            result['text'] = "".join(chunks)
+    return result
+
+# The ranking job yields {'stats', 'ranking', 'failed', 'reranked', 'top_k'}: every candidate by local score
+# once stage one is done (see candidate_ranking.py), then each shortlisted candidate's analysis, keyed by
+# local rank, as it lands. It returns the same with the final ranking.
+def ranking_job(documents, job_description, top_k, api_key):
+    progress = {'stats': None, 'ranking': [], 'failed': [], 'reranked': {}, 'top_k': min(top_k, MAX_RERANK)}
+    with metrics.trace("rank_candidates", resumes=len(documents)):
+        events = rank_candidates(documents, job_description, top_k, api_key)
+        try:
+            while True:
+                try:
+                    event = next(events)
+                except StopIteration as stop:
+                    return {**progress, 'ranking': stop.value}
+                if event['event'] == 'shortlist':
+                    progress = {**progress, 'stats': event['stats'], 'ranking': event['ranking'], 'failed': event['failed']}
+                else:
+                    candidate = event['candidate']
+                    progress = {**progress, 'reranked': {**progress['reranked'], candidate['local_rank']: candidate}}
+                yield progress
+        finally:
+            # Cancelling the job drops the analyses that have not started
+            events.close()
+
+# Live view of a cover letter or resume being written, drawn under its form. When the job ends,
+# its result is stored under result_key and the app reruns once to show it.
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def text_job_view(kind, action, result_key):
+    job = poll_job(kind)
+    if job is None:
+        return
+    if job['status'] in FINISHED:
+        result = collect_job(kind, job, action)
+        if result is not None:
+            st.session_state[result_key] = result
+        st.rerun()
+    if st.button("✖ Cancel", key=f"cancel_{kind}"):
+        cancel_job(kind)
+        st.rerun()
+    st.caption(f"⏳ {job_state_text(job, action)}")
+    if job['progress']:
+        st.markdown(job['progress'])
+
+# Live view of a ranking: the shortlist fills in as each candidate's analysis lands
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def ranking_job_view():
+    job = poll_job('ranking')
+    if job is None:
+        return
+    if job['status'] in FINISHED:
+        result = collect_job('ranking', job, "ranking candidates")
+        if result is not None:
+            st.session_state['candidate_ranking'] = result
+        st.rerun()
+    if st.button("✖ Cancel", key="cancel_ranking"):
+        cancel_job('ranking')
+        st.rerun()
+    progress = job['progress']
+    if progress is None or progress['stats'] is None:
+        st.caption(f"⏳ {job_state_text(job, 'reading and scoring resumes')}")
+        return
+    st.caption(f"⏳ {job_state_text(job, 'analyzing the shortlist')} {len(progress['reranked'])} of {progress['top_k']} done")
+    render_ranking(progress, final_ranking(progress['ranking'], progress['reranked']), all_candidates=False)
+
+# Stage-one throughput, the shortlist with its LLM scores (pending ones marked) and, when all_candidates
+# is set, every candidate's local score (left out while the job's view redraws)
+def render_ranking(ranking_state, ranking, all_candidates=True):
+    stats = ranking_state['stats']
+    st.caption(f"Stage 1: {stats['ranked']} resumes scored locally in {stats['stage_one_seconds']:.2f}s "
+               f"({stats['resumes_per_second']} resumes/s)")
+    if ranking_state['failed']:
+        with st.expander(f"⚠️ {len(ranking_state['failed'])} resumes could not be read"):
+            for failure in ranking_state['failed']:
+                st.markdown(f"- **{failure['name']}**: {failure['error']}")
+    reranked = ranking_state['reranked']
+    shortlist = []
+    for candidate in ranking[:ranking_state['top_k']]:
+        scores = candidate.get('scores') or {}
+        status = ("⏳ Analyzing" if candidate['local_rank'] not in reranked else
+                  f"⚠️ {candidate['error']}" if 'error' in candidate else "✓")
+        shortlist.append({"Rank": candidate['rank'], "Resume": candidate['name'], "Keyword Match": f"{candidate['local_score']}%",
+                          **{label: scores.get(label) for label in ('ATS', 'Clarity', 'Impact')}, "Status": status})
+    st.dataframe(shortlist, hide_index=True)
+    if all_candidates:
+        with st.expander(f"All {len(ranking)} candidates by keyword match"):
+            st.dataframe([{"Rank": candidate['local_rank'], "Resume": candidate['name'], "Keyword Match": f"{candidate['local_score']}%"}
+                          for candidate in sorted(ranking, key=lambda candidate: candidate['local_rank'])],
+                         hide_index=True)
+
+# Render grammar issues as inline annotations: the flagged words highlighted within their sentence
+def render_grammar_issues(placeholder, issues):
+    if issues is None:
+        reason = grammar_unavailable_reason()
+        placeholder.caption("Grammar check unavailable" + (f": {reason}" if reason else "."))
+        return
+    with placeholder.container():
+        with st.expander(f"✏️ Grammar & Spelling ({len(issues)} issue{'s' if len(issues) != 1 else ''})", expanded=bool(issues)):
+            if not issues:
+                st.markdown("No grammar or spelling issues found.")
+            for issue in issues:
+                sentence = issue['sentence']
+                start, end = issue['offset'], issue['offset'] + issue['length']
+                annotated = f"{sentence[:start]}:red[**{sentence[start:end]}**]{sentence[end:]}"
+                suggestion = f" → *{', '.join(issue['replacements'])}*" if issue['replacements'] else ""
+                st.markdown(f"- {annotated}  \n  {issue['message']}{suggestion}")
+
+# Wait for a grammar check that outlived its analysis, then store its issues and rerun once to show them
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def grammar_check_view(placeholder):
+    grammar = st.session_state['grammar_check']
+    if not grammar.done():
+        placeholder.caption("✏️ Checking grammar...")
+        return
+    st.session_state['grammar_issues'] = grammar.result()
+    del st.session_state['grammar_check']
+    st.rerun()
+
+# Copy the job picked from the corpus matches into the job description box before the next rerun
+def use_selected_job():
+    job_id = st.session_state.get('selected_job_id')
+    job = get_job_corpus().get_job(job_id) if job_id is not None else None
+    if job is not None:
+        st.session_state['job_description_input'] = job['text']
+        st.session_state['job_description_changed'] = True
+
+# Rank the saved job descriptions (see job_corpus.py) against the current profile.
+# A fragment, so searching and browsing matches rerun only this panel.
+@st.fragment
+def job_matches_panel(profile_text):
+    job_corpus = get_job_corpus()
+    if job_corpus is None or not len(job_corpus):
+        return
+    with st.expander(f"🗂️ Match against {len(job_corpus)} saved jobs"):
+        if st.button("Find best-matching jobs", disabled=not profile_text.strip()):
+            st.session_state['job_matches'] = job_corpus.top_matches(profile_text, n=20)
+        job_matches = st.session_state.get('job_matches') or []
+        for match in job_matches:
+            company = f" ({match['company']})" if match['company'] else ""
+            missing = f" — missing: {', '.join(match['missing'][:5])}" if match['missing'] else ""
+            st.markdown(f"**{match['score']}%** {match['title']}{company}{missing}")
+        if job_matches:
+            st.selectbox(
+                "Use a matched job as the job description",
+                options=[None] + [match['id'] for match in job_matches],
+                format_func=lambda job_id: "—" if job_id is None else next(
+                    f"{match['title']} ({match['score']}%)" for match in job_matches if match['id'] == job_id),
+                key="selected_job_id",
+                on_change=use_selected_job,
+            )
+    # A new job description changes the keyword match and the analysis inputs, so rerun the whole app
+    if st.session_state.pop('job_description_changed', False):
+        st.rerun()
+
+# Render one score as a progress bar (or plain text when it is missing) inside a placeholder
+def render_score(placeholder, label, score_value_str):
+    # If the score is N/A, just display the text
+    if score_value_str == 'N/A':
+        placeholder.text(f"{label} Score: {score_value_str}")
+        return
+    # Otherwise, try to process and display the progress bar
     try:
-        # Using the new OpenAI API format
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo", # Or a more capable model like gpt-4 if available and desired
-            messages=[
-                {"role": "system", "content": "You are an expert LinkedIn profile and resume reviewer with years of experience in HR and recruitment. Provide comprehensive, structured, and actionable feedback based on the user's input. Ensure the ATS section and score are formatted exactly as requested for parsing."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2500 # Increased max_tokens slightly to accommodate more detailed ATS feedback
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error: {str(e)}. Ensure your API key is correct and you have sufficient credits."
+        # Extract numerical value and convert to float 0-1
+        score_percentage = int(score_value_str.replace('%', ''))
+
+        # Ensure percentage is within 0-100 range before converting to float 0-1
+        if 0 <= score_percentage <= 100:
+            score_float = score_percentage / 100.0
+            # Display score label and progress bar
+            with placeholder.container():
+                st.markdown(f"**{label} Score:** {score_value_str}")
+                st.progress(score_float)
+        else:
+            # Handle cases where parsed percentage is out of expected range
+            placeholder.text(f"{label} Score: {score_value_str} (Error: Invalid percentage value)")
+    except ValueError:
+        # Handle cases where parsing to int fails (should not happen if format is consistent)
+        placeholder.text(f"{label} Score: {score_value_str} (Error displaying progress - parsing failed)")
 
 # Sidebar for API key input
 with st.sidebar:
     st.header("⚙️ Settings")
     user_api_key = st.text_input("OpenAI API Key (optional if using .env)", type="password", help="Your API key will not be stored")
+    fanout_mode = st.toggle("⚡ Parallel analysis (fan-out)", value=False,
+                            help="Request each analysis section separately and concurrently. Faster overall; a failed section does not fail the whole audit.")
+    incremental_mode = st.toggle("♻️ Incremental re-analysis", value=False,
+                                 help="Review each profile section separately and, when you re-analyze, only re-request the sections you edited.")
+    quick_scores_mode = st.toggle("⏩ Quick scores first", value=False,
+                                  help="Ask a small, fast model (or the local engine configured for 'prescore') for estimated scores, shown until the full analysis writes its own.")
     
     st.markdown("""---
 ### 📋 Instructions
@@ -399,8 +438,24 @@ Your OpenAI API key is used only for this analysis and is never stored.
 You can also add it to a .env file as OPENAI_API_KEY=your-key-here
     """)
 
+    # Show how many requests were answered from the result cache instead of the API
+    cache_stats = get_result_cache().stats()
+    st.caption(f"⚡ Result cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+    client_stats = get_client_stats()
+    st.caption(f"🔌 OpenAI connections reused: {client_stats['client_reuses']} · retries: {client_stats['retries']}")
+    flight_stats = single_flight_stats()
+    st.caption(f"🤝 Identical in-flight requests shared: {flight_stats['coalesced']}")
+    background_jobs = job_stats()
+    st.caption(f"🧵 Background jobs: {background_jobs['running']} running · {background_jobs['queued']} queued")
+    rate_limit = get_rate_limit_stats()
+    st.caption(f"🚦 Rate limit: {rate_limit['queued']} queued · wait p99 {rate_limit['wait_p99_s']:.1f}s · "
+               f"{rate_limit['rate_limited']} × 429")
+    if metrics.enabled():
+        st.download_button("📈 Download metrics", metrics.render_prometheus(), file_name="auditor_metrics.prom",
+                           mime="text/plain", help="Stage latencies, tokens, cost, cache hits and errors (Prometheus text format)")
+
 # Main content area
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📝 Profile Input", "📊 General Analysis", "🤖 ATS Analysis", "📄 Cover Letter", "✍️ Resume Builder", "❓ How to Use This Tool"])
+tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(["📝 Profile Input", "📊 General Analysis", "🤖 ATS Analysis", "📄 Cover Letter", "✍️ Resume Builder", "👥 Recruiter Mode", "❓ How to Use This Tool"])
 
 # Initialize session state variables
 if 'analysis_result' not in st.session_state:
@@ -415,8 +470,16 @@ if 'generated_resume' not in st.session_state:
     st.session_state['generated_resume'] = ""
 if 'generated_cover_letter' not in st.session_state:
     st.session_state['generated_cover_letter'] = ""
+if 'batch_cover_letters' not in st.session_state:
+    st.session_state['batch_cover_letters'] = {}  # input index -> (company name, letter)
 if 'profile_for_cl' not in st.session_state:
     st.session_state['profile_for_cl'] = "" # To store profile content for Cover Letter tab
+if 'jobs' not in st.session_state:
+    st.session_state['jobs'] = {}  # job kind -> background job id (see start_job)
+if 'job_messages' not in st.session_state:
+    st.session_state['job_messages'] = {}  # job kind -> (level, text) left by a finished job
+if 'candidate_ranking' not in st.session_state:
+    st.session_state['candidate_ranking'] = None  # The last finished ranking_job result
 
 with tab1:
     st.header("Enter Your Profile or Upload Resume")
@@ -439,7 +502,7 @@ with tab1:
 
     with col2:
         st.subheader("Job Description (Optional) or Upload Resume")
-        job_description = st.text_area("Job Description for Keyword Matching", height=300,
+        job_description = st.text_area("Job Description for Keyword Matching", height=300, key="job_description_input",
                                      placeholder="Paste a job description to compare your profile against...")
 
         st.markdown("--- \n **Or**") # Added separator
@@ -449,89 +512,63 @@ with tab1:
         resume_text = ""
         if uploaded_file is not None:
             with st.spinner("Extracting text from PDF..."):
-                resume_text = extract_text_from_pdf(uploaded_file)
+                resume_text, resume_preview = extract_uploaded_resume(uploaded_file)
                 if resume_text.startswith("Error"):
                     st.error(resume_text)
                 else:
                     st.success("PDF successfully processed!")
-                    with st.expander("Preview Extracted Text"):
-                        st.text(resume_text)
+                    # Only the first pages are rendered, however long the document is
+                    with st.expander(f"Preview Extracted Text (first {PREVIEW_PAGES} pages)"):
+                        st.text(resume_preview)
                     # If manual fields are empty, use the resume text for analysis
                     if not profile_about.strip() and not profile_experience.strip() and not profile_skills.strip():
                         full_profile_analysis = resume_text
 
+        job_matches_panel(full_profile_analysis)
+
     analyze_button = st.button("🔍 Analyze Profile", type="primary", use_container_width=True)
+    # Status line for the analysis, filled in once the result tabs below have been laid out
+    analysis_status = st.empty()
 
     # Perform analysis when button is clicked and profile content exists
-    if analyze_button and full_profile_analysis.strip(): # Use full_profile_analysis here
-        with st.spinner("AI is analyzing your profile... This may take a moment."):
-            analysis_result = analyze_profile(full_profile_analysis, job_description, user_api_key)
-            st.session_state['analysis_result'] = analysis_result # Store full result
-            
-            # --- Parse analysis_result to separate ATS and others, and extract scores ---
-            ats_start_marker = "## ATS ASSESSMENT START"
-            ats_end_marker = "## ATS ASSESSMENT END"
-            
-            ats_content = ""
-            other_content = analysis_result
-            
-            # Extract ATS section
-            if ats_start_marker in analysis_result and ats_end_marker in analysis_result:
-                start_index = analysis_result.find(ats_start_marker)
-                end_index = analysis_result.find(ats_end_marker)
-                if start_index != -1 and end_index != -1 and end_index > start_index:
-                    # Extract the content between markers, including the start marker
-                    ats_content = analysis_result[start_index : end_index + len(ats_end_marker)]
-                    
-                    # Remove ATS content from the original analysis_result for 'other_content'
-                    other_content = analysis_result[:start_index] + analysis_result[end_index + len(ats_end_marker):]
-            
-            # Extract all scores using regex on the *full* analysis result before removing scores from other_content
-            scores = {}
-            score_patterns = {
-                'Clarity': r"Clarity Score:\s*(\d+%)",
-                'Impact': r"Impact Score:\s*(\d+%)",
-                'ATS': r"ATS Score:\s*(\d+%)", # Corrected regex to use a single colon
-                'Keyword Match': r"Keyword Match Score:\s*(\d+%)"
-            }
-            
-            for label, pattern in score_patterns.items():
-                match = re.search(pattern, analysis_result, re.MULTILINE)
-                if match:
-                    scores[label] = match.group(1) # Keep as percentage string for display
-                else:
-                    scores[label] = 'N/A'
-                    
-            # Remove score lines from other_content so they only appear in the ATS tab progress bars
-            # Use re.sub with flags=re.MULTILINE to handle lines correctly
-            for label, pattern in score_patterns.items():
-                 # Escape potential regex special characters in the pattern and match the start of a line
-                 safe_pattern = re.escape(pattern).replace("\\(", "(").replace("\\)", ")").replace("\\d+", "\\d+").replace("\\%", "%") # Keep intended regex parts
-                 other_content = re.sub(f"^{safe_pattern}$", "", other_content, flags=re.MULTILINE).strip()
-            
-            st.session_state['ats_analysis'] = ats_content
-            st.session_state['other_analysis'] = other_content
-            st.session_state['scores'] = scores
-            
-            # Store the profile text in session state for use in other tabs (like Cover Letter)
-            st.session_state['profile_for_cl'] = full_profile_analysis
-            
-            # Provide feedback to the user that analysis is complete and they can view results
-            st.success("Analysis complete! Go to the 'General Analysis' or 'ATS Analysis' tabs to view the feedback.")
-            st.session_state['analysis_complete'] = True # Use session state to indicate completion
-            
+    run_analysis = bool(analyze_button and full_profile_analysis.strip()) # Use full_profile_analysis here
+    if run_analysis:
+        # The analysis runs as a background job; analysis_job_view below shows it as it arrives
+        analysis_mode = "incremental" if incremental_mode else "fanout" if fanout_mode else "stream"
+        start_job('analysis', analysis_job, full_profile_analysis, job_description, user_api_key or openai_api_key,
+                  analysis_mode, quick_scores_mode, st.session_state.get('incremental_state'))
+    analysis_running = poll_job('analysis') is not None
+    show_job_message('analysis', analysis_status)
+
+    # Keyword match is computed locally on every rerun: deterministic, sub-millisecond and free
+    profile_has_content = bool(profile_about.strip() or profile_experience.strip() or profile_skills.strip()
+                               or (resume_text and not resume_text.startswith("Error")))
+    keyword_report = None
+    if job_description.strip() and profile_has_content:
+        keyword_report = cached_keyword_match(full_profile_analysis, job_description)
+    local_scores = {'Keyword Match': f"{keyword_report['score']}%" if keyword_report and keyword_report['score'] is not None else 'N/A'}
+    st.session_state['scores'].update(local_scores)
 
 with tab2:
     # Display non-ATS analysis results
     st.header("📊 General Analysis Results")
     st.markdown("Here is the comprehensive AI feedback on your profile or resume:")
     
-    if st.session_state['analysis_result'] is not None:
-        if st.session_state['other_analysis'].strip():
-            # Use st.markdown to render the AI's markdown formatting
-            st.markdown(st.session_state['other_analysis'])
-        else:
-             st.info("No general analysis results available. Run the analysis first.")
+    if analysis_running or st.session_state['analysis_result'] is not None:
+        # While an analysis is streaming this placeholder is filled in section by section
+        general_placeholder = st.empty()
+        # Grammar annotations from the local checker, which runs alongside the OpenAI call
+        grammar_placeholder = st.empty()
+        if not analysis_running:
+            if st.session_state['other_analysis'].strip():
+                # Use st.markdown to render the AI's markdown formatting
+                general_placeholder.markdown(st.session_state['other_analysis'])
+            else:
+                general_placeholder.info("No general analysis results available. Run the analysis first.")
+            if 'grammar_check' in st.session_state:
+                grammar_check_view(grammar_placeholder)
+            elif 'grammar_issues' in st.session_state:
+                render_grammar_issues(grammar_placeholder, st.session_state['grammar_issues'])
 
         # Scores are now only displayed in the ATS tab with progress bars.
 
@@ -542,51 +579,25 @@ with tab3:
     # Display ATS-specific analysis and scores with progress bars
     st.header("🤖 ATS Analysis Results")
 
-    if st.session_state['analysis_result'] is not None:
+    if analysis_running or st.session_state['analysis_result'] is not None or keyword_report:
 
         # Display scores with progress bars
         st.subheader("Compatibility Scores")
         
-        # Removed Lottie animation loading and display code
-        # The following lines were responsible for the Lottie animation and the warning.
-#        try:
-#            # Make sure you have downloaded a .json animation file and placed it in the same directory as app.py
-#            with open("ats_animation.json", "r") as f:
-#                lottie_json = json.load(f)
-#            st_lottie(lottie_json, height=100, key="ats_animation") # Reduced height slightly
-#        except FileNotFoundError:
-#            st.warning("Lottie animation file 'ats_animation.json' not found. Please download one and place it in the app directory.")
-#        except Exception as e:
-#            st.error(f"Could not load animation: {e}")
-        
-        score_order = ['Clarity', 'Impact', 'ATS', 'Keyword Match'] # Define the order of scores
-        for label in score_order:
-            score_value_str = st.session_state['scores'].get(label, 'N/A')
-            
-            # If the score is N/A, just display the text
-            if score_value_str == 'N/A':
-                st.text(f"{label} Score: {score_value_str}")
-            else:
-                # Otherwise, try to process and display the progress bar
-                try:
-                    # Extract numerical value and convert to float 0-1
-                    score_percentage = int(score_value_str.replace('%', ''))
-                    
-                    # Ensure percentage is within 0-100 range before converting to float 0-1
-                    if 0 <= score_percentage <= 100:
-                        score_float = score_percentage / 100.0
-                        # Display score label and progress bar
-                        st.markdown(f"**{label} Score:** {score_value_str}")
-                        st.progress(score_float)
-                    else:
-                         # Handle cases where parsed percentage is out of expected range
-                         st.text(f"{label} Score: {score_value_str} (Error: Invalid percentage value)")
-                except ValueError:
-                    # Handle cases where parsing to int fails (should not happen if format is consistent)
-                    st.text(f"{label} Score: {score_value_str} (Error displaying progress - parsing failed)")
+        # One placeholder per score, so each progress bar appears as soon as its line arrives
+        score_placeholders = {label: st.empty() for label in SCORE_LABELS}
+
+        if keyword_report and keyword_report['missing']:
+            st.markdown("**Missing job-description keywords:** " + ", ".join(keyword_report['missing']))
             
         st.markdown("---") # Add a separator
 
+        ats_placeholder = st.empty()
+        if not analysis_running:
+            for label in SCORE_LABELS:
+                render_score(score_placeholders[label], label, st.session_state['scores'].get(label, 'N/A'))
+            ats_placeholder.markdown(st.session_state['ats_analysis'])
+
         # Add helpful tips about ATS (Keep or remove as desired)
         with st.expander("ℹ️ About ATS Optimization Tips"):
             st.markdown("""
@@ -605,16 +616,109 @@ with tab3:
     else:
         st.info("Run the analysis first to see ATS feedback here.")
 
-with tab4:
-    st.header("📄 Cover Letter")
-    st.markdown("Generate a tailored cover letter based on your profile and a job description.")
+# Store a finished analysis and its grammar check in the session. A failed analysis keeps the
+# previous results (the error is shown instead), but its grammar check is still kept.
+def complete_analysis(job, local_scores):
+    progress = job['progress'] or {}
+    result = collect_job('analysis', job, "analyzing your profile")
+    if result is not None:
+        store_analysis(result, local_scores)
+    grammar = progress.get('grammar')
+    if grammar is not None and job['status'] != CANCELLED:
+        st.session_state.pop('grammar_check', None)
+        if grammar.done():
+            st.session_state['grammar_issues'] = grammar.result()
+        else:
+            # LanguageTool may still be starting; grammar_check_view shows the issues when they arrive
+            st.session_state['grammar_check'] = grammar
+
+# Store a finished analysis in the session and leave the completion message for the status line
+def store_analysis(result, local_scores):
+    with metrics.span("parse"):
+        parser = parse_analysis(result['text'])
+    st.session_state['analysis_result'] = parser.text # Store full result
+    st.session_state['ats_analysis'] = parser.ats_text
+    st.session_state['other_analysis'] = parser.general_text
+    # The local keyword match replaces any keyword score the model may still write
+    st.session_state['scores'] = {**parser.scores, **local_scores}
+
+    # Store the profile text in session state for use in other tabs (like Cover Letter)
+    st.session_state['profile_for_cl'] = result['profile_text']
+
+    # Provide feedback to the user that analysis is complete and they can view results
+    completion_message = "Analysis complete! Go to the 'General Analysis' or 'ATS Analysis' tabs to view the feedback."
+    incremental_report = result['incremental_report']
+    if result['mode'] == "incremental":
+        st.session_state['incremental_state'] = result['incremental_state']
+        completion_message += (
+            f"  \n♻️ Reused {incremental_report['sections_reused']} of {incremental_report['sections']} section reviews"
+            + (" and the previous analysis" if incremental_report['synthesis_reused'] else "")
+            + f": saved ~{incremental_report['tokens_saved']} tokens and ~{incremental_report['seconds_saved']:.1f}s"
+            + f" ({incremental_report['tokens_used']} tokens, {incremental_report['seconds']:.1f}s this run)."
+        )
+    st.session_state['job_messages']['analysis'] = ('success', completion_message)
+    st.session_state['analysis_complete'] = True # Use session state to indicate completion
+
+# Draw the running analysis into the General Analysis and ATS Analysis placeholders laid out above.
+# Redraws every JOB_POLL_SECONDS, so the rest of the app stays usable while the analysis arrives;
+# when the job ends its results are stored and the app reruns once to show them.
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def analysis_job_view(placeholders, local_scores):
+    job = poll_job('analysis')
+    if job is None:
+        return
+    if job['status'] in FINISHED:
+        complete_analysis(job, local_scores)
+        st.rerun()
+    progress = job['progress'] or {}
+    text = progress.get('text', "")
+
+    with placeholders['status'].container():
+        st.info(f"{job_state_text(job, 'analyzing your profile')} Results appear in the 'General Analysis' and 'ATS Analysis' tabs as they arrive.")
+        if st.button("✖ Cancel analysis", key="cancel_analysis"):
+            cancel_job('analysis')
+            st.rerun()
+
+    # The last line may still be arriving; it is parsed once it is complete. Partial parses are not
+    # timed: the parse span is recorded once, for the finished analysis
+    parser = parse_analysis(text[:text.rfind("\n") + 1])
+    # Scores the full analysis has not written yet show the quick estimate, if there is one
+    quick_scores = {}
+    prescore = progress.get('prescore')
+    if prescore is not None and prescore.done():
+        try:
+            quick_scores = prescore.result()
+        except LLMError:
+            pass  # Quick scores are best effort; the full analysis still follows
+    full_scores = {label: score for label, score in parser.scores.items() if score != 'N/A'}
+    scores = {**parser.scores, **quick_scores, **full_scores, **local_scores}
+
+    with metrics.span("render"):
+        placeholders['general'].markdown(parser.general_text)
+        placeholders['ats'].markdown(parser.ats_text)
+        for label in SCORE_LABELS:
+            render_score(placeholders['scores'][label], label, scores[label])
+        grammar = progress.get('grammar')
+        if grammar is not None and grammar.done():
+            render_grammar_issues(placeholders['grammar'], grammar.result())
+        else:
+            placeholders['grammar'].caption("✏️ Checking grammar...")
+
+if analysis_running:
+    analysis_job_view({'status': analysis_status, 'general': general_placeholder, 'grammar': grammar_placeholder,
+                       'scores': score_placeholders, 'ats': ats_placeholder}, local_scores)
 
+# The Cover Letter tab reruns on its own: its inputs are a form, so typing reruns nothing, and
+# generating a letter reruns only this fragment instead of every tab
+@st.fragment
+def cover_letter_tab():
     # Input fields for cover letter generation
-    company_name = st.text_input("Company Name")
-    job_posting = st.text_area("Job Posting (for tailoring the cover letter)", height=300,
-                               placeholder="Paste the job description here...")
+    with st.form("cover_letter_form", border=False):
+        company_name = st.text_input("Company Name")
+        job_posting = st.text_area("Job Posting (for tailoring the cover letter)", height=300,
+                                   placeholder="Paste the job description here...")
 
-    generate_cl_button = st.button("✨ Generate Cover Letter", type="primary")
+        generate_cl_button = st.form_submit_button("✨ Generate Cover Letter", type="primary")
 
     # Logic to generate cover letter when button is clicked
     if generate_cl_button:
@@ -626,14 +730,17 @@ with tab4:
         elif not company_name.strip() or not job_posting.strip():
              st.warning("Please enter both Company Name and Job Posting to generate a cover letter.")
         else:
-            with st.spinner("AI is generating your cover letter..."):
-                 generated_cl = generate_cover_letter(profile_text_for_cl, company_name, job_posting, user_api_key)
-                 st.session_state['generated_cover_letter'] = generated_cl
+            # Written in the background; the letter streams in below, then moves to the regular output area
+            start_job('cover_letter', cover_letter_job, profile_text_for_cl, company_name, job_posting, user_api_key or openai_api_key)
+
+    show_job_message('cover_letter')
+    text_job_view('cover_letter', "generating cover letter", 'generated_cover_letter')
 
     # Output area will go here
     if st.session_state['generated_cover_letter'].strip():
         st.subheader("Generated Cover Letter")
-        st.text_area("", st.session_state['generated_cover_letter'], height=400)
+        # A real (hidden) label: an empty one makes Streamlit log a warning with a stack trace on every rerun
+        st.text_area("Generated Cover Letter", st.session_state['generated_cover_letter'], height=400, label_visibility="collapsed")
 
         # Add download button
         st.download_button(
@@ -643,44 +750,116 @@ with tab4:
             mime="text/plain"
         )
 
-with tab5:
-    st.header("✍️ AI Powered Resume Builder")
-    st.markdown("Generate a resume based on your profile information and additional details.")
+# Many cover letters at once from a pasted list or CSV (see cover_letter_batch.py).
+# Letters are shown as each one completes and offered together as a zip file.
+@st.fragment
+def batch_cover_letters_panel():
+    with st.expander("📚 Batch: cover letters for many companies"):
+        with st.form("batch_cover_letter_form", border=False):
+            batch_text = st.text_area(
+                "Companies and job postings", height=250,
+                placeholder="Acme Corp\nPaste the Acme job posting here...\n---\nGlobex\nPaste the Globex job posting here...",
+                help="Separate entries with a line of ---; the first line of each entry is the company name. "
+                     "Or upload a CSV with a company and a job posting column.")
+            batch_csv = st.file_uploader("Or upload a CSV", type=["csv"])
+            generate_batch_button = st.form_submit_button("✨ Generate All Cover Letters", type="primary")
+
+        if generate_batch_button:
+            profile_text_for_cl = st.session_state.get('profile_for_cl', '')
+            try:
+                source = batch_csv.getvalue().decode("utf-8", errors="replace") if batch_csv is not None else batch_text
+                jobs = parse_job_list(source)
+            except ValueError as e:
+                jobs = None
+                st.warning(str(e))
+            if not profile_text_for_cl.strip():
+                st.warning("Please analyze your profile first in the 'Profile Input' tab.")
+            elif jobs is not None and not jobs:
+                st.warning("Please enter at least one company and job posting.")
+            elif jobs:
+                st.session_state['batch_cover_letters'] = {}
+                progress = st.progress(0.0, text=f"0 of {len(jobs)} cover letters written")
+                usage = {}
+                try:
+                    with metrics.trace("generate_cover_letter_batch", letters=len(jobs)):
+                        for done, (index, company, letter, error) in enumerate(iter_cover_letters(
+                                profile_text_for_cl, jobs, user_api_key or openai_api_key, usage=usage), start=1):
+                            progress.progress(done / len(jobs), text=f"{done} of {len(jobs)} cover letters written")
+                            if error is not None:
+                                st.error(llm_error_message(error, f"generating the cover letter for {company}"))
+                                continue
+                            st.session_state['batch_cover_letters'][index] = (company, letter)
+                            with st.expander(f"✅ {company}"):
+                                st.markdown(letter)
+                except LLMError as e:
+                    st.error(llm_error_message(e, "generating cover letters"))
+                progress.empty()
+                if usage.get("cached_prompt_tokens"):
+                    st.caption(f"{usage['cached_prompt_tokens']} of {usage['prompt_tokens']} prompt tokens were served from the provider's prompt cache.")
+
+        letters = st.session_state['batch_cover_letters']
+        if letters:
+            if not generate_batch_button:
+                for index in sorted(letters):
+                    company, letter = letters[index]
+                    with st.expander(f"✅ {company}"):
+                        st.markdown(letter)
+            st.download_button(
+                label=f"Download {len(letters)} Cover Letter{'s' if len(letters) != 1 else ''} (.zip)",
+                data=build_cover_letter_zip(letters),
+                file_name="cover_letters.zip",
+                mime="application/zip"
+            )
 
-    # New Input fields for comprehensive CV content
-    resume_name = st.text_input("Full Name")
-    resume_contact = st.text_area("Contact Information (Phone, Email, LinkedIn URL, etc.)", height=100,
-                                 placeholder="Enter your phone number, email, LinkedIn URL, etc.")
-    resume_education = st.text_area("Education", height=150,
-                                   placeholder="List your degrees, universities, dates, GPA (optional)..")
-
-    # Existing input fields
-    resume_about = st.text_area("About Me / Summary for Resume", height=150,
-                               placeholder="Paste your About Me or Summary here...")
-    resume_experience = st.text_area("Experience for Resume", height=200,
-                                     placeholder="Paste your work experience here...")
-    resume_skills = st.text_area("Skills for Resume", height=100,
-                                 placeholder="List your skills here...")
-
-    # Additional fields
-    resume_projects = st.text_area("Projects (Optional)", height=150,
-                                  placeholder="List significant projects, roles, and outcomes...")
-    resume_awards = st.text_area("Awards, Honors, Certifications (Optional)", height=100,
-                                placeholder="List any relevant awards, honors, or certifications...")
-
-    # Optional Job Description for tailoring
-    resume_job_description = st.text_area("Job Description (Optional) for Resume Tailoring", height=200,
-                                          placeholder="Paste a job description here to tailor the resume...")
-
-    generate_button = st.button("✨ Generate Resume", type="primary")
-
-    if generate_button and (resume_name.strip() or resume_contact.strip() or resume_education.strip() or resume_about.strip() or resume_experience.strip() or resume_skills.strip() or resume_projects.strip() or resume_awards.strip()):
-        with st.spinner("Generating resume..."):
+with tab4:
+    st.header("📄 Cover Letter")
+    st.markdown("Generate a tailored cover letter based on your profile and a job description.")
+    cover_letter_tab()
+    batch_cover_letters_panel()
+
+# The Resume Builder's ten fields are one form in a fragment, like the Cover Letter tab
+@st.fragment
+def resume_builder_tab():
+    with st.form("resume_builder_form", border=False):
+        # New Input fields for comprehensive CV content
+        resume_name = st.text_input("Full Name")
+        resume_contact = st.text_area("Contact Information (Phone, Email, LinkedIn URL, etc.)", height=100,
+                                     placeholder="Enter your phone number, email, LinkedIn URL, etc.")
+        resume_education = st.text_area("Education", height=150,
+                                       placeholder="List your degrees, universities, dates, GPA (optional)..")
+
+        # Existing input fields
+        resume_about = st.text_area("About Me / Summary for Resume", height=150,
+                                   placeholder="Paste your About Me or Summary here...")
+        resume_experience = st.text_area("Experience for Resume", height=200,
+                                         placeholder="Paste your work experience here...")
+        resume_skills = st.text_area("Skills for Resume", height=100,
+                                     placeholder="List your skills here...")
+
+        # Additional fields
+        resume_projects = st.text_area("Projects (Optional)", height=150,
+                                      placeholder="List significant projects, roles, and outcomes...")
+        resume_awards = st.text_area("Awards, Honors, Certifications (Optional)", height=100,
+                                    placeholder="List any relevant awards, honors, or certifications...")
+
+        # Optional Job Description for tailoring
+        resume_job_description = st.text_area("Job Description (Optional) for Resume Tailoring", height=200,
+                                              placeholder="Paste a job description here to tailor the resume...")
+
+        generate_button = st.form_submit_button("✨ Generate Resume", type="primary")
+
+    if generate_button:
+        if not (resume_name.strip() or resume_contact.strip() or resume_education.strip() or resume_about.strip() or resume_experience.strip() or resume_skills.strip() or resume_projects.strip() or resume_awards.strip()):
+            st.warning("Please provide content for at least one section to generate a resume.")
+        else:
             # Combine input for the AI
             resume_input_text = f"""# NAME\n{resume_name}\n\n# CONTACT INFORMATION\n{resume_contact}\n\n# EDUCATION\n{resume_education}\n\n# ABOUT ME\n{resume_about}\n\n# EXPERIENCE\n{resume_experience}\n\n# SKILLS\n{resume_skills}\n\n# PROJECTS\n{resume_projects}\n\n# AWARDS, HONORS, CERTIFICATIONS\n{resume_awards}"""
 
-            # Use the generate_resume function (defined above)
-            st.session_state['generated_resume'] = generate_resume(resume_input_text, resume_job_description, user_api_key)
+            # Use the generate_resume function (defined above) as a background job, streaming the draft below as it is written
+            start_job('resume', resume_job, resume_input_text, resume_job_description, user_api_key or openai_api_key)
+
+    show_job_message('resume')
+    text_job_view('resume', "generating resume", 'generated_resume')
 
     # Display the generated resume
     if st.session_state['generated_resume'].strip():
@@ -696,10 +875,58 @@ with tab5:
             file_name="generated_resume.txt",
             mime="text/plain"
         )
-    elif generate_button:
-         st.warning("Please provide content for at least one section to generate a resume.")
+
+with tab5:
+    st.header("✍️ AI Powered Resume Builder")
+    st.markdown("Generate a resume based on your profile information and additional details.")
+    resume_builder_tab()
+
+# Recruiter mode: one job description against many resumes (see candidate_ranking.py). The form and
+# the ranking's live view are a fragment, so ranking does not rerun the rest of the app.
+@st.fragment
+def recruiter_tab():
+    with st.form("recruiter_form", border=False):
+        ranking_files = st.file_uploader("Resumes (PDF, TXT or MD)", type=["pdf", "txt", "md"], accept_multiple_files=True)
+        ranking_job_description = st.text_area("Job Description for Ranking", height=200,
+                                               placeholder="Paste the job description to rank the resumes against...")
+        ranking_top_k = st.number_input("Candidates to analyze in detail", min_value=1, max_value=MAX_RERANK,
+                                        value=min(RERANK_TOP_K, MAX_RERANK),
+                                        help="Every resume is scored locally; only this many of the best are sent to the AI.")
+        rank_button = st.form_submit_button("🏁 Rank Candidates", type="primary")
+
+    if rank_button:
+        if not ranking_files:
+            st.warning("Please upload at least one resume.")
+        elif not tokenize(ranking_job_description):
+            st.warning("Please enter a job description to rank the resumes against.")
+        else:
+            documents = [(ranking_file.name, ranking_file.getvalue()) for ranking_file in ranking_files]
+            start_job('ranking', ranking_job, documents, ranking_job_description, int(ranking_top_k), user_api_key or openai_api_key)
+
+    show_job_message('ranking')
+    ranking_job_view()
+
+    result = st.session_state['candidate_ranking']
+    if result is not None and poll_job('ranking') is None:
+        st.subheader("Ranked Candidates")
+        render_ranking(result, result['ranking'])
+        for candidate in result['ranking'][:result['top_k']]:
+            if candidate.get('sections'):
+                with st.expander(f"#{candidate['rank']} {candidate['name']} — ATS analysis"):
+                    st.markdown(candidate['sections']['ats'] or candidate['sections']['general'])
+        st.download_button(
+            label="Download Ranking (.csv)",
+            data=ranking_csv(result['ranking']),
+            file_name="candidate_ranking.csv",
+            mime="text/csv"
+        )
 
 with tab6:
+    st.header("👥 Recruiter Mode")
+    st.markdown("Rank many resumes against one job description: every resume is scored locally, then the best ones get a full AI analysis.")
+    recruiter_tab()
+
+with tab7:
     st.header("❓ How to Use This Tool")
     st.markdown("""
     1. **Enter Your Profile Content**
@@ -720,6 +947,10 @@ with tab6:
        - Follow the suggestions provided
        - Update your profile/resume accordingly
        - Re-analyze to check improvements
+
+    5. **Rank Candidates (Recruiters)**
+       - Upload many resumes and one job description in Recruiter Mode
+       - Every resume is scored locally; the best ones get a full AI analysis
     """)
 
 # Footer
@@ -0,0 +1,634 @@
+import hashlib
+import json
+import os
+from concurrent.futures import as_completed
+
+import metrics
+from analysis_parser import ANALYSIS_JSON_SCHEMA, parse_analysis
+from openai_clients import (
+    LLMError,
+    LLMRequestError,
+    MissingAPIKeyError,
+    async_call_with_retries,
+    call_with_retries,
+    get_async_client,
+    get_client,
+    rate_limiter_for,
+    run_async,
+)
+from llm_routing import get_route
+from result_cache import get_result_cache, make_cache_key
+from single_flight import get_single_flight
+from pdf_extract import PREVIEW_PAGES, extract_pdf_text_and_preview_cached
+from token_budget import (
+    JOB_DESCRIPTION_TOKEN_BUDGET,
+    MAX_CHUNKS,
+    PROFILE_TOKEN_BUDGET,
+    chunk_token_budget,
+    count_message_tokens,
+    count_tokens,
+    split_into_chunks,
+    truncate_to_tokens,
+)
+
+# Core audit functions, importable without Streamlit (used by app.py and batch_audit.py)
+
+
+# Resolve the API key: an explicit key wins, then OPENAI_API_KEY from the environment
+def resolve_api_key(api_key=None):
+    return api_key or os.getenv("OPENAI_API_KEY")
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# Responses from another endpoint (a local server, a stub, another provider) are cached apart
+# from OpenAI's, even under the same model name
+def endpoint_params(client):
+    base_url = str(getattr(client, "base_url", "") or "").rstrip("/")
+    return {} if base_url in ("", OPENAI_BASE_URL) else {"endpoint": base_url}
+
+# Identical in-flight requests are only shared between callers with the same key (the cache key
+# already covers the endpoint), since the shared call runs, is billed and rate-limited on the leader's key
+def single_flight_key(cache_key, client):
+    api_key = str(getattr(client, "api_key", "") or "")
+    return f"{cache_key}:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]}"
+
+# Rate-limit arguments for call_with_retries: the client's key limiter and the request's size in
+# tokens (its prompt plus max_tokens, which providers count against the limit up front)
+def rate_limit_params(client, model, messages, max_tokens):
+    limiter = rate_limiter_for(client)
+    if limiter is None:
+        return {}
+    return {"limiter": limiter, "tokens": count_message_tokens(messages, model) + (max_tokens or 0)}
+
+# Run a chat completion, serving byte-identical repeat requests from the result cache
+# If a usage dict is passed it is filled with the token counts of the call (zero for cache hits)
+# response_format (e.g. {"type": "json_object"}) is only sent when given
+def cached_chat_completion(function_name, client, model, messages, temperature, max_tokens, usage=None, response_format=None):
+    cache = get_result_cache()
+    # response_format only joins the key when set, so plain requests share entries with streamed ones
+    extra = {"response_format": response_format} if response_format else {}
+    cache_key = make_cache_key(function_name, model, messages, temperature=temperature, max_tokens=max_tokens,
+                               **extra, **endpoint_params(client))
+    cached_content = cache.get(cache_key)
+    if cached_content is not None:
+        if usage is not None:
+            usage.update(prompt_tokens=0, completion_tokens=0, total_tokens=0, cached=True)
+        return cached_content
+
+
+    def request():
+        with metrics.span("llm_call", function=function_name):
+            response = call_with_retries(lambda: client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra
+            ), **rate_limit_params(client, model, messages, max_tokens))
+        # Errors raise before this point, so only successful completions are cached
+        cache.set(cache_key, response.choices[0].message.content)
+        record_response_metrics(function_name, model, response.usage)
+        return response
+
+    # Identical requests already in flight (e.g. from another session) are shared, not repeated
+    response, shared = get_single_flight().do(single_flight_key(cache_key, client), request)
+    metrics.record_cache("in_flight", "shared" if shared else "miss")
+    record_usage(usage, response, shared)
+    return response.choices[0].message.content
+
+# Async variant of cached_chat_completion for use with an AsyncOpenAI client on the background loop
+async def async_cached_chat_completion(function_name, client, model, messages, temperature, max_tokens, usage=None):
+    cache = get_result_cache()
+    cache_key = make_cache_key(function_name, model, messages, temperature=temperature, max_tokens=max_tokens,
+                               **endpoint_params(client))
+    cached_content = cache.get(cache_key)
+    if cached_content is not None:
+        if usage is not None:
+            usage.update(prompt_tokens=0, completion_tokens=0, total_tokens=0, cached=True)
+        return cached_content
+
+    async def request():
+        with metrics.span("llm_call", function=function_name):
+            response = await async_call_with_retries(lambda: client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            ), **rate_limit_params(client, model, messages, max_tokens))
+        cache.set(cache_key, response.choices[0].message.content)
+        record_response_metrics(function_name, model, response.usage)
+        return response
+
+    response, shared = await get_single_flight().do_async(single_flight_key(cache_key, client), request)
+    metrics.record_cache("in_flight", "shared" if shared else "miss")
+    record_usage(usage, response, shared)
+    return response.choices[0].message.content
+
+# Copy token counts from a completion response into the caller's usage dict, if one was passed.
+# A response shared with an identical in-flight request cost this caller nothing.
+def record_usage(usage, response, shared=False):
+    if usage is not None and shared:
+        usage.update(prompt_tokens=0, completion_tokens=0, total_tokens=0, cached=True)
+    elif usage is not None and response.usage is not None:
+        usage.update(
+            prompt_tokens=response.usage.prompt_tokens,
+            completion_tokens=response.usage.completion_tokens,
+            total_tokens=response.usage.total_tokens,
+            cached=False,
+        )
+        # Prompt tokens the provider served from its prompt cache (a repeated prompt prefix)
+        details = getattr(response.usage, "prompt_tokens_details", None)
+        usage["cached_prompt_tokens"] = getattr(details, "cached_tokens", None) or 0
+
+# Count the tokens (and estimated cost) of one upstream completion in the exported metrics
+def record_response_metrics(function_name, model, response_usage):
+    if response_usage is not None:
+        metrics.record_tokens(function_name, model, response_usage.prompt_tokens, response_usage.completion_tokens)
+
+# Stream a chat completion chunk by chunk; the full text is cached once the stream completes.
+# Opening the stream is retried like any other call; a failure mid-stream raises LLMRequestError.
+# Concurrent identical streams share one upstream request and all receive every chunk.
+def stream_chat_completion(function_name, client, model, messages, temperature, max_tokens):
+    cache = get_result_cache()
+    cache_key = make_cache_key(function_name, model, messages, temperature=temperature, max_tokens=max_tokens,
+                               **endpoint_params(client))
+    cached_content = cache.get(cache_key)
+    if cached_content is not None:
+        yield cached_content
+        return
+
+    yield from get_single_flight().stream(
+        "stream:" + single_flight_key(cache_key, client),
+        lambda: _upstream_stream(function_name, cache, cache_key, client, model, messages, temperature, max_tokens)
+    )
+
+def _upstream_stream(function_name, cache, cache_key, client, model, messages, temperature, max_tokens):
+    import openai
+
+    chunks = []
+    response_usage = None
+    with metrics.span("llm_call", function=function_name, stream=True):
+        response = call_with_retries(lambda: client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            # The final event then carries the token counts, which are otherwise lost when streaming
+            stream_options={"include_usage": True}
+        ), **rate_limit_params(client, model, messages, max_tokens))
+        try:
+            for event in response:
+                if getattr(event, "usage", None) is not None:
+                    response_usage = event.usage
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+        except openai.OpenAIError as e:
+            raise LLMRequestError(str(e), status_code=getattr(e, "status_code", None)) from e
+    cache.set(cache_key, "".join(chunks))
+    record_response_metrics(function_name, model, response_usage)
+
+# Create the shared OpenAI client for a function's route (see llm_routing), raising when no key is available
+def client_for(api_key=None, function_name=None):
+    route = get_route(function_name)
+    api_key = route.api_key(resolve_api_key(api_key))
+    if not api_key:
+        raise MissingAPIKeyError()
+    return get_client(api_key, route.base_url)
+
+# Async counterpart of client_for; only use the client from coroutines passed to run_async
+def async_client_for(api_key=None, function_name=None):
+    route = get_route(function_name)
+    api_key = route.api_key(resolve_api_key(api_key))
+    if not api_key:
+        raise MissingAPIKeyError()
+    return get_async_client(api_key, route.base_url)
+
+def model_for(function_name):
+    return get_route(function_name).model
+
+# Add the resume generation function
+def generate_resume(profile_sections_text, job_description=None, api_key=None, stream=False, usage=None):
+    client = client_for(api_key, "generate_resume")
+
+    prompt = f"""Create a professional resume based on the following profile information:
+
+{profile_sections_text}
+
+"""
+    if job_description:
+        prompt += f"""Tailor the resume for the following job description:
+
+Job Description:
+{job_description}
+
+"""
+
+    prompt += """Format the resume as a professional document using markdown, closely following a standard resume structure.
+
+Include the following sections in this approximate order:
+- Name
+- Contact Information
+- Professional Summary / About Me
+- Technical Skills
+- Work Experience
+- Education
+- Projects
+- Awards, Honors, Certifications
+
+Use markdown headings (## for main sections) and bullet points (*) for lists within sections (e.g., job responsibilities, project details).
+Use markdown horizontal rules (---) to clearly separate each main section.
+
+For the Name, use a level 1 markdown heading (#) with the full name, but do NOT make the name text bold yourself (no ** stars).
+For Contact Information, place Phone, Email, LinkedIn, and GitHub on a single line separated by ' | '. Place this line immediately below the Name with minimal vertical space.
+
+Ensure the language is concise, uses action verbs and highlights achievements.
+Do not include placeholder text like '[Your Name]' - use the provided information directly.
+"""
+
+    request = dict(
+        model=model_for("generate_resume"),
+        messages=[
+            {"role": "system", "content": "You are an expert resume writer. Create a well-formatted, professional resume from the provided sections."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=1500 # Adjust as needed for resume length
+    )
+    if stream:
+        return stream_chat_completion("generate_resume", client, **request)
+    return cached_chat_completion("generate_resume", client, usage=usage, **request)
+
+COVER_LETTER_SYSTEM_PROMPT = "You are an expert cover letter writer. Create a compelling and tailored cover letter."
+
+COVER_LETTER_INSTRUCTIONS = """Write a professional cover letter for a job application.
+
+Address the letter to the hiring manager (use a general title like 'Hiring Manager' if no name is provided). Highlight relevant skills and experience from the profile that match the job posting. Explain why you are interested in this specific role and company. Keep the letter concise and professional.
+
+Include a professional closing.
+"""
+
+# The instructions and profile come first and the company-specific part last, so every letter
+# for one profile starts with the same tokens and the provider's prompt cache can reuse them
+def build_cover_letter_request(profile_text, company_name, job_posting):
+    prompt = f"""{COVER_LETTER_INSTRUCTIONS}
+Use the following profile information:
+{profile_text}
+
+Use the following company name and job posting to tailor the letter:
+Company Name: {company_name}
+Job Posting:
+{job_posting}
+"""
+    return dict(
+        model=model_for("generate_cover_letter"),
+        messages=[
+            {"role": "system", "content": COVER_LETTER_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=500 # Adjust as needed for cover letter length
+    )
+
+# Add the cover letter generation function
+def generate_cover_letter(profile_text, company_name, job_posting, api_key=None, stream=False, usage=None):
+    client = client_for(api_key, "generate_cover_letter")
+    request = build_cover_letter_request(profile_text, company_name, job_posting)
+    if stream:
+        return stream_chat_completion("generate_cover_letter", client, **request)
+    return cached_chat_completion("generate_cover_letter", client, usage=usage, **request)
+
+# Function to extract text from PDF (cached by content hash, large files parsed in parallel).
+# The file is read in place or spilled to disk, never copied whole into memory (see pdf_extract).
+def extract_text_from_pdf(pdf_file):
+    return extract_text_and_preview_from_pdf(pdf_file)[0]
+
+# (text, preview) for a PDF, the preview holding only its first preview_pages pages
+def extract_text_and_preview_from_pdf(pdf_file, preview_pages=PREVIEW_PAGES):
+    try:
+        with metrics.span("extract"):
+            return extract_pdf_text_and_preview_cached(pdf_file, preview_pages=preview_pages)
+    except Exception as e:
+        return f"Error extracting text from PDF: {str(e)}", ""
+
+ANALYSIS_SYSTEM_PROMPT = "You are an expert LinkedIn profile and resume reviewer with years of experience in HR and recruitment. Provide comprehensive, structured, and actionable feedback based on the user's input. Ensure the ATS section and score are formatted exactly as requested for parsing."
+
+# The profile (and optional job description) that every analysis prompt starts with
+def build_analysis_context(profile_text, job_description=None):
+    prompt = f"""Analyze this LinkedIn profile or resume content and provide professional feedback. Focus on the following aspects:
+
+{profile_text}
+
+"""
+    
+    if job_description:
+        prompt += f"""Compare this profile content with the following job description and analyze keyword relevance and job fit:
+
+Job Description:
+{job_description}
+
+"""
+    return prompt
+
+# The sections, ATS block and score lines the single-prompt analysis asks for (see analysis_parser)
+ANALYSIS_INSTRUCTIONS = """Provide a detailed analysis covering:
+
+1.  **Overall Impression:** Clarity, conciseness, and professional tone.
+2.  **Tone Analysis:** Evaluate the overall tone of the profile/resume.
+3.  **Grammar and Language Quality:** Assessment of writing mechanics.
+4.  **Action Verbs and Achievements:** Effective use of action verbs and quantifiable achievements.
+5.  **Red Flags/Weak Points:** Passive language, vague phrases, areas needing improvement.
+6.  **Buzzword Identification:** List any buzzwords or overused phrases.
+7.  **Professional Vocabulary:** Assess the use of industry-specific and professional language.
+8.  **Specific Improvement Suggestions:** Actionable recommendations for each section.
+
+---
+## ATS ASSESSMENT START
+
+Provide an evaluation of the content's suitability for Applicant Tracking Systems, focusing on keywords, formatting, and structure. Be detailed in this section.
+
+## ATS ASSESSMENT END
+---
+
+Include numerical scores as percentages (0-100%) for:
+
+-   Clarity Score:
+-   Impact Score:
+-   ATS Score:: [ATS_SCORE_PERCENTAGE]  <-- Provide the ATS score on this line using this format.
+
+Format the response with clear markdown headings (e.g., ## Overall Impression) and bullet points where appropriate. Place the scores at the very end of the analysis in a clear list as requested.
+
+"""
+
+# Instructions for structured mode; the response is parsed by analysis_parser.parse_analysis
+STRUCTURED_ANALYSIS_INSTRUCTIONS = f"""Respond with a single JSON object and nothing else, matching this JSON schema:
+
+{json.dumps(ANALYSIS_JSON_SCHEMA, indent=2)}
+
+"sections" must contain these keys, each a markdown string with bullet points where appropriate:
+"Overall Impression", "Tone Analysis", "Grammar and Language Quality", "Action Verbs and Achievements",
+"Red Flags/Weak Points", "Buzzword Identification", "Professional Vocabulary", "Specific Improvement Suggestions".
+"ats_assessment" is a detailed markdown evaluation of the content's suitability for Applicant Tracking Systems,
+focusing on keywords, formatting, and structure. "scores" holds integer percentages (0-100).
+"""
+
+# Notes requested from each part of an oversized profile (map step)
+CHUNK_NOTES_INSTRUCTIONS = """The text above is part {part} of {total} of a long LinkedIn profile or resume.
+Do not write the analysis yet. Extract concise bullet-point notes that a reviewer needs to assess the whole document:
+
+- Key roles, skills, technologies and quantified achievements
+- Weak phrasing, passive voice, vague statements and buzzwords (quote them verbatim)
+- Grammar, spelling and formatting problems (quote them verbatim)
+- Keywords that match or are missing from the job description, if one was given
+
+Keep the notes under 300 words.
+"""
+CHUNK_NOTES_MAX_TOKENS = 400
+
+
+# Add the token counts in part to the running totals in usage
+def _add_usage(usage, part):
+    if usage is not None:
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            usage[key] = usage.get(key, 0) + part.get(key, 0)
+
+
+async def _chunk_notes(client, chunk_text, job_description, part, total, usage):
+    return await async_cached_chat_completion(
+        "analyze_profile_chunk",
+        client,
+        model=model_for("analyze_profile_chunk"),
+        messages=[
+            {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": build_analysis_context(chunk_text, job_description)
+                + CHUNK_NOTES_INSTRUCTIONS.format(part=part, total=total)}
+        ],
+        temperature=0.3,
+        max_tokens=CHUNK_NOTES_MAX_TOKENS,
+        usage=usage,
+    )
+
+
+def fit_analysis_inputs(profile_text, job_description=None, api_key=None, usage=None):
+    """Return (profile_text, job_description) sized to the analysis token budget.
+
+    Inputs within budget are returned unchanged. A long job description is trimmed; a long
+    profile is split into section-aligned chunks whose notes are requested concurrently (map),
+    and the notes replace the profile text in the final analysis prompt (reduce).
+    """
+    with metrics.span("prompt_build", step="budget"):
+        if job_description and count_tokens(job_description) > JOB_DESCRIPTION_TOKEN_BUDGET:
+            job_description = truncate_to_tokens(job_description, JOB_DESCRIPTION_TOKEN_BUDGET)
+        profile_tokens = count_tokens(profile_text)
+    if profile_tokens <= PROFILE_TOKEN_BUDGET:
+        return profile_text, job_description
+
+    client = async_client_for(api_key, "analyze_profile_chunk")
+    chunks = split_into_chunks(profile_text, chunk_token_budget(profile_tokens))
+    # Anything past MAX_CHUNKS chunks of the largest chunk size is dropped rather than sent
+    omitted = len(chunks) - MAX_CHUNKS
+    chunks = chunks[:MAX_CHUNKS]
+    chunk_usage = [{} for _ in chunks]
+    futures = [
+        run_async(_chunk_notes(client, text, job_description, index + 1, len(chunks), chunk_usage[index]))
+        for index, (_, text) in enumerate(chunks)
+    ]
+    notes = [future.result() for future in futures]
+    for part in chunk_usage:
+        _add_usage(usage, part)
+
+    condensed = [f"The full document ({profile_tokens} tokens) was condensed into notes on each of its {len(chunks)} parts."]
+    for index, ((headings, _), part_notes) in enumerate(zip(chunks, notes), start=1):
+        shown = ", ".join(headings[:4]) + (", ..." if len(headings) > 4 else "")
+        title = f"Part {index}" + (f" ({shown})" if headings else "")
+        condensed.append(f"### {title}\n{part_notes.strip()}")
+    if omitted > 0:
+        condensed.append(f"({omitted} further part(s) of the document were too long to include.)")
+    return "\n\n".join(condensed), job_description
+
+
+# Function to analyze profile with OpenAI.
+# structured=True asks for JSON following ANALYSIS_JSON_SCHEMA instead of free-form markdown (not streamable).
+def analyze_profile(profile_text, job_description=None, api_key=None, stream=False, usage=None, structured=False):
+    # Create OpenAI client with the appropriate API key
+    client = client_for(api_key, "analyze_profile")
+    map_usage = {}
+    profile_text, job_description = fit_analysis_inputs(profile_text, job_description, api_key, map_usage)
+    
+    # Prepare prompt for GPT with expanded analysis requests
+    # Request ATS analysis to be clearly separated for later parsing
+    with metrics.span("prompt_build", step="analysis"):
+        prompt = build_analysis_context(profile_text, job_description)
+        prompt += ANALYSIS_INSTRUCTIONS
+
+    request = dict(
+        model=model_for("analyze_profile"),
+        messages=[
+            {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=2500 # Increased max_tokens slightly to accommodate more detailed ATS feedback
+    )
+    if structured:
+        request["messages"][1]["content"] = build_analysis_context(profile_text, job_description) + STRUCTURED_ANALYSIS_INSTRUCTIONS
+        result = cached_chat_completion("analyze_profile", client, usage=usage, response_format={"type": "json_object"}, **request)
+        _add_usage(usage, map_usage)
+        return result
+
+    # Repeat audits are served from the result cache
+    if stream:
+        return stream_chat_completion("analyze_profile", client, **request)
+    result = cached_chat_completion("analyze_profile", client, usage=usage, **request)
+    _add_usage(usage, map_usage)
+    return result
+
+# Tiered mode: quick scores from the "prescore" route (a small, fast model or a local engine by
+# default, see llm_routing), shown while the full analysis is still being written
+PRESCORE_INSTRUCTIONS = """Do not write an analysis. Estimate the scores only, replying with exactly these three lines and nothing else:
+
+-   Clarity Score: [0-100]%
+-   Impact Score: [0-100]%
+-   ATS Score:: [0-100]%
+"""
+PRESCORE_TOKEN_BUDGET = 1500
+PRESCORE_JOB_DESCRIPTION_TOKEN_BUDGET = 500
+PRESCORE_MAX_TOKENS = 40
+
+
+async def _prescore(client, profile_text, job_description, usage):
+    text = await async_cached_chat_completion(
+        "prescore",
+        client,
+        model=model_for("prescore"),
+        messages=[
+            {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": build_analysis_context(profile_text, job_description) + PRESCORE_INSTRUCTIONS}
+        ],
+        temperature=0,
+        max_tokens=PRESCORE_MAX_TOKENS,
+        usage=usage,
+    )
+    return {label: score for label, score in parse_analysis(text).scores.items() if score != 'N/A'}
+
+
+def submit_prescore(profile_text, job_description=None, api_key=None, usage=None):
+    """Start the quick pre-score on the background loop; returns a Future of {label: "NN%"}.
+
+    Only the beginning of a long profile or job description is sent, so the request stays small.
+    """
+    client = async_client_for(api_key, "prescore")
+    with metrics.span("prompt_build", step="prescore"):
+        profile_text = truncate_to_tokens(profile_text, PRESCORE_TOKEN_BUDGET)
+        if job_description:
+            job_description = truncate_to_tokens(job_description, PRESCORE_JOB_DESCRIPTION_TOKEN_BUDGET)
+    return run_async(_prescore(client, profile_text, job_description, usage))
+
+
+def prescore_profile(profile_text, job_description=None, api_key=None, usage=None):
+    return submit_prescore(profile_text, job_description, api_key, usage).result()
+
+# Sections requested in fan-out mode: (heading, what to cover, max_tokens).
+# Each one is a separate, smaller request, so wall-clock time approaches the slowest section.
+FANOUT_ASPECTS = [
+    ("Overall Impression", "Clarity, conciseness, and professional tone.", 300),
+    ("Tone Analysis", "Evaluate the overall tone of the profile/resume.", 250),
+    ("Grammar and Language Quality", "Assessment of writing mechanics.", 300),
+    ("Action Verbs and Achievements", "Effective use of action verbs and quantifiable achievements.", 300),
+    ("Red Flags/Weak Points", "Passive language, vague phrases, areas needing improvement.", 300),
+    ("Buzzword Identification", "List any buzzwords or overused phrases.", 200),
+    ("Professional Vocabulary", "Assess the use of industry-specific and professional language.", 250),
+    ("Specific Improvement Suggestions", "Actionable recommendations for each section.", 500),
+]
+FANOUT_ATS = "ATS"
+
+FANOUT_ATS_INSTRUCTIONS = """Provide only an Applicant Tracking System assessment, focusing on keywords, formatting, and structure. Use exactly this layout:
+
+## ATS ASSESSMENT START
+
+(your detailed ATS evaluation)
+
+## ATS ASSESSMENT END
+
+-   Clarity Score: [0-100]%
+-   Impact Score: [0-100]%
+-   ATS Score:: [0-100]%
+"""
+
+
+def _fanout_request(profile_text, job_description, aspect):
+    if aspect == FANOUT_ATS:
+        instructions, max_tokens = FANOUT_ATS_INSTRUCTIONS, 700
+    else:
+        title, description, max_tokens = next(item for item in FANOUT_ASPECTS if item[0] == aspect)
+        instructions = f"""Provide only the following section of the analysis, starting with the markdown heading "## {title}":
+
+**{title}:** {description}
+
+Use bullet points where appropriate and do not include any other sections or scores.
+"""
+    return dict(
+        model=model_for("analyze_profile_fanout"),
+        messages=[
+            {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": build_analysis_context(profile_text, job_description) + instructions}
+        ],
+        temperature=0.7,
+        max_tokens=max_tokens
+    )
+
+
+# Text used in place of a section whose request failed, so the rest of the audit still renders
+def _degraded_section(aspect, error):
+    if aspect == FANOUT_ATS:
+        return f"## ATS ASSESSMENT START\n\n_The ATS assessment could not be generated: {error}_\n\n## ATS ASSESSMENT END"
+    return f"## {aspect}\n_This section could not be generated: {error}_"
+
+
+async def _fanout_section(client, profile_text, job_description, aspect, usage):
+    return await async_cached_chat_completion(
+        "analyze_profile_fanout", client, usage=usage, **_fanout_request(profile_text, job_description, aspect)
+    )
+
+
+# Fan-out analysis: yield (aspect, text) as each concurrent per-aspect request completes.
+# Failed aspects yield a degraded placeholder; LLMError is raised only if every aspect fails.
+def iter_profile_fanout(profile_text, job_description=None, api_key=None, usage=None):
+    client = async_client_for(api_key, "analyze_profile_fanout")
+    # Every aspect repeats the profile, so oversized inputs are condensed once up front
+    profile_text, job_description = fit_analysis_inputs(profile_text, job_description, api_key, usage)
+
+    aspects = [title for title, _, _ in FANOUT_ASPECTS] + [FANOUT_ATS]
+    section_usage = {aspect: {} for aspect in aspects}
+    futures = {
+        run_async(_fanout_section(client, profile_text, job_description, aspect, section_usage[aspect])): aspect
+        for aspect in aspects
+    }
+    errors = []
+    for future in as_completed(futures):
+        aspect = futures[future]
+        try:
+            text = future.result()
+        except LLMError as e:
+            errors.append(e)
+            text = _degraded_section(aspect, e)
+        _add_usage(usage, section_usage[aspect])
+        yield aspect, text
+    if len(errors) == len(aspects):
+        raise errors[0]
+
+
+# Merge fan-out sections into the same layout the single-prompt analysis uses
+def merge_fanout_sections(sections):
+    parts = [sections[title].strip() for title, _, _ in FANOUT_ASPECTS if title in sections]
+    if FANOUT_ATS in sections:
+        parts.append("---\n" + sections[FANOUT_ATS].strip())
+    return "\n\n".join(parts) + "\n"
+
+
+def analyze_profile_fanout(profile_text, job_description=None, api_key=None, usage=None):
+    return merge_fanout_sections(dict(iter_profile_fanout(profile_text, job_description, api_key, usage)))
@@ -0,0 +1,195 @@
+import contextvars
+import inspect
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+# Background jobs: long LLM calls run on a per-process worker pool instead of the Streamlit
+# script thread, so a session stays responsive while they run and can run several at once.
+# A job is a function or a generator function. A generator's yields are progress snapshots
+# (e.g. the text streamed so far) returned by poll() while it runs; its return value, or else
+# its last snapshot, is the job's result. Cancelling a queued job drops it, and a running
+# generator is closed at its next yield. Jobs are kept until forget() or, once finished, for
+# JOB_RETENTION_SECONDS, so the jobs of a session that went away do not pile up.
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "16"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", str(60 * 60)))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised by JobRunner.result() for a job that was cancelled"""
+
+
+class _Job:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = QUEUED
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.done = threading.Event()
+        self.future = None
+
+    def snapshot(self):
+        end = self.finished or time.time()
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            # Seconds spent waiting for a worker, and running (so far)
+            "queued_seconds": (self.started or end) - self.submitted,
+            "elapsed_seconds": end - self.started if self.started else 0.0,
+        }
+
+
+def streamed_text(chunks):
+    """Job body for a streamed reply: yields the text received so far and returns the whole text"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield "".join(parts)
+    return "".join(parts)
+
+
+class JobRunner:
+    """Run jobs on a shared thread pool; submit, poll, cancel and collect them by id"""
+
+    def __init__(self, workers=JOB_WORKERS, retention=JOB_RETENTION_SECONDS):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def submit(self, name, function, *args, **kwargs):
+        """Start function(*args, **kwargs) in the background and return the job id"""
+        self._evict_expired()
+        job = _Job(name)
+        with self._lock:
+            self._jobs[job.id] = job
+        # Run in the submitter's context, so metrics traces and spans are recorded as usual
+        job.future = self._executor.submit(contextvars.copy_context().run, self._run, job, function, args, kwargs)
+        return job.id
+
+    def _run(self, job, function, args, kwargs):
+        with self._lock:
+            cancelled = job.cancel_requested
+            if not cancelled:
+                job.status = RUNNING
+                job.started = time.time()
+        if cancelled:
+            # Cancelled just as a worker picked it up, too late for future.cancel()
+            self._finish(job, CANCELLED)
+            return
+        try:
+            result = function(*args, **kwargs)
+            if inspect.isgenerator(result):
+                result = self._drain(job, result)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            self._finish(job, FAILED, error=e)
+        else:
+            self._finish(job, CANCELLED if job.cancel_requested else DONE, result=result)
+
+    def _drain(self, job, generator):
+        try:
+            while True:
+                if job.cancel_requested:
+                    raise JobCancelled()
+                try:
+                    job.progress = next(generator)
+                except StopIteration as stop:
+                    return job.progress if stop.value is None else stop.value
+        finally:
+            generator.close()
+
+    def _finish(self, job, status, result=None, error=None):
+        with self._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished = time.time()
+        job.done.set()
+        if status == FAILED:
+            metrics.record_error(type(error).__name__, stage=f"job:{job.name}")
+
+    def poll(self, job_id):
+        """A snapshot of the job ({id, name, status, progress, result, error, ...}), or None for an unknown id"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job is not None else None
+
+    def cancel(self, job_id):
+        """Ask a job to stop; returns False when it is unknown or already finished"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return False
+            job.cancel_requested = True
+            queued = job.status == QUEUED
+        if queued and job.future.cancel():
+            self._finish(job, CANCELLED)
+        return True
+
+    def result(self, job_id, timeout=None):
+        """Wait for a job and return its result; raises its error, JobCancelled, or TimeoutError"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if not job.done.wait(timeout):
+            raise TimeoutError(f"Job {job_id} did not finish within {timeout} seconds")
+        if job.status == CANCELLED:
+            raise JobCancelled()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def forget(self, job_id):
+        """Drop a job's record; a job still running finishes on its own"""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.retention
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]:
+                del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+
+
+_job_runner = JobRunner()
+
+
+def get_job_runner():
+    return _job_runner
+
+
+def job_stats():
+    return _job_runner.stats()
+
+
+metrics.register_collector("jobs", job_stats)
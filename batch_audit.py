@@ -0,0 +1,181 @@
+"""Headless batch audit: analyze every profile in a directory against one or more job descriptions.
+
+Example:
+    python batch_audit.py resumes/ --jd jobs/data_engineer.txt --jd jobs/ml_engineer.txt \
+        --output audit.jsonl --workers 8
+    python batch_audit.py resumes/ --corpus-top 3   # each profile's 3 best jobs from job_corpus.py
+    python batch_audit.py resumes/ --jd job.txt --metrics-file audit.prom --trace audit_traces.jsonl
+
+Each line of the output file is one JSON record per (profile, job description) pair.
+Re-running with the same output file skips pairs that already completed successfully.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+import metrics
+from analysis_parser import parse_analysis
+from auditor_core import analyze_profile, analyze_profile_fanout, extract_text_from_pdf
+from job_corpus import JobCorpus
+from keyword_score import keyword_match
+from openai_clients import LLMError, get_client_stats
+
+PROFILE_EXTENSIONS = {".pdf", ".txt", ".md"}
+
+
+# Read a profile or job description as text; PDFs go through the same extractor as the app
+def read_document(path):
+    if path.lower().endswith(".pdf"):
+        with open(path, "rb") as pdf_file:
+            return extract_text_from_pdf(pdf_file)
+    with open(path, "r", encoding="utf-8", errors="replace") as text_file:
+        return text_file.read()
+
+
+def list_documents(path):
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(path, name)
+        for name in os.listdir(path)
+        if os.path.splitext(name)[1].lower() in PROFILE_EXTENSIONS
+    )
+
+
+# A pair is identified by file names plus content hashes, so edited files are re-audited
+def pair_id(profile_path, profile_text, jd_path, jd_text):
+    digest = hashlib.sha256((profile_text + "\0" + jd_text).encode("utf-8")).hexdigest()[:16]
+    return f"{os.path.basename(profile_path)}::{os.path.basename(jd_path)}::{digest}"
+
+
+# Collect the ids of pairs already written without an error
+def load_completed(output_path):
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as output_file:
+        for line in output_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A partially written last line from an interrupted run
+            if not record.get("error"):
+                completed.add(record["id"])
+    return completed
+
+
+def audit_pair(record_id, profile_path, profile_text, jd_path, jd_text, api_key, fanout=False, structured=False):
+    with metrics.trace("batch_audit", record_id=record_id):
+        return _audit_pair(record_id, profile_path, profile_text, jd_path, jd_text, api_key, fanout, structured)
+
+
+def _audit_pair(record_id, profile_path, profile_text, jd_path, jd_text, api_key, fanout, structured):
+    usage = {}
+    record = {"id": record_id, "profile": profile_path, "job_description": jd_path, "usage": usage}
+    start = time.perf_counter()
+    try:
+        if fanout:
+            analysis_result = analyze_profile_fanout(profile_text, jd_text, api_key, usage=usage)
+        else:
+            analysis_result = analyze_profile(profile_text, jd_text, api_key, usage=usage, structured=structured)
+    except LLMError as e:
+        record["latency_s"] = round(time.perf_counter() - start, 3)
+        record["error"] = str(e)
+        record["error_type"] = type(e).__name__
+        record["status_code"] = getattr(e, "status_code", None)
+        return record
+    record["latency_s"] = round(time.perf_counter() - start, 3)
+
+    with metrics.span("parse"):
+        parsed = parse_analysis(analysis_result)
+    record["scores"] = parsed.numeric_scores
+    # Keyword match comes from the local engine rather than the model
+    keyword_report = keyword_match(profile_text, jd_text)
+    record["scores"]["Keyword Match"] = keyword_report["score"]
+    record["missing_keywords"] = keyword_report["missing"]
+    record["sections"] = {"general": parsed.general_text, "ats": parsed.ats_text, "by_title": parsed.sections}
+    return record
+
+
+# corpus_top > 0 also audits each profile against its best matches from the job corpus (job_corpus.py)
+def run_batch(profiles_path, jd_paths, output_path, workers=4, api_key=None, fanout=False, structured=False,
+              corpus_top=0, log=print):
+    profiles = [(path, read_document(path)) for path in list_documents(profiles_path)]
+    job_descriptions = [(path, read_document(path)) for path in jd_paths]
+    completed = load_completed(output_path)
+    corpus = JobCorpus() if corpus_top else None
+
+    pending = []
+    for profile_path, profile_text in profiles:
+        if profile_text.startswith("Error"):
+            log(f"Skipping {profile_path}: {profile_text}")
+            continue
+        matched_jobs = []
+        if corpus is not None:
+            for match in corpus.top_matches(profile_text, corpus_top, details=False):
+                matched_jobs.append((f"corpus:{match['id']}", corpus.get_job(match['id'])['text']))
+        for jd_path, jd_text in job_descriptions + matched_jobs:
+            record_id = pair_id(profile_path, profile_text, jd_path, jd_text)
+            if record_id not in completed:
+                pending.append((record_id, profile_path, profile_text, jd_path, jd_text))
+
+    log(f"{len(pending)} pairs to audit ({len(completed)} already completed)")
+    write_lock = threading.Lock()
+    failures = 0
+    with open(output_path, "a", encoding="utf-8") as output_file, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(audit_pair, *pair, api_key, fanout, structured): pair for pair in pending}
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                # Any other failure (e.g. in parsing) is that pair's error; the rest of the batch carries on
+                record_id, profile_path, _, jd_path, _ = futures[future]
+                record = {"id": record_id, "profile": profile_path, "job_description": jd_path,
+                          "error": str(e) or type(e).__name__, "error_type": type(e).__name__}
+            failures += bool(record.get("error"))
+            with write_lock:
+                output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output_file.flush()
+    log(f"Done: {len(pending) - failures} succeeded, {failures} failed")
+    log(f"OpenAI client stats: {json.dumps(get_client_stats())}")
+    return len(pending), failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch LinkedIn profile / resume audit")
+    parser.add_argument("profiles", help="Directory (or single file) of .pdf, .txt or .md profiles")
+    parser.add_argument("--jd", action="append", default=[], help="Job description file; repeat for several")
+    parser.add_argument("--corpus-top", type=int, default=0,
+                        help="Also audit each profile against its N best-matching jobs in the job corpus")
+    parser.add_argument("--output", default="audit_results.jsonl", help="JSONL file to append results to")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent analyses")
+    parser.add_argument("--api-key", help="OpenAI API key (defaults to OPENAI_API_KEY)")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint, e.g. a local stub")
+    parser.add_argument("--fanout", action="store_true", help="Request each analysis section concurrently")
+    parser.add_argument("--structured", action="store_true", help="Ask for JSON output following the analysis schema")
+    parser.add_argument("--metrics-file", help="Write stage timings, tokens, cost and errors here (Prometheus text format)")
+    parser.add_argument("--trace", help="Append one JSON trace per audited pair to this file")
+    args = parser.parse_args(argv)
+    if not args.jd and not args.corpus_top:
+        parser.error("give at least one --jd file or --corpus-top")
+
+    load_dotenv()
+    if args.base_url:
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+    metrics.configure(trace_path=args.trace, metrics_file=args.metrics_file)
+    _, failures = run_batch(args.profiles, args.jd, args.output, args.workers, args.api_key, args.fanout, args.structured,
+                            args.corpus_top)
+    if args.metrics_file:
+        metrics.write_metrics_file(args.metrics_file)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
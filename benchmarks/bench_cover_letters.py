@@ -0,0 +1,74 @@
+# Batch cover letters (cover_letter_batch.py) against the local OpenAI stub.
+# Generates letters for N companies one at a time and with bounded concurrency, and checks that
+# the stub never sees more than the concurrency limit at once, that every letter arrives in the
+# zip, and how much of each prompt is a prefix shared with the earlier ones (served from the
+# provider's prompt cache on the real API).
+# Run from the repository root: python benchmarks/bench_cover_letters.py --jobs 24 --latency 0.3
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai_stub import start_stub_server
+
+PROFILE = """# ABOUT ME
+Data engineer with eight years of experience building batch and streaming pipelines.
+
+# EXPERIENCE
+Senior Data Engineer, Initrode (2019-2024): moved 40 nightly jobs from cron to Airflow, cut warehouse cost by 30%.
+Data Engineer, Hooli (2016-2019): built the Kafka ingestion layer for clickstream data.
+
+# SKILLS
+Python, SQL, Airflow, Kafka, Spark, dbt, AWS, Terraform
+"""
+
+
+def make_jobs(count):
+    return [(f"Company {index}", f"Data engineer {index}: Python, SQL and Kafka; team {index} owns the lakehouse.")
+            for index in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch cover letter generation against the OpenAI stub")
+    parser.add_argument("--jobs", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds the OpenAI stub waits before answering")
+    parser.add_argument("--concurrency", type=int, action="append", help="Concurrency limits to measure (repeatable)")
+    args = parser.parse_args(argv)
+
+    stub = start_stub_server(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    os.environ["OPENAI_API_KEY"] = "sk-stub"
+    os.environ["RESULT_CACHE_PATH"] = ""
+    from cover_letter_batch import build_cover_letter_zip, iter_cover_letters
+    from result_cache import get_result_cache
+
+    jobs = make_jobs(args.jobs)
+    print(f"{args.jobs} cover letters, stub latency {args.latency}s")
+    print(f"{'concurrency':>11} {'seconds':>8} {'first s':>8} {'max in flight':>14} {'cached prompt':>14}")
+    for concurrency in args.concurrency or [1, 4, 8]:
+        get_result_cache().clear()
+        stub.state.max_in_flight = 0
+        stub.state.prompts = []
+        usage = {}
+        letters = {}
+        first = None
+        start = time.perf_counter()
+        for index, company, letter, error in iter_cover_letters(PROFILE, jobs, concurrency=concurrency, usage=usage):
+            assert error is None, error
+            first = first or time.perf_counter() - start
+            letters[index] = (company, letter)
+        elapsed = time.perf_counter() - start
+        assert stub.state.max_in_flight <= concurrency, (stub.state.max_in_flight, concurrency)
+        names = zipfile.ZipFile(io.BytesIO(build_cover_letter_zip(letters))).namelist()
+        assert len(names) == args.jobs and names[0].startswith("01_company_0"), names[:3]
+        cached_share = usage["cached_prompt_tokens"] / usage["prompt_tokens"]
+        print(f"{concurrency:>11} {elapsed:>8.2f} {first:>8.2f} {stub.state.max_in_flight:>14} {cached_share:>13.0%}")
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
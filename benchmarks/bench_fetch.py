@@ -0,0 +1,71 @@
+# Benchmark the profile fetcher against the local profile server.
+# Compares serial fetching (the old one-URL-at-a-time behaviour) with the concurrent fetcher,
+# then refetches to show conditional requests (304s) and checks the blocked-page retry and
+# the per-host concurrency cap.
+# Run from the repository root: python benchmarks/bench_fetch.py
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profile_fetch import HttpCache, ProfileFetcher, fetch_urls
+from profile_server import FIXTURES_DIR, start_profile_server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the profile fetcher")
+    parser.add_argument("--urls", type=int, default=24, help="URLs to fetch (cycled over the fixture pages)")
+    parser.add_argument("--latency", type=float, default=0.1, help="Server latency per request in seconds")
+    parser.add_argument("--per-host", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    names = sorted(name[:-5] for name in os.listdir(FIXTURES_DIR) if name.endswith(".html"))
+    blocked = "/in/sam-lee/"
+    server = start_profile_server(latency=args.latency, blocked_paths=[blocked])
+    # Distinct query strings make every URL a separate cache entry
+    urls = [f"{server.base_url}/in/{names[i % len(names)]}/?n={i}" for i in range(args.urls)]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        def make_fetcher(name, per_host):
+            return ProfileFetcher(cache=HttpCache(os.path.join(cache_dir, f"{name}.sqlite3")),
+                                  per_host_concurrency=per_host, min_interval=0.0)
+
+        start = time.perf_counter()
+        fetch_urls(urls, make_fetcher("serial", 1))
+        serial = time.perf_counter() - start
+
+        fetcher = make_fetcher("concurrent", args.per_host)
+        server.state.max_in_flight = 0
+        start = time.perf_counter()
+        cold = fetch_urls(urls, fetcher)
+        concurrent = time.perf_counter() - start
+        max_in_flight = server.state.max_in_flight
+
+        full_before = server.state.full_responses
+        start = time.perf_counter()
+        warm = fetch_urls(urls, fetcher)
+        revalidated = time.perf_counter() - start
+        redownloaded = server.state.full_responses - full_before
+
+    failures = [result for result in cold + warm if result["error"]]
+    timings = sorted(result["elapsed_s"] for result in cold)
+    print(f"{len(urls)} URLs, {args.latency * 1000:.0f} ms server latency")
+    print(f"serial (1 per host):       {serial:.2f}s")
+    print(f"concurrent ({args.per_host} per host):   {concurrent:.2f}s  (max {max_in_flight} in flight)")
+    print(f"revalidated (304s):        {revalidated:.2f}s  ({redownloaded} page(s) re-downloaded)")
+    print(f"per-URL p50 {timings[len(timings) // 2] * 1000:.0f} ms, max {timings[-1] * 1000:.0f} ms")
+
+    blocked_results = [result for result in cold if blocked in result["url"]]
+    assert not failures, failures
+    assert max_in_flight <= args.per_host, "per-host concurrency cap exceeded"
+    assert redownloaded == 0, "unchanged pages were downloaded again"
+    assert all(result["from_cache"] for result in warm)
+    assert all(result["attempts"] == 2 for result in blocked_results), "blocked pages should succeed on the mobile retry"
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
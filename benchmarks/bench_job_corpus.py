@@ -0,0 +1,101 @@
+# Benchmark top-N job matching over a synthetic corpus of job descriptions.
+# Times bulk insertion, the first (index-loading) query, steady-state top-N queries and
+# incremental add/remove, and checks the ranking against brute-force keyword_match calls and that
+# jobs added or removed through another connection are picked up.
+# Run from the repository root: python benchmarks/bench_job_corpus.py --jobs 5000
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_corpus import JobCorpus
+from keyword_score import keyword_match
+
+SKILLS = """python sql spark airflow kafka snowflake dbt aws gcp azure docker kubernetes terraform java scala go rust
+react typescript javascript node graphql postgres mysql mongodb redis elasticsearch tableau looker excel pandas numpy
+pytorch tensorflow sklearn nlp llm mlops ci/cd jenkins git linux bash figma sketch accessibility wcag seo marketing
+salesforce hubspot agile scrum jira confluence budgeting forecasting negotiation recruiting onboarding payroll""".split()
+FILLER = """design build maintain collaborate stakeholders deliver scalable reliable pipelines services products customers
+data analytics platform mentor engineers roadmap ownership quality testing documentation production monitoring""".split()
+
+
+def make_job(rng):
+    skills = rng.sample(SKILLS, rng.randint(5, 14))
+    words = skills * rng.randint(1, 3) + rng.sample(FILLER, rng.randint(8, 18))
+    rng.shuffle(words)
+    return " ".join(words)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the job-description corpus")
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+    jobs = [{"text": make_job(rng), "title": f"Job {i}"} for i in range(args.jobs)]
+    profiles = [make_job(rng) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = JobCorpus(os.path.join(directory, "corpus.sqlite3"))
+        start = time.perf_counter()
+        corpus.add_jobs(jobs)
+        insert = time.perf_counter() - start
+
+        # A fresh instance loads the postings from disk on its first query
+        corpus = JobCorpus(corpus.path)
+        start = time.perf_counter()
+        corpus.top_matches(profiles[0], args.top, details=False)
+        first_query = time.perf_counter() - start
+
+        timings = []
+        for profile in profiles:
+            start = time.perf_counter()
+            corpus.top_matches(profile, args.top, details=False)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+
+        start = time.perf_counter()
+        corpus.top_matches(profiles[0], args.top)
+        with_details = time.perf_counter() - start
+
+        # Ranking must agree with scoring every job one by one
+        idf = corpus.idf()
+        matches = corpus.top_matches(profiles[1], args.top, details=False)
+        brute = sorted(
+            ((keyword_match(profiles[1], job["text"], idf=idf)["score"], -job_id) for job_id, job in enumerate(jobs, 1)),
+            reverse=True,
+        )[:args.top]
+        assert [match["score"] for match in matches] == [score for score, _ in brute], "ranking differs from keyword_match"
+
+        start = time.perf_counter()
+        new_id = corpus.add_job(make_job(rng), title="New job")
+        corpus.remove_job(1)
+        corpus.top_matches(profiles[0], args.top, details=False)
+        incremental = time.perf_counter() - start
+        assert corpus.get_job(1) is None and corpus.get_job(new_id) is not None
+
+        # Changes written by another connection (the CLI while the app runs) reach the loaded index
+        other = JobCorpus(corpus.path)
+        external_id = other.add_job("zyxwv quasar nebula", title="External job")
+        top = corpus.top_matches("zyxwv quasar nebula", 1)
+        assert top and top[0]["id"] == external_id, top
+        other.remove_job(external_id)
+        assert all(match["id"] != external_id for match in corpus.top_matches("zyxwv quasar nebula", args.top))
+
+    print(f"{args.jobs} jobs")
+    print(f"bulk insert:            {insert:.2f}s")
+    print(f"first query (load):     {first_query * 1000:.1f} ms")
+    print(f"top-{args.top} query p50/p95:  {timings[len(timings) // 2] * 1000:.2f} / {timings[int(len(timings) * 0.95)] * 1000:.2f} ms")
+    print(f"top-{args.top} with keywords:  {with_details * 1000:.1f} ms")
+    print(f"add + remove + query:   {incremental * 1000:.1f} ms")
+    print("ranking matches brute-force keyword_match")
+
+
+if __name__ == "__main__":
+    main()
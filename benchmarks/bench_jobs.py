@@ -0,0 +1,88 @@
+# Background jobs (background_jobs.py) driven through app.py with Streamlit's AppTest against the
+# local OpenAI stub. Starts an analysis, a cover letter and a resume one after another and checks
+# that each click returns without waiting for its reply, that the three replies are requested at
+# the same time, and that a cancelled job leaves no result behind. Reports the click times and
+# the time until all three results are stored, next to the stub latency they overlap.
+# Run from the repository root: python benchmarks/bench_jobs.py --latency 1.0
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_reruns import find, run_until_idle
+from openai_stub import start_stub_server
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent generations as background jobs")
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds the OpenAI stub waits before answering")
+    args = parser.parse_args(argv)
+
+    stub = start_stub_server(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    os.environ["OPENAI_API_KEY"] = "sk-stub"
+    os.environ["RESULT_CACHE_PATH"] = ""
+    from result_cache import get_result_cache
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    app.run()
+    find(app.text_area, "About Me").input("Data engineer building Python and SQL pipelines.")
+    app.session_state["profile_for_cl"] = "Data engineer building Python and SQL pipelines."
+    app.run()
+
+    def click(label, fields=()):
+        for kind, field_label, value in fields:
+            find(getattr(app, kind), field_label).input(value)
+        find(app.button, label).click()
+        start = time.perf_counter()
+        app.run()
+        assert not app.exception, app.exception
+        return time.perf_counter() - start
+
+    # One analysis first, so the timings below do not include importing and connecting the OpenAI client
+    click("🔍 Analyze")
+    run_until_idle(app)
+    get_result_cache().clear()
+    stub.state.max_in_flight = 0
+    find(app.text_area, "About Me").input("Data engineer building Kafka and Airflow pipelines.")
+    app.run()
+
+    start = time.perf_counter()
+    clicks = {
+        "analyze": click("🔍 Analyze"),
+        "cover letter": click("✨ Generate Cover Letter", [("text_input", "Company Name", "Acme"),
+                                                          ("text_area", "Job Posting", "Python, SQL, Kafka")]),
+        "resume": click("✨ Generate Resume", [("text_area", "Experience for Resume", "Built pipelines")]),
+    }
+    assert sorted(app.session_state["jobs"]) == ["analysis", "cover_letter", "resume"], app.session_state["jobs"]
+    run_until_idle(app)
+    all_done = time.perf_counter() - start
+    assert not app.exception, app.exception
+    assert stub.state.max_in_flight >= 3, f"only {stub.state.max_in_flight} generations ran at once"
+    assert app.session_state["scores"]["Clarity"] != "N/A", app.session_state["scores"]
+    assert app.session_state["generated_cover_letter"] and app.session_state["generated_resume"]
+
+    # Cancelling a resume that is still being written keeps the previous one
+    get_result_cache().clear()
+    previous_resume = app.session_state["generated_resume"]
+    click("✨ Generate Resume", [("text_area", "Experience for Resume", "Built more pipelines")])
+    click("✖ Cancel")
+    assert not app.session_state["jobs"], app.session_state["jobs"]
+    time.sleep(args.latency * 1.5)
+    app.run()
+    assert app.session_state["generated_resume"] == previous_resume
+
+    print(f"{'step':<28} {'ms':>10}")
+    for name, seconds in clicks.items():
+        print(f"{'click ' + name:<28} {seconds * 1000:>10.1f}")
+    print(f"{'all three results stored':<28} {all_done * 1000:>10.1f}  (stub latency {args.latency * 1000:.0f} ms per reply)")
+    print(f"at most {stub.state.max_in_flight} requests in flight; cancelled job left no result")
+
+
+if __name__ == "__main__":
+    main()
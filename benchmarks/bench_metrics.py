@@ -0,0 +1,128 @@
+# Instrumentation check and overhead benchmark for metrics.py.
+# Measures the per-call cost of span() and the record_* functions with metrics disabled and
+# enabled, then runs plain, streamed, fan-out and failing analyses plus a PDF extraction
+# against the local OpenAI stub and checks the exported stages, tokens, cache lookups,
+# errors and trace records.
+# Run from the repository root: python benchmarks/bench_metrics.py --calls 200000
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+from openai_stub import start_stub_server
+from pdf_fixtures import make_text_pdf
+
+PROFILE = "# ABOUT ME\nData engineer with eight years of experience.\n\n# SKILLS\nPython, SQL, Airflow"
+JOB_DESCRIPTION = "Senior data engineer: Python, SQL, Kafka."
+
+
+def per_call_ns(function, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def time_span():
+    with metrics.span("bench", function="bench"):
+        pass
+
+
+def time_record():
+    metrics.record_cache("bench", "hit")
+    metrics.record_tokens("bench", "gpt-3.5-turbo", 100, 50)
+
+
+def measure_overhead(calls):
+    baseline = per_call_ns(lambda: None, calls)
+    results = {}
+    for state in (False, True):
+        metrics.configure(enabled=state)
+        results[state] = (per_call_ns(time_span, calls) - baseline, per_call_ns(time_record, calls) - baseline)
+    metrics.configure(enabled=False)
+    metrics.reset()
+    print(f"{'':<10} {'span()':>10} {'record_*':>10}   (ns per call, loop overhead subtracted)")
+    for state, (span_ns, record_ns) in results.items():
+        print(f"{'enabled' if state else 'disabled':<10} {span_ns:>10.0f} {record_ns:>10.0f}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Instrumentation overhead and export check")
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--pages", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    overhead = measure_overhead(args.calls)
+    # Disabled instrumentation must stay well under a microsecond per call
+    assert overhead[False][0] < 1000 and overhead[False][1] < 1000, overhead[False]
+
+    stub = start_stub_server(latency=0.05)
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    os.environ["OPENAI_API_KEY"] = "sk-stub"
+    from auditor_core import analyze_profile, analyze_profile_fanout, extract_text_from_pdf
+    from openai_clients import LLMRequestError
+    from result_cache import get_result_cache
+
+    trace_path = os.path.join(tempfile.mkdtemp(), "traces.jsonl")
+    metrics.configure(enabled=True, trace_path=trace_path)
+    get_result_cache().clear()
+
+    with metrics.trace("plain"):
+        analyze_profile(PROFILE, JOB_DESCRIPTION)
+    with metrics.trace("repeat"):
+        analyze_profile(PROFILE, JOB_DESCRIPTION)  # served from the result cache
+    with metrics.trace("streamed"):
+        "".join(analyze_profile(PROFILE + "\nKafka", JOB_DESCRIPTION, stream=True))
+    with metrics.trace("fanout"):
+        analyze_profile_fanout(PROFILE, JOB_DESCRIPTION)
+    with metrics.trace("extract"):
+        extract_text_from_pdf(io.BytesIO(make_text_pdf(args.pages)))
+    stub.state.fail_status = 400
+    try:
+        with metrics.trace("failing"):
+            analyze_profile(PROFILE, JOB_DESCRIPTION + " (failing)")
+    except LLMRequestError:
+        pass
+    stub.state.fail_status = None
+
+    server = metrics.start_http_server(0)
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+        exported = response.read().decode("utf-8")
+    print(exported)
+
+    for expected in (
+        'auditor_stage_seconds_count{stage="llm_call",function="analyze_profile"}',
+        'auditor_stage_seconds_count{stage="llm_call",function="analyze_profile",stream="True"}',
+        'auditor_stage_seconds_count{stage="llm_call",function="analyze_profile_fanout"}',
+        'auditor_stage_seconds_count{stage="prompt_build",step="analysis"}',
+        'auditor_stage_seconds_count{stage="extract"}',
+        'auditor_llm_prompt_tokens_total{function="analyze_profile",model="gpt-3.5-turbo"}',
+        'auditor_llm_cost_usd_total{function="analyze_profile_fanout",model="gpt-3.5-turbo"}',
+        'auditor_cache_hit_ratio{cache="result"}',
+        'auditor_errors_total{stage="llm_attempt",type="BadRequestError"}',
+        'auditor_errors_total{stage="failing",type="LLMRequestError"}',
+        'auditor_single_flight_upstream_calls',
+    ):
+        assert expected in exported, f"missing from the export: {expected}"
+
+    with open(trace_path, encoding="utf-8") as f:
+        traces = {trace["name"]: trace for trace in map(json.loads, f)}
+    # Streamed and fan-out calls run on other threads but still belong to the caller's trace
+    assert [span["stage"] for span in traces["streamed"]["spans"]].count("llm_call") == 1, traces["streamed"]
+    assert [span["stage"] for span in traces["fanout"]["spans"]].count("llm_call") == 9, traces["fanout"]
+    assert traces["streamed"]["tokens"] > 0 and traces["repeat"]["tokens"] == 0
+    assert traces["failing"]["error"] == "LLMRequestError"
+    print(f"{len(traces)} traces written to {trace_path}")
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# Benchmark and fuzz the analysis parser against the output corpus in fixtures/analysis_outputs.
+# Compares the original find/re.search/re.sub parsing with the single-pass parser and the JSON path,
+# and checks that arbitrary chunk splits (as seen when streaming) give the same result as one parse.
+# Run from the repository root: python benchmarks/bench_parser.py
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_parser import StreamingAnalysisParser, parse_analysis
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "analysis_outputs")
+REPEATS = 2000
+
+# Scores each fixture should yield (None = no usable score)
+EXPECTED_SCORES = {
+    "canonical.md": {'Clarity': 82, 'Impact': 74, 'ATS': 68},
+    "bold_scores.md": {'Clarity': 78, 'Impact': 61, 'ATS': 70},
+    "numbered_out_of_100.md": {'Clarity': 90, 'Impact': 85, 'ATS': 88},
+    "missing_end_marker.md": {'Clarity': 70, 'Impact': 65, 'ATS': 60},
+    "scores_inside_ats.md": {'Clarity': 80, 'Impact': 72, 'ATS': 55},
+    "no_scores.md": {'Clarity': None, 'Impact': None, 'ATS': None},
+    "structured.json": {'Clarity': 84, 'Impact': 77, 'ATS': 81},
+    "structured_fenced.md": {'Clarity': 88, 'Impact': 79, 'ATS': None},
+    "structured_list_scores.json": {'Clarity': None, 'Impact': None, 'ATS': None},
+}
+
+LEGACY_SCORE_PATTERNS = {
+    'Clarity': r"Clarity Score:\s*(\d+%)",
+    'Impact': r"Impact Score:\s*(\d+%)",
+    'ATS': r"ATS Score:\s*(\d+%)",
+    'Keyword Match': r"Keyword Match Score:\s*(\d+%)",
+}
+
+
+# The parsing app.py used before the single-pass parser, kept here as the baseline
+def legacy_parse(analysis_result):
+    ats_start_marker = "## ATS ASSESSMENT START"
+    ats_end_marker = "## ATS ASSESSMENT END"
+    ats_content = ""
+    other_content = analysis_result
+    if ats_start_marker in analysis_result and ats_end_marker in analysis_result:
+        start_index = analysis_result.find(ats_start_marker)
+        end_index = analysis_result.find(ats_end_marker)
+        if end_index > start_index:
+            ats_content = analysis_result[start_index:end_index + len(ats_end_marker)]
+            other_content = analysis_result[:start_index] + analysis_result[end_index + len(ats_end_marker):]
+    scores = {}
+    for label, pattern in LEGACY_SCORE_PATTERNS.items():
+        match = re.search(pattern, analysis_result, re.MULTILINE)
+        scores[label] = match.group(1) if match else 'N/A'
+    for pattern in LEGACY_SCORE_PATTERNS.values():
+        safe_pattern = re.escape(pattern).replace("\\(", "(").replace("\\)", ")").replace("\\%", "%")
+        other_content = re.sub(f"^{safe_pattern}$", "", other_content, flags=re.MULTILINE).strip()
+    return other_content, ats_content, scores
+
+
+def load_corpus():
+    corpus = {}
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            corpus[name] = f.read()
+    return corpus
+
+
+def parse_in_chunks(text, rng):
+    parser = StreamingAnalysisParser()
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 40)
+        parser.feed(text[position:position + size])
+        position += size
+    parser.close()
+    return parser
+
+
+def time_per_call(function, text, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function(text)
+    return (time.perf_counter() - start) / repeats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark and fuzz the analysis parser")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--splits", type=int, default=200, help="Random chunkings per fixture")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+    corpus = load_corpus()
+    failures = 0
+
+    print(f"{'fixture':<24} {'legacy us':>10} {'parser us':>10} {'legacy ok':>10} {'parser ok':>10}")
+    for name, text in corpus.items():
+        expected = EXPECTED_SCORES.get(name)
+        parsed = parse_analysis(text)
+        scores = {label: parsed.numeric_scores[label] for label in ('Clarity', 'Impact', 'ATS')}
+        legacy_scores = legacy_parse(text)[2]
+        legacy_numeric = {label: int(legacy_scores[label].rstrip('%')) if legacy_scores[label] != 'N/A' else None
+                          for label in ('Clarity', 'Impact', 'ATS')}
+        parser_ok = expected is None or scores == expected
+        legacy_ok = expected is None or legacy_numeric == expected
+        if not parser_ok:
+            failures += 1
+            print(f"  {name}: expected {expected}, parsed {scores}")
+
+        # Streamed text must parse the same however the chunks fall (JSON output is never streamed)
+        if isinstance(parsed, StreamingAnalysisParser):
+            for _ in range(args.splits):
+                chunked = parse_in_chunks(text, rng)
+                if (chunked.scores, chunked.general_text, chunked.ats_text, chunked.sections) != \
+                        (parsed.scores, parsed.general_text, parsed.ats_text, parsed.sections):
+                    failures += 1
+                    print(f"  {name}: chunked parse differs from whole parse")
+                    break
+
+        legacy_time = time_per_call(legacy_parse, text, args.repeats)
+        parser_time = time_per_call(parse_analysis, text, args.repeats)
+        print(f"{name:<24} {legacy_time * 1e6:>10.1f} {parser_time * 1e6:>10.1f} "
+              f"{str(legacy_ok):>10} {str(parser_ok):>10}")
+
+    print("all fixtures parsed as expected" if not failures else f"{failures} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# Benchmark PDF text extraction over 1-, 10- and 100-page documents.
+# Run from the repository root: python benchmarks/bench_pdf_extract.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_extract import extract_pdf_text, extract_pdf_text_cached
+from pdf_fixtures import make_text_pdf
+
+PAGE_COUNTS = [1, 10, 100]
+REPEATS = 3
+
+
+def best_of(function, repeats=REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'pages':>6} {'serial ms':>10} {'parallel ms':>12} {'cached ms':>10}")
+    for page_count in PAGE_COUNTS:
+        pdf_bytes = make_text_pdf(page_count)
+        serial = best_of(lambda: extract_pdf_text(pdf_bytes, max_workers=1))
+        parallel = best_of(lambda: extract_pdf_text(pdf_bytes))
+        assert extract_pdf_text(pdf_bytes) == extract_pdf_text(pdf_bytes, max_workers=1)
+        extract_pdf_text_cached(pdf_bytes)
+        cached = best_of(lambda: extract_pdf_text_cached(pdf_bytes))
+        print(f"{page_count:>6} {serial * 1000:>10.1f} {parallel * 1000:>12.1f} {cached * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
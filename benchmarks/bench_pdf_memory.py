@@ -0,0 +1,138 @@
+# Peak memory per PDF upload: the previous in-memory extraction against pdf_extract's
+# spill-to-disk, memory-mapped and page-capped path.
+# Each measurement runs in a fresh process that first loads the file into a BytesIO, as
+# Streamlit holds an upload. The peak resident set size is then reset through
+# /proc/self/clear_refs (Linux), and the reported peak is the rise above that point while
+# extracting. "peak anon" samples anonymous memory only (the heap); the rest of the RSS peak is
+# file-backed pages of the memory-mapped PDF, which the kernel can drop without swapping.
+# Worker processes are not counted, so extraction is serial (max_workers=1). Also checks that the
+# pinned PyPDF2 caches page images where pdf_extract drops them after each page.
+# Run from the repository root: python benchmarks/bench_pdf_memory.py --scanned-mb 50
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = ["before", "after_upload", "after_path"]
+
+
+def _status_kb(field):
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+# The extraction as it was: the upload's bytes wrapped in a second stream, every page joined
+def _extract_before(upload):
+    import PyPDF2
+
+    pdf_bytes = upload.getvalue() if hasattr(upload, "getvalue") else upload.read()
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return "".join((page.extract_text() or "") + "\n" for page in pdf_reader.pages)
+
+
+def child(mode, path):
+    from pdf_extract import extract_pdf_text
+
+    with open(path, "rb") as f:
+        upload = io.BytesIO(f.read())
+    with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+        f.write("5")  # resets VmHWM to the current RSS
+    baseline_kb = _status_kb("VmRSS")
+    anon_baseline_kb = _status_kb("RssAnon")
+    anon_peak_kb = [anon_baseline_kb]
+    done = threading.Event()
+
+    def sample_anon():
+        while not done.wait(0.002):
+            anon_peak_kb[0] = max(anon_peak_kb[0], _status_kb("RssAnon"))
+
+    sampler = threading.Thread(target=sample_anon, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    if mode == "before":
+        text = _extract_before(upload)
+    elif mode == "after_upload":
+        text = extract_pdf_text(upload, max_workers=1)
+    else:
+        text = extract_pdf_text(path, max_workers=1)
+    seconds = time.perf_counter() - start
+    anon_peak_kb[0] = max(anon_peak_kb[0], _status_kb("RssAnon"))
+    peak_kb = _status_kb("VmHWM")
+    done.set()
+    sampler.join()
+    print(json.dumps({"peak_mb": (peak_kb - baseline_kb) / 1024, "anon_peak_mb": (anon_peak_kb[0] - anon_baseline_kb) / 1024,
+                      "seconds": seconds, "chars": len(text)}))
+
+
+def check_stream_dropping():
+    """The pinned PyPDF2 still caches resolved streams where pdf_extract drops the large ones"""
+    from pdf_extract import LARGE_STREAM_BYTES, iter_page_texts, open_pdf_reader
+    from pdf_fixtures import make_scanned_pdf
+
+    def large_streams(pdf_reader):
+        return [value for value in pdf_reader.resolved_objects.values()
+                if len(getattr(value, "_data", b"")) > LARGE_STREAM_BYTES]
+
+    pdf_bytes = make_scanned_pdf(4)
+    pdf_reader = open_pdf_reader(io.BytesIO(pdf_bytes))
+    pdf_reader.pages[0].extract_text()
+    assert large_streams(pdf_reader), "PyPDF2 no longer caches page images in resolved_objects; see _drop_large_streams"
+    pdf_reader = open_pdf_reader(io.BytesIO(pdf_bytes))
+    for _ in iter_page_texts(pdf_reader):
+        assert not large_streams(pdf_reader), "a page image stayed cached after its page was read"
+
+
+def measure(mode, path):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak RSS per PDF upload")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--text-pages", type=int, default=500)
+    parser.add_argument("--scanned-mb", type=int, default=50)
+    args = parser.parse_args(argv)
+    if args.child:
+        return child(*args.child)
+    if not os.path.exists("/proc/self/clear_refs"):
+        sys.exit("Peak RSS is measured through /proc/self/clear_refs, which needs Linux.")
+
+    from pdf_extract import MAX_CHARS, MAX_PAGES, SPILL_THRESHOLD_BYTES
+    from pdf_fixtures import make_scanned_pdf, make_text_pdf
+
+    check_stream_dropping()
+
+    documents = {
+        f"text, {args.text_pages} pages": make_text_pdf(args.text_pages),
+        f"scanned, {args.scanned_mb} pages": make_scanned_pdf(args.scanned_mb),
+    }
+    print(f"caps: {MAX_PAGES} pages, {MAX_CHARS} characters; spill above {SPILL_THRESHOLD_BYTES // (1024 * 1024)} MB")
+    print(f"{'document':<24} {'MB':>6} {'mode':<14} {'peak RSS MB':>12} {'peak anon MB':>13} {'seconds':>8} {'chars':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, pdf_bytes in documents.items():
+            path = os.path.join(directory, "upload.pdf")
+            with open(path, "wb") as f:
+                f.write(pdf_bytes)
+            results = {mode: measure(mode, path) for mode in MODES}
+            for mode, result in results.items():
+                print(f"{name:<24} {len(pdf_bytes) / 1e6:>6.1f} {mode:<14} {result['peak_mb']:>12.1f} "
+                      f"{result['anon_peak_mb']:>13.1f} {result['seconds']:>8.2f} {result['chars']:>9}")
+            assert results["after_upload"]["chars"] == results["after_path"]["chars"]
+            for mode in ("after_upload", "after_path"):
+                assert results[mode]["anon_peak_mb"] <= results["before"]["anon_peak_mb"] + 1, results
+
+
+if __name__ == "__main__":
+    main()
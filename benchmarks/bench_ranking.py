@@ -0,0 +1,110 @@
+# Two-stage recruiter ranking (candidate_ranking.py) over a folder of synthetic resumes, part PDF
+# and part text. Stage one (parallel ingestion plus the batched local score) is timed with one
+# worker process and with several, and its scores are checked against keyword_match one resume
+# at a time. Stage two reranks the top-K against the local OpenAI stub and checks that results
+# stream in as each analysis completes. Reports stage-one throughput in resumes per second.
+# Run from the repository root: python benchmarks/bench_ranking.py --resumes 5000 --top-k 10
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_job_corpus import FILLER, SKILLS
+from openai_stub import start_stub_server
+from pdf_fixtures import make_pages_pdf
+
+JOB_DESCRIPTION = "Senior data engineer: Python, SQL, Spark, Airflow and Kafka pipelines on AWS with dbt and Terraform."
+
+
+def make_resume_lines(rng):
+    lines = [f"Candidate {rng.randint(1000, 9999)}, data and software engineer"]
+    for _ in range(rng.randint(8, 20)):
+        words = rng.sample(SKILLS, rng.randint(1, 4)) + rng.sample(FILLER, rng.randint(4, 8))
+        rng.shuffle(words)
+        lines.append(" ".join(words))
+    return lines
+
+
+def write_resumes(directory, count, pdf_share, rng):
+    for index in range(count):
+        lines = make_resume_lines(rng)
+        if rng.random() < pdf_share:
+            with open(os.path.join(directory, f"resume_{index:05d}.pdf"), "wb") as pdf_file:
+                pdf_file.write(make_pages_pdf([lines]))
+        else:
+            with open(os.path.join(directory, f"resume_{index:05d}.txt"), "w", encoding="utf-8") as text_file:
+                text_file.write("\n".join(lines))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark two-stage recruiter ranking")
+    parser.add_argument("--resumes", type=int, default=5000)
+    parser.add_argument("--pdf-share", type=float, default=0.5, help="Share of the resumes written as PDFs")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for the parallel run")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds the OpenAI stub waits before answering")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # Generous limits, so the stub sends rate-limit headers like the real API and the limiter follows them
+    stub = start_stub_server(latency=args.latency, rpm=10000, tpm=10000000)
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    os.environ["OPENAI_API_KEY"] = "sk-stub"
+    os.environ["RESULT_CACHE_PATH"] = ""
+    from batch_audit import list_documents, read_document
+    from candidate_ranking import rank_candidates
+    from keyword_score import keyword_match
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_resumes(directory, args.resumes, args.pdf_share, random.Random(args.seed))
+        documents = [(path, path) for path in list_documents(directory)]
+
+        stage_one = {}
+        for workers in sorted({1, args.workers}):
+            events = rank_candidates(documents, JOB_DESCRIPTION, top_k=0, workers=workers)
+            shortlist = next(events)
+            stage_one[workers] = shortlist["stats"]
+            events.close()
+        stats = shortlist["stats"]
+        assert stats["ranked"] == args.resumes and not stats["failed"], stats
+
+        # The batched scores agree with scoring each resume on its own
+        ranking = shortlist["ranking"]
+        scores = [candidate["local_score"] for candidate in ranking]
+        assert scores == sorted(scores, reverse=True), "stage one is not ordered by score"
+        for candidate in random.Random(args.seed).sample(ranking, min(200, len(ranking))):
+            expected = keyword_match(read_document(candidate["name"]), JOB_DESCRIPTION)["score"]
+            assert candidate["local_score"] == expected, (candidate, expected)
+
+        # Stage two: the top-K go to the stub, and each result arrives before the whole ranking is done
+        start = time.perf_counter()
+        events = rank_candidates(documents, JOB_DESCRIPTION, top_k=args.top_k, workers=args.workers)
+        arrivals = []
+        try:
+            while True:
+                event = next(events)
+                arrivals.append((event["event"], time.perf_counter() - start))
+        except StopIteration as stop:
+            final = stop.value
+        total = time.perf_counter() - start
+        reranked = [seconds for event, seconds in arrivals if event == "reranked"]
+        assert len(reranked) == args.top_k, arrivals
+        assert reranked[0] < total - args.latency / 2, "reranked candidates were not streamed as they completed"
+        assert all(candidate.get("ats_score") is not None for candidate in final[:args.top_k]), final[:args.top_k]
+        assert {candidate["local_rank"] for candidate in final[:args.top_k]} == set(range(1, args.top_k + 1))
+
+    print(f"{'stage 1':<22} {'ingest s':>9} {'score s':>8} {'resumes/s':>10}")
+    for workers, worker_stats in stage_one.items():
+        print(f"{f'{workers} worker process(es)':<22} {worker_stats['ingest_seconds']:>9.2f} "
+              f"{worker_stats['score_seconds']:>8.3f} {worker_stats['resumes_per_second']:>10.1f}")
+    print(f"stage 2: top {args.top_k} analyzed; first result after {reranked[0]:.2f}s, all after {total:.2f}s "
+          f"(stub latency {args.latency:.1f}s per analysis)")
+    print(f"{args.resumes} resumes ({args.pdf_share:.0%} PDF); scores match keyword_match on a 200-resume sample")
+
+
+if __name__ == "__main__":
+    main()
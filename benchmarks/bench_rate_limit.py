@@ -0,0 +1,163 @@
+# Per-key rate limiting (rate_limiter.py) against a local OpenAI stub that enforces requests-
+# and tokens-per-minute limits like the real API. One "busy" session fires a burst of cover
+# letters while a few "light" sessions send a handful each, first with the limiter switched off
+# (every request goes straight out and 429s are retried with backoff) and then with it on, each
+# on its own API key. Checks that with the limiter no request fails, and that the light sessions
+# finish before the busy one's burst instead of queueing behind it. Reports 429s, failures,
+# total time, per-session finish times and the limiter's queue waits. Also checks that a cancelled
+# async waiter gives back its place in the queue, or its slot if it was granted meanwhile, and that
+# clients past OPENAI_CLIENT_LIMIT keys are closed least recently used first.
+# Run from the repository root: python benchmarks/bench_rate_limit.py --rpm 600 --tpm 400000
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai_stub import start_stub_server
+
+PROFILE = "Data engineer with eight years of experience building batch and streaming pipelines in Python and SQL."
+
+
+def run_sessions(api_key, busy_requests, light_sessions, light_requests):
+    """Send every session's requests at once; returns ({session: [finish seconds]}, failures, seconds)"""
+    from auditor_core import generate_cover_letter
+    from openai_clients import LLMError
+    from rate_limiter import set_owner
+
+    finished, failures = {}, []
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def request(session, index):
+        set_owner(session)
+        try:
+            # A different company per request, so identical requests are not coalesced
+            generate_cover_letter(PROFILE, f"{session} company {index}", "Python, SQL, Kafka", api_key)
+        except LLMError as e:
+            with lock:
+                failures.append(e)
+            return
+        with lock:
+            finished.setdefault(session, []).append(time.perf_counter() - start)
+
+    work = [("busy", index) for index in range(busy_requests)]
+    work += [(f"light-{session}", index) for index in range(light_requests) for session in range(light_sessions)]
+    with ThreadPoolExecutor(max_workers=len(work)) as executor:
+        for session, index in work:
+            executor.submit(request, session, index)
+    return finished, failures, time.perf_counter() - start
+
+
+def check_cancelled_waiters():
+    """A cancelled acquire_async() leaves the queue, or gives back the slot granted while it was cancelled"""
+    from rate_limiter import RateLimiter
+
+    async def cancel_waiter(release_first):
+        limiter = RateLimiter(initial_concurrency=1, max_concurrency=1)
+        permit = await limiter.acquire_async(10)
+        waiter = asyncio.ensure_future(limiter.acquire_async(10))
+        await asyncio.sleep(0.05)
+        assert limiter._queues and not waiter.done()
+        if release_first:
+            permit.release()  # grants the waiter, which is cancelled before it runs again
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+        assert not limiter._queues and not limiter._turns, "a cancelled waiter stayed queued"
+        if not release_first:
+            permit.release()
+        assert limiter.in_flight == 0, "a cancelled waiter kept its concurrency slot"
+        with await asyncio.wait_for(limiter.acquire_async(10), 1):
+            pass
+
+    asyncio.run(cancel_waiter(release_first=False))
+    asyncio.run(cancel_waiter(release_first=True))
+
+
+def check_client_eviction():
+    """Past OPENAI_CLIENT_LIMIT keys the least recently used clients are closed and their limiters dropped"""
+    import openai_clients
+
+    limit = openai_clients.MAX_CLIENTS
+    openai_clients.MAX_CLIENTS = 2
+    try:
+        first = openai_clients.get_client("sk-evict-1")
+        evicted = openai_clients.get_client("sk-evict-2")
+        openai_clients.get_client("sk-evict-1")  # now the most recently used
+        openai_clients.get_client("sk-evict-3")
+        assert openai_clients.get_client("sk-evict-1") is first and not first.is_closed(), "a recently used client was evicted"
+        assert evicted.is_closed(), "the evicted client was not closed"
+        keys = [api_key for api_key, _ in openai_clients._clients]
+        assert keys == ["sk-evict-3", "sk-evict-1"], keys
+        assert all(api_key != "sk-evict-2" for api_key, _ in openai_clients._rate_limiters)
+        openai_clients.get_async_client("sk-evict-4")
+        openai_clients.get_async_client("sk-evict-5")
+        openai_clients.get_async_client("sk-evict-6")
+        assert [api_key for api_key, _ in openai_clients._async_clients] == ["sk-evict-5", "sk-evict-6"]
+        assert len(openai_clients._client_limiters) == 4
+    finally:
+        openai_clients.MAX_CLIENTS = limit
+        for registry in (openai_clients._clients, openai_clients._async_clients, openai_clients._rate_limiters):
+            for registry_key in [key for key in registry if key[0].startswith("sk-evict")]:
+                client = registry.pop(registry_key)
+                openai_clients._client_limiters.pop(id(client), None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rate-limited LLM requests from several sessions against a limiting stub")
+    parser.add_argument("--rpm", type=int, default=600, help="Requests per minute the stub allows per key")
+    parser.add_argument("--tpm", type=int, default=400000, help="Tokens per minute the stub allows per key")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds the stub waits before answering")
+    parser.add_argument("--busy-requests", type=int, default=40)
+    parser.add_argument("--light-sessions", type=int, default=3)
+    parser.add_argument("--light-requests", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    check_cancelled_waiters()
+    stub = start_stub_server(latency=args.latency, rpm=args.rpm, tpm=args.tpm)
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    os.environ["RESULT_CACHE_PATH"] = ""
+    import openai_clients
+    from result_cache import get_result_cache
+
+    check_client_eviction()
+
+    # Warm up the OpenAI import and a connection on a key the stub does not limit separately
+    openai_clients.get_client("sk-warmup")
+
+    results = {}
+    for mode, enabled in (("limiter off", False), ("limiter on", True)):
+        # Clients (and their limiters) are created per key, so each mode gets a fresh key
+        openai_clients.RATE_LIMIT_ENABLED = enabled
+        get_result_cache().clear()
+        rejected_before = stub.state.rate_limited
+        finished, failures, seconds = run_sessions(f"sk-{mode.replace(' ', '-')}", args.busy_requests,
+                                                   args.light_sessions, args.light_requests)
+        results[mode] = (finished, failures, seconds, stub.state.rate_limited - rejected_before)
+
+    finished, failures, _, _ = results["limiter on"]
+    assert not failures, f"{len(failures)} requests failed with the limiter on: {failures[0]}"
+    light_done = max(max(times) for session, times in finished.items() if session != "busy")
+    assert light_done < max(finished["busy"]), "the light sessions queued behind the busy session's burst"
+
+    print(f"{'mode':<14} {'429s':>6} {'failed':>7} {'total s':>8} {'light done s':>13} {'busy median s':>14}")
+    for mode, (finished, failures, seconds, rejected) in results.items():
+        light = [max(times) for session, times in finished.items() if session != "busy"]
+        busy = finished.get("busy", [])
+        print(f"{mode:<14} {rejected:>6} {len(failures):>7} {seconds:>8.2f} "
+              f"{max(light) if light else float('nan'):>13.2f} {statistics.median(busy) if busy else float('nan'):>14.2f}")
+    stats = openai_clients.get_rate_limit_stats()
+    print(f"limiter queue wait p50 {stats['wait_p50_s']:.2f}s · p99 {stats['wait_p99_s']:.2f}s · "
+          f"max {stats['wait_max_s']:.2f}s; {stats['rate_limited']} responses were 429s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# Per-interaction rerun cost of app.py, driven by Streamlit's AppTest against the local OpenAI stub.
+# Each interaction is timed the way the browser would trigger it:
+#  - a widget inside an st.form does not rerun anything until the form is submitted;
+#  - a widget inside an st.fragment reruns only that fragment;
+#  - anything else reruns the whole script.
+# Wall times include AppTest's own polling for the result (tens of milliseconds per run), so the
+# time spent executing the script or fragment is reported separately as "exec ms".
+# Generations run as background jobs, so a click returns before the reply arrives; "done ms" is
+# the time from the click until the result is stored in the session.
+# Pass --app to measure another version of the script (e.g. a checkout of an older commit) with
+# the same interactions, so the before/after numbers come from one harness.
+# Run from the repository root: python benchmarks/bench_reruns.py [--app path/to/app.py]
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai_stub import start_stub_server
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+JOBS = [
+    ("Data Engineer", "Acme", "Python SQL Airflow Kafka data pipelines on AWS"),
+    ("ML Engineer", "Globex", "Python PyTorch model training, feature stores, SQL"),
+    ("Frontend Developer", "Initech", "TypeScript React CSS accessibility testing"),
+]
+
+
+def fragment_functions(app):
+    """{function name: fragment id} for the fragments registered by the last run.
+
+    AppTest has no API for fragment-scoped reruns, so this reads its fragment storage; the
+    wrapped function is the last function in the fragment wrapper's closure (Streamlit 1.65).
+    """
+    functions = {}
+    for fragment_id, wrapper in app._fragment_storage._fragments.items():
+        inner = [cell.cell_contents for cell in wrapper.__closure__ or () if callable(cell.cell_contents)
+                 and hasattr(cell.cell_contents, "__name__")]
+        if inner:
+            functions[inner[-1].__name__] = fragment_id
+    return functions
+
+
+def run_fragment(app, fragment_id):
+    """Rerun one fragment, as the browser does when a widget inside it changes"""
+    from streamlit.testing.v1 import local_script_runner
+
+    original = local_script_runner.LocalScriptRunner.request_rerun
+
+    def request_fragment_rerun(runner, rerun_data):
+        # The runner starts with a full rerun pending, which would absorb a fragment request
+        runner._requests._rerun_data = replace(rerun_data, fragment_id_queue=[fragment_id])
+        return True
+
+    local_script_runner.LocalScriptRunner.request_rerun = request_fragment_rerun
+    try:
+        app.run()
+    finally:
+        local_script_runner.LocalScriptRunner.request_rerun = original
+
+
+class ExecTimer:
+    """Time spent in the script runner's exec of the page or fragment code, per app.run()"""
+
+    def __init__(self):
+        from streamlit.runtime.scriptrunner import script_runner
+
+        self.total = 0.0
+        original = script_runner.exec_func_with_error_handling
+
+        def timed_exec(function, ctx):
+            start = time.perf_counter()
+            try:
+                return original(function, ctx)
+            finally:
+                self.total += time.perf_counter() - start
+
+        script_runner.exec_func_with_error_handling = timed_exec
+
+
+def run_until_idle(app, poll=0.02):
+    """Rerun the app until the session has no background jobs left (see start_job in app.py)"""
+    while "jobs" in app.session_state and app.session_state["jobs"]:
+        time.sleep(poll)
+        app.run()
+
+
+def find(elements, label):
+    return next(element for element in elements if element.label.startswith(label))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-interaction rerun timing")
+    parser.add_argument("--app", default=APP_PATH)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds the OpenAI stub waits before answering")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    stub = start_stub_server(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    os.environ["OPENAI_API_KEY"] = "sk-stub"
+    os.environ["RESULT_CACHE_PATH"] = ""
+    os.environ["JOB_CORPUS_PATH"] = os.path.join(tempfile.mkdtemp(), "jobs.sqlite3")
+    from job_corpus import get_job_corpus
+    from pdf_fixtures import make_text_pdf
+    from result_cache import get_result_cache
+    from streamlit.testing.v1 import AppTest
+
+    corpus = get_job_corpus(create=True)
+    for title, company, text in JOBS:
+        corpus.add_job(text, title=title, company=company)
+
+    exec_timer = ExecTimer()
+    app = AppTest.from_file(os.path.abspath(args.app), default_timeout=120)
+    app.run()
+    # Fill in a profile and analyse it once, so the later tabs have something to work with
+    find(app.text_area, "About Me").input("Data engineer building Python and SQL pipelines.")
+    find(app.text_area, "Skills").input("Python, SQL, Airflow")
+    app.run()
+    find(app.button, "🔍 Analyze").click()
+    app.run()
+    run_until_idle(app)
+    app.file_uploader[0].set_value(("resume.pdf", make_text_pdf(20), "application/pdf"))
+    app.run()
+    assert not app.exception, app.exception
+
+    def type_into(kind, label):
+        def act(index):
+            find(getattr(app, kind), label).input(f"{label} draft {index}: Python, SQL and Kafka.")
+        return act
+
+    # Form fields are only sent with their submit button, so they are filled in right before the click
+    def click(label, fields=()):
+        def act(index):
+            get_result_cache().clear()
+            for kind, field_label, value in fields:
+                find(getattr(app, kind), field_label).input(value)
+            find(app.button, label).click()
+        return act
+
+    interactions = [
+        ("type in profile About Me", type_into("text_area", "About Me"), "About Me"),
+        ("type in cover letter job posting", type_into("text_area", "Job Posting"), "Job Posting"),
+        ("generate cover letter", click("✨ Generate Cover Letter", [("text_input", "Company Name", "Acme"),
+                                                                  ("text_area", "Job Posting", "Python, SQL, Kafka")]),
+         "✨ Generate Cover Letter"),
+        ("type in resume experience", type_into("text_area", "Experience for Resume"), "Experience for Resume"),
+        ("generate resume", click("✨ Generate Resume", [("text_area", "Experience for Resume", "Built pipelines")]),
+         "✨ Generate Resume"),
+        ("find matching jobs", click("Find best-matching jobs"), "Find best-matching jobs"),
+    ]
+    # Widget label -> the fragment function it is drawn in (see app.py)
+    owners = {
+        "Job Posting": "cover_letter_tab", "✨ Generate Cover Letter": "cover_letter_tab",
+        "Experience for Resume": "resume_builder_tab", "✨ Generate Resume": "resume_builder_tab",
+        "Find best-matching jobs": "job_matches_panel",
+    }
+
+    results = {}
+    print(f"{'interaction':<34} {'reruns':<10} {'median ms':>10} {'exec ms':>10} {'done ms':>10}")
+    for name, act, label in interactions:
+        element = next((element for element in list(app.text_area) + list(app.button) if element.label.startswith(label)), None)
+        fragment_id = fragment_functions(app).get(owners.get(label))
+        # Typing into a form field only updates the browser; submit buttons are what rerun
+        in_form = element is not None and getattr(element, "form_id", "") and element.type != "button"
+        scope = "none" if in_form else "fragment" if fragment_id else "app"
+        timings, exec_timings, done_timings = [], [], []
+        requests_before = stub.state.requests
+        for index in range(args.repeats):
+            act(index)
+            exec_before = exec_timer.total
+            start = time.perf_counter()
+            if scope == "fragment":
+                run_fragment(app, fragment_functions(app)[owners[label]])
+            elif scope == "app":
+                app.run()
+            timings.append(time.perf_counter() - start)
+            exec_timings.append(exec_timer.total - exec_before)
+            assert not app.exception, app.exception
+            if scope == "fragment":
+                # Bring the element tree back to the whole page for the next lookup
+                app.run()
+            if "jobs" in app.session_state and app.session_state["jobs"]:
+                run_until_idle(app)
+                done_timings.append(time.perf_counter() - start)
+        if name.startswith("generate"):
+            assert stub.state.requests - requests_before == args.repeats, f"{name} did not reach the OpenAI stub"
+        results[name] = {"scope": scope, "median_ms": round(statistics.median(timings) * 1000, 2),
+                         "max_ms": round(max(timings) * 1000, 2),
+                         "exec_median_ms": round(statistics.median(exec_timings) * 1000, 2)}
+        if done_timings:
+            results[name]["done_median_ms"] = round(statistics.median(done_timings) * 1000, 2)
+        done = f"{results[name]['done_median_ms']:>10.1f}" if done_timings else f"{'-':>10}"
+        print(f"{name:<34} {scope:<10} {results[name]['median_ms']:>10.1f} {results[name]['exec_median_ms']:>10.1f} {done}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"app": os.path.abspath(args.app), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Per-task LLM routing (llm_routing.py) against two local OpenAI stubs: a slow "cloud" endpoint
+# as the default route and a fast "local" endpoint (standing in for Ollama, llama.cpp or vLLM)
+# routed for quick pre-scores and cover letters. Checks that each request reaches the endpoint
+# and model its route names, that the user's key is only sent to the default endpoint (also when
+# that is a proxy set by base_url alone), and reports how long quick scores take next to the full streamed analysis they run alongside.
+# Run from the repository root: python benchmarks/bench_routing.py --latency 1.5 --local-latency 0.1
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai_stub import start_stub_server
+
+PROFILE = """# ABOUT ME
+Data engineer with eight years of experience building batch and streaming pipelines.
+
+# EXPERIENCE
+Senior Data Engineer, Initrode (2019-2024): moved 40 nightly jobs from cron to Airflow, cut warehouse cost by 30%.
+
+# SKILLS
+Python, SQL, Airflow, Kafka, Spark, dbt, AWS, Terraform
+"""
+JOB_DESCRIPTION = "Data engineer: Python, SQL, Kafka and Airflow on AWS."
+USER_KEY = "sk-user"
+LOCAL_MODEL = "llama3.2:1b"
+
+
+def check_route_defaults():
+    """A default route that only sets base_url (a proxy) gets the user's key, and no endpoint but
+    OpenAI's gets the fast pre-score model it may not serve"""
+    from llm_routing import FAST_MODEL, LOCAL_API_KEY, parse_routes
+
+    proxy = "http://127.0.0.1:9/v1"
+    os.environ.pop("OPENAI_BASE_URL", None)
+    routes = parse_routes({"default": {"base_url": proxy}, "generate_resume": {"base_url": "http://127.0.0.1:8/v1"}})
+    assert routes["default"].api_key(USER_KEY) == USER_KEY, "the proxied default route did not send the user's key"
+    assert "prescore" not in routes, "the proxied default route got the fast pre-score model"
+    assert routes["generate_resume"].api_key(USER_KEY) == LOCAL_API_KEY
+    os.environ["OPENAI_BASE_URL"] = proxy
+    try:
+        routes = parse_routes({})
+        assert "prescore" not in routes, "OPENAI_BASE_URL got the fast pre-score model"
+        assert routes["default"].api_key(USER_KEY) == USER_KEY
+        assert parse_routes({"prescore": {"base_url": proxy}})["prescore"].api_key(USER_KEY) == USER_KEY
+    finally:
+        del os.environ["OPENAI_BASE_URL"]
+    assert parse_routes({})["prescore"].model == FAST_MODEL
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-task LLM routing against two OpenAI stubs")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=1.5, help="Seconds the default (cloud) stub waits before answering")
+    parser.add_argument("--local-latency", type=float, default=0.1, help="Seconds the routed (local) stub waits")
+    args = parser.parse_args(argv)
+
+    cloud = start_stub_server(latency=args.latency)
+    local = start_stub_server(latency=args.local_latency)
+    os.environ["RESULT_CACHE_PATH"] = ""
+    os.environ["OPENAI_API_KEY"] = USER_KEY
+    os.environ["LOCAL_ENGINE_KEY"] = "sk-local-engine"
+    os.environ["LLM_ROUTES"] = json.dumps({
+        "default": {"base_url": cloud.base_url, "api_key_env": "OPENAI_API_KEY"},
+        "prescore": {"base_url": local.base_url, "model": LOCAL_MODEL},
+        "generate_cover_letter": {"base_url": local.base_url, "model": LOCAL_MODEL, "api_key_env": "LOCAL_ENGINE_KEY"},
+    })
+    from auditor_core import analyze_profile, generate_cover_letter, submit_prescore
+    from llm_routing import reload_routes
+    from result_cache import get_result_cache
+
+    check_route_defaults()
+    reload_routes()
+    quick, full = [], []
+    for _ in range(args.repeats):
+        get_result_cache().clear()
+        start = time.perf_counter()
+        prescore = submit_prescore(PROFILE, JOB_DESCRIPTION, USER_KEY)
+        stream = analyze_profile(PROFILE, JOB_DESCRIPTION, USER_KEY, stream=True)
+        scores = prescore.result()
+        quick.append(time.perf_counter() - start)
+        "".join(stream)
+        full.append(time.perf_counter() - start)
+        assert scores, "the quick pre-score returned no scores"
+
+    generate_cover_letter(PROFILE, "Acme", JOB_DESCRIPTION, USER_KEY)
+
+    cloud_calls, local_calls = list(cloud.state.calls), list(local.state.calls)
+    assert cloud_calls and all(call == ("gpt-3.5-turbo", USER_KEY) for call in cloud_calls), cloud_calls
+    assert sorted(set(local_calls)) == [(LOCAL_MODEL, "local"), (LOCAL_MODEL, "sk-local-engine")], local_calls
+    assert all(key != USER_KEY for _, key in local_calls), "the user's key was sent to a routed endpoint"
+
+    print(f"{'step':<28} {'median s':>10}")
+    print(f"{'quick scores (local)':<28} {statistics.median(quick):>10.2f}")
+    print(f"{'full analysis (cloud)':<28} {statistics.median(full):>10.2f}")
+    print(f"cloud requests: {len(cloud_calls)}, local requests: {len(local_calls)}; "
+          "routed models, endpoints and keys as configured")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Benchmark profile section extraction over the saved pages in fixtures/profiles.
+# Compares the previous BeautifulSoup approach (full parse, then one select_one per selector)
+# with the single-pass lxml extractor, and checks both return the same sections.
+# Each page is also measured inflated with extra experience entries, as long real pages are.
+# Run from the repository root: python benchmarks/bench_sections.py
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profile_sections import SECTION_SELECTORS, SectionExtractor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "profiles")
+PADDING = '<div class="feed-item"><p>Shared a post about <b>data</b> pipelines.</p></div>\n'
+
+
+# What scrape_linkedin_profile did before: parse everything, then try each selector in turn
+def soup_parse(html):
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, 'lxml')
+
+
+def soup_extract(soup):
+    sections = {}
+    for section, selectors in SECTION_SELECTORS.items():
+        sections[section] = ''
+        for selector in selectors:
+            element = soup.select_one(selector)
+            if element:
+                sections[section] = element.get_text(strip=True)
+                break
+    return sections
+
+
+def best_of(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark profile section extraction")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--padding", type=int, default=2000, help="Extra elements in the inflated pages")
+    args = parser.parse_args(argv)
+
+    pages = {}
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            html = f.read()
+        pages[name] = html
+        pages[f"{name} (+{args.padding})"] = html.replace("<main", PADDING * args.padding + "<main", 1)
+
+    extractor = SectionExtractor()
+    mismatches = 0
+    print(f"{'page':<28} {'soup parse ms':>14} {'select ms':>10} {'single-pass ms':>15} {'speedup':>8}")
+    for name, html in pages.items():
+        parse_time, soup = best_of(lambda: soup_parse(html), args.repeats)
+        select_time, expected = best_of(lambda: soup_extract(soup), args.repeats)
+        single_time, sections = best_of(lambda: extractor.extract(html), args.repeats)
+        if sections != expected:
+            mismatches += 1
+            print(f"  {name}: sections differ from the BeautifulSoup result")
+        speedup = (parse_time + select_time) / single_time
+        print(f"{name:<28} {parse_time * 1000:>14.2f} {select_time * 1000:>10.2f} {single_time * 1000:>15.2f} {speedup:>7.1f}x")
+
+    print("sections match on every page" if not mismatches else f"{mismatches} mismatch(es)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
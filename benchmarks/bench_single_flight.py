@@ -0,0 +1,128 @@
+# Concurrency check for single-flight request coalescing against the local OpenAI stub.
+# N threads submit the same analysis at once (plain, streamed and fan-out), and the stub
+# must see exactly one upstream request per distinct prompt. A failing upstream call must
+# deliver the same error to every waiter, and requests are only shared within one API key: an
+# invalid key's error must not reach the sessions with a valid key. A failure of the leader's own
+# (it was cancelled, or its rate-limit slot timed out) must not reach the waiters either: they
+# start the call again.
+# Run from the repository root: python benchmarks/bench_single_flight.py --sessions 20
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai_stub import start_stub_server
+
+PROFILE = "# ABOUT ME\nData engineer with eight years of experience.\n\n# SKILLS\nPython, SQL, Airflow"
+JOB_DESCRIPTION = "Senior data engineer: Python, SQL, Kafka."
+
+
+def run_concurrently(sessions, function):
+    barrier = threading.Barrier(sessions)
+    results = [None] * sessions
+
+    def session(index):
+        barrier.wait()
+        try:
+            results[index] = function(index)
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=session, args=(index,)) for index in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def check_leader_failures():
+    from openai_clients import RateLimitQueueError
+    from single_flight import SingleFlight
+
+    single_flight = SingleFlight()
+
+    def leader():
+        time.sleep(0.2)
+        raise RateLimitQueueError("the leader's rate-limit slot timed out")
+
+    results, _ = run_concurrently(2, lambda i: single_flight.do("key", leader if i == 0 else lambda: "waiter"))
+    assert isinstance(results[0], RateLimitQueueError) or isinstance(results[1], RateLimitQueueError), results
+    assert "waiter" in [result[0] for result in results if isinstance(result, tuple)], results
+
+    async def cancelled_leader():
+        async def slow():
+            await asyncio.sleep(0.2)
+            return "done"
+
+        leader_task = asyncio.create_task(single_flight.do_async("async key", slow))
+        await asyncio.sleep(0.01)
+        waiter_task = asyncio.create_task(single_flight.do_async("async key", slow))
+        await asyncio.sleep(0.01)
+        leader_task.cancel()
+        return await waiter_task
+
+    assert asyncio.run(cancelled_leader()) == ("done", False)
+    print("leader-only failures (rate-limit timeout, cancellation) were retried by the waiters")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check single-flight coalescing against the OpenAI stub")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    stub = start_stub_server(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    os.environ["OPENAI_API_KEY"] = "sk-stub"
+    # Imported after OPENAI_BASE_URL is set, so the shared clients point at the stub
+    from auditor_core import analyze_profile, analyze_profile_fanout, FANOUT_ASPECTS
+    from openai_clients import LLMRequestError
+    from result_cache import get_result_cache
+    from single_flight import single_flight_stats
+
+    def check(name, function, expected_requests):
+        get_result_cache().clear()
+        before = stub.state.requests
+        results, elapsed = run_concurrently(args.sessions, function)
+        upstream = stub.state.requests - before
+        errors = [result for result in results if isinstance(result, Exception)]
+        print(f"{name:<10} {args.sessions} sessions -> {upstream} upstream request(s) in {elapsed:.2f}s")
+        assert upstream == expected_requests, f"{name}: expected {expected_requests} upstream requests, got {upstream}"
+        return results, errors
+
+    results, errors = check("plain", lambda i: analyze_profile(PROFILE, JOB_DESCRIPTION), 1)
+    assert not errors and len(set(results)) == 1
+    results, errors = check("streamed", lambda i: "".join(analyze_profile(PROFILE, JOB_DESCRIPTION, stream=True)), 1)
+    assert not errors and len(set(results)) == 1
+    results, errors = check("fan-out", lambda i: analyze_profile_fanout(PROFILE, JOB_DESCRIPTION), len(FANOUT_ASPECTS) + 1)
+    assert not errors and len(set(results)) == 1
+
+    # 400 is not retried, so the leader makes one request and every waiter gets its error
+    stub.state.fail_status = 400
+    results, errors = check("failing", lambda i: analyze_profile(PROFILE, JOB_DESCRIPTION + " (failing)"), 1)
+    stub.state.fail_status = None
+    assert len(errors) == args.sessions and all(isinstance(error, LLMRequestError) for error in errors)
+
+    # Half the sessions send the same prompt with an invalid key: one upstream request per key
+    stub.state.invalid_keys = {"sk-bad"}
+    for mode, function in (("plain", lambda key: analyze_profile(PROFILE, JOB_DESCRIPTION + " (two keys)", key)),
+                           ("streamed", lambda key: "".join(analyze_profile(PROFILE, JOB_DESCRIPTION + " (two keys, streamed)",
+                                                                            key, stream=True)))):
+        results, _ = check(f"{mode} 2 keys", lambda i: function("sk-bad" if i % 2 else "sk-stub"), 2)
+        assert all(isinstance(result, LLMRequestError) for result in results[1::2]), results[1::2]
+        assert not any(isinstance(result, Exception) for result in results[::2]), "an invalid key's error reached another key"
+    stub.state.invalid_keys = set()
+
+    check_leader_failures()
+    print(f"single-flight stats: {single_flight_stats()}")
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Benchmark app start-up and rerun cost.
+#  - Import time: runs the first script execution under `python -X importtime` and reports the
+#    modules imported by app.py itself (Streamlit's own import cost is excluded).
+#  - Rerun time: drives app.py with Streamlit's AppTest and times the first run and typical reruns.
+# Run from the repository root: python benchmarks/bench_startup.py [--output startup.json]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+MARKER = "--- app imports start ---"
+RERUNS = 10
+
+
+# Child process: import Streamlit first, then run the app once so importtime isolates app imports
+def run_child():
+    from streamlit.testing.v1 import AppTest
+
+    print(MARKER, file=sys.stderr, flush=True)
+    AppTest.from_file(APP_PATH, default_timeout=60).run()
+
+
+def measure_import_time():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child"],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    lines = result.stderr.split(MARKER, 1)[-1].splitlines()
+    top_level = []
+    for line in lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        # Top-level imports have exactly one space before the module name; nested ones are indented
+        if name.startswith(" ") and not name.startswith("  "):
+            top_level.append((name.strip(), int(cumulative_us)))
+    top_level.sort(key=lambda item: -item[1])
+    return {
+        "app_import_ms": sum(cumulative for _, cumulative in top_level) / 1000,
+        "slowest_imports_ms": {name: cumulative / 1000 for name, cumulative in top_level[:10]},
+    }
+
+
+def measure_reruns(reruns=RERUNS):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_PATH, default_timeout=60)
+    start = time.perf_counter()
+    app.run()
+    first_run = time.perf_counter() - start
+
+    timings = []
+    for index in range(reruns):
+        # Typing into a text box is the most common interaction and triggers a full rerun
+        app.text_area[0].input(f"Data engineer with {index} years of Python and SQL experience.")
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+    return {
+        "first_run_ms": first_run * 1000,
+        "rerun_median_ms": statistics.median(timings) * 1000,
+        "rerun_max_ms": max(timings) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="App start-up and rerun benchmark")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+    if args.child:
+        run_child()
+        return
+
+    results = {"import": measure_import_time(), "reruns": measure_reruns()}
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
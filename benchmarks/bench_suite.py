@@ -0,0 +1,271 @@
+# Offline benchmark suite: one run, one JSON result file per commit, and a comparison mode.
+#  - Micro: PDF extraction (extract_text_from_pdf, uncached), profile scraping (fetch from the
+#    local profile server and section extraction, as scrape_linkedin_profile does) and analysis
+#    parsing (whole and streamed) over the fixtures.
+#  - End to end: app.py driven by Streamlit's AppTest against the local OpenAI stub, timing the
+#    first run and the reruns after typing, uploading a resume and clicking Analyze (until the
+#    analysis, which runs as a background job, is stored).
+# Results go to benchmarks/results/<commit>.json unless --output is given.
+# Run from the repository root:
+#   python benchmarks/bench_suite.py
+#   python benchmarks/bench_suite.py --compare benchmarks/results/<older commit>.json
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from bench_reruns import run_until_idle
+from openai_stub import start_stub_server
+from pdf_fixtures import make_text_pdf
+from profile_server import FIXTURES_DIR as PROFILE_FIXTURES_DIR, start_profile_server
+
+APP_PATH = os.path.join(ROOT, "app.py")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+ANALYSIS_FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures", "analysis_outputs")
+PDF_PAGE_COUNTS = [1, 10, 100]
+STREAM_CHUNK_SIZE = 16
+# Calls per sample for the sub-millisecond parsing benchmarks
+MICRO_NUMBER = 200
+# Changes smaller than this (percent of the baseline median) are reported as noise
+DEFAULT_THRESHOLD = 10.0
+
+
+def summarize(timings):
+    """Milliseconds summary of a list of timings in seconds"""
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 4),
+        "min_ms": round(min(timings) * 1000, 4),
+        "max_ms": round(max(timings) * 1000, 4),
+        "samples": len(timings),
+    }
+
+
+# Each of the `repeats` samples is the mean of `number` calls, so sub-millisecond work is not all noise
+def timed(function, repeats, setup=None, number=1):
+    timings = []
+    for index in range(repeats):
+        if setup is not None:
+            setup(index)
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+    return summarize(timings)
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=ROOT, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                    text=True, cwd=ROOT).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def bench_pdf(repeats):
+    import io
+
+    from auditor_core import extract_text_from_pdf
+    import pdf_extract
+
+    results = {}
+    for page_count in PDF_PAGE_COUNTS:
+        pdf_bytes = make_text_pdf(page_count)
+        # Every upload is new, so the extraction cache is cleared before each timing
+        results[f"pdf_extract/{page_count}_pages"] = timed(
+            lambda: extract_text_from_pdf(io.BytesIO(pdf_bytes)), repeats,
+            setup=lambda _: pdf_extract._extraction_cache.clear())
+    return results
+
+
+def bench_scrape(repeats):
+    from profile_fetch import ProfileFetcher, fetch_urls
+    from profile_sections import extract_profile_sections
+
+    results = {}
+    names = sorted(name[:-len(".html")] for name in os.listdir(PROFILE_FIXTURES_DIR) if name.endswith(".html"))
+    for name in names:
+        with open(os.path.join(PROFILE_FIXTURES_DIR, f"{name}.html"), encoding="utf-8") as f:
+            html = f.read()
+        results[f"scrape_parse/{name}"] = timed(lambda: extract_profile_sections(html), repeats, number=MICRO_NUMBER)
+
+    # The whole scrape path: one uncached fetch from the local server, then section extraction
+    server = start_profile_server()
+    fetcher = ProfileFetcher(cache=None, min_interval=0)
+
+    def scrape():
+        result = fetch_urls([f"{server.base_url}/in/jane-doe/"], fetcher)[0]
+        return extract_profile_sections(result["text"])
+
+    assert scrape()["experience"], "the fixture page should yield an experience section"
+    results["scrape/fetch_and_parse"] = timed(scrape, repeats)
+    server.shutdown()
+    return results
+
+
+def bench_parse(repeats):
+    from analysis_parser import StreamingAnalysisParser, parse_analysis
+
+    results = {}
+    for name in sorted(os.listdir(ANALYSIS_FIXTURES_DIR)):
+        with open(os.path.join(ANALYSIS_FIXTURES_DIR, name), encoding="utf-8") as f:
+            text = f.read()
+        results[f"parse/{name}"] = timed(lambda: parse_analysis(text), repeats, number=MICRO_NUMBER)
+
+    with open(os.path.join(ANALYSIS_FIXTURES_DIR, "canonical.md"), encoding="utf-8") as f:
+        canonical = f.read()
+    chunks = [canonical[start:start + STREAM_CHUNK_SIZE] for start in range(0, len(canonical), STREAM_CHUNK_SIZE)]
+
+    def parse_stream():
+        parser = StreamingAnalysisParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+
+    results["parse/canonical_streamed"] = timed(parse_stream, repeats, number=MICRO_NUMBER)
+    return results
+
+
+def bench_app(repeats, stub):
+    from streamlit.testing.v1 import AppTest
+
+    from result_cache import get_result_cache
+
+    def button(app, prefix):
+        return next(item for item in app.button if item.label.startswith(prefix))
+
+    def run(app):
+        app.run()
+        assert not app.exception, app.exception
+
+    def run_analysis(app):
+        run(app)
+        run_until_idle(app, poll=0.005)
+        assert not app.exception, app.exception
+
+    results = {}
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    start = time.perf_counter()
+    run(app)
+    results["app/first_run"] = summarize([time.perf_counter() - start])
+
+    # Typing into a profile field: a full rerun with keyword matching but no OpenAI call
+    app.text_area[2].input("Python, SQL, Airflow, Kafka")
+    run(app)
+    results["app/type"] = timed(lambda: run(app), repeats,
+                                setup=lambda index: app.text_area[0].input(f"Data engineer, {index} years of Python."))
+
+    # Uploading a resume: extraction plus the preview; a new document each time
+    results["app/upload_pdf"] = timed(lambda: run(app), repeats, setup=lambda index: app.file_uploader[0].set_value(
+        ("resume.pdf", make_text_pdf(5 + index), "application/pdf")))
+
+    # Clicking Analyze with a new profile each time: a streamed analysis from the stub
+    def new_profile(index):
+        get_result_cache().clear()
+        app.text_area[1].input(f"Built data pipelines at company number {index}.")
+        run(app)
+        button(app, "🔍 Analyze").click()
+
+    before = stub.state.requests
+    results["app/analyze"] = timed(lambda: run_analysis(app), repeats, setup=new_profile)
+    assert stub.state.requests - before >= repeats, "every Analyze click should reach the stub"
+    assert app.session_state["scores"]["Clarity"] != "N/A", app.session_state["scores"]
+
+    # Clicking Analyze again without changes: served from the result cache
+    results["app/analyze_cached"] = timed(lambda: run_analysis(app), repeats,
+                                          setup=lambda _: button(app, "🔍 Analyze").click())
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Print per-benchmark changes against a baseline result file; return the regressed names"""
+    regressions = []
+    print(f"\ncompared with {baseline['meta']['commit']} ({baseline['meta']['timestamp']}):")
+    print(f"{'benchmark':<40} {'base ms':>10} {'now ms':>10} {'change':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<40} {'-':>10} {result['median_ms']:>10.3f} {'new':>8}")
+            continue
+        change = (result["median_ms"] - base["median_ms"]) / base["median_ms"] * 100 if base["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  slower"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<40} {base['median_ms']:>10.3f} {result['median_ms']:>10.3f} {change:>+7.1f}%{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark suite with per-commit result files")
+    parser.add_argument("--only", choices=["micro", "app"], help="Run only the micro or the AppTest benchmarks")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds the OpenAI stub waits before answering")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Percent change reported as a regression or improvement")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with 1 if a benchmark got slower")
+    args = parser.parse_args(argv)
+
+    # The stub must be configured before app or core modules create their OpenAI clients
+    stub = start_stub_server(latency=args.latency)
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    os.environ["OPENAI_API_KEY"] = "sk-stub"
+    # Keep the run independent of any cache or corpus files in the working directory
+    os.environ["RESULT_CACHE_PATH"] = ""
+    os.environ["HTTP_CACHE_PATH"] = ""
+
+    commit, dirty = git_revision()
+    import streamlit
+
+    results = {}
+    if args.only in (None, "micro"):
+        for bench in (bench_pdf, bench_scrape, bench_parse):
+            results.update(bench(args.repeats))
+    if args.only in (None, "app"):
+        results.update(bench_app(args.repeats, stub))
+
+    report = {
+        "meta": {
+            "commit": commit + ("-dirty" if dirty else ""),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "streamlit": streamlit.__version__,
+            "stub_latency_s": args.latency,
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+    print(f"{'benchmark':<40} {'median ms':>10} {'min ms':>10} {'samples':>8}")
+    for name, result in results.items():
+        print(f"{name:<40} {result['median_ms']:>10.3f} {result['min_ms']:>10.3f} {result['samples']:>8}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
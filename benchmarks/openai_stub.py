@@ -0,0 +1,283 @@
+# A local stand-in for the OpenAI chat-completions API, for offline runs of the app,
+# the batch CLI and the benchmarks. Point the OpenAI client at it with
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-stub
+# Run standalone: python benchmarks/openai_stub.py --port 8765 --latency 0.5
+# With --rpm/--tpm it enforces per-key rate limits like the real API: over-limit requests get a
+# 429 with Retry-After, and every response carries x-ratelimit-* headers.
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_ANALYSIS = """## Overall Impression
+The profile is clear and well organised, with a concise summary.
+
+## Tone Analysis
+Professional and confident throughout.
+
+## Grammar and Language Quality
+Minor punctuation issues; otherwise clean.
+
+## Action Verbs and Achievements
+Good use of action verbs such as "led" and "built"; add more metrics.
+
+## Red Flags/Weak Points
+Some passive phrasing in the experience section.
+
+## Buzzword Identification
+"Results-driven", "team player".
+
+## Professional Vocabulary
+Appropriate industry terminology.
+
+## Specific Improvement Suggestions
+- Quantify the impact of each role.
+- Move key skills into the summary.
+
+---
+## ATS ASSESSMENT START
+
+Standard headings and plain formatting parse well. Several keywords from the job description are missing.
+
+## ATS ASSESSMENT END
+---
+
+- Clarity Score: 82%
+- Impact Score: 71%
+- Keyword Match Score: 64%
+- ATS Score:: 76%
+"""
+
+
+class _LimitBucket:
+    """Per-minute limit enforced over bursts of a few seconds' worth, as the real API does"""
+
+    def __init__(self, per_minute, burst_seconds):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def headers(self, kind):
+        # Remaining is reported for the minute, scaled from the current burst
+        return {f"x-ratelimit-limit-{kind}": str(self.per_minute),
+                f"x-ratelimit-remaining-{kind}": str(max(0, int(self.available * self.per_minute / self.capacity))),
+                f"x-ratelimit-reset-{kind}": f"{max(0.0, (self.capacity - self.available) / self.rate) * 1000:.0f}ms"}
+
+
+class StubState:
+    def __init__(self, latency=0.0, content=CANNED_ANALYSIS, chunk_size=16, fail_status=None, model_latency=None,
+                 rpm=None, tpm=None):
+        self.latency = latency
+        # Per-key requests and tokens (prompt words plus max_tokens) per minute; None for no limit
+        self.rpm = rpm
+        self.tpm = tpm
+        self.limits = {}  # API key -> (requests bucket, tokens bucket)
+        self.rate_limited = 0
+        # {model: seconds} overriding latency for requests naming that model (e.g. a fast scoring model)
+        self.model_latency = dict(model_latency or {})
+        self.content = content
+        self.chunk_size = chunk_size
+        # When set, every request is answered with this HTTP status and an error body
+        self.fail_status = fail_status
+        # Requests with these API keys are answered with 401, like an invalid key
+        self.invalid_keys = set()
+        self.requests = 0
+        # Requests being answered right now, and the most seen at once
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Earlier prompts as word lists, to report a shared prefix as cached tokens like the real API
+        self.prompts = []
+        # (model, API key) of recent requests, to check where routed requests went
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def admit(self, api_key, tokens):
+        """(admitted, headers) for one request under the key's limits"""
+        if self.rpm is None and self.tpm is None:
+            return True, {}
+        now = time.monotonic()
+        with self.lock:
+            if api_key not in self.limits:
+                # Requests per second, tokens per six seconds (like rate_limiter.py's defaults)
+                self.limits[api_key] = (_LimitBucket(self.rpm or 10 ** 9, 1), _LimitBucket(self.tpm or 10 ** 12, 6))
+            requests, token_bucket = self.limits[api_key]
+            requests.refill(now)
+            token_bucket.refill(now)
+            admitted = requests.available >= 1 and token_bucket.available >= min(tokens, token_bucket.capacity)
+            if admitted:
+                requests.available -= 1
+                token_bucket.available -= tokens
+            else:
+                self.rate_limited += 1
+            headers = {**requests.headers("requests"), **token_bucket.headers("tokens")}
+            if not admitted:
+                wait = max((1 - requests.available) / requests.rate,
+                           (min(tokens, token_bucket.capacity) - token_bucket.available) / token_bucket.rate)
+                headers["retry-after"] = f"{max(wait, 0.001):.3f}"
+        return admitted, headers
+
+    def cached_prompt_tokens(self, words):
+        with self.lock:
+            cached = 0
+            for earlier in self.prompts:
+                shared = 0
+                for a, b in zip(earlier, words):
+                    if a != b:
+                        break
+                    shared += 1
+                cached = max(cached, shared)
+            self.prompts = self.prompts[-255:] + [words]
+        return cached
+
+
+def make_handler(state):
+    class ChatCompletionsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            api_key = self.headers.get("Authorization", "").removeprefix("Bearer ")
+            with state.lock:
+                state.requests += 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                state.calls = state.calls[-255:] + [(body.get("model"), api_key)]
+            try:
+                prompt_words = sum(len(message.get("content", "").split()) for message in body.get("messages", []))
+                admitted, self._limit_headers = state.admit(api_key, prompt_words + (body.get("max_tokens") or 0))
+                if not admitted:
+                    self._send_error(429)
+                    return
+                time.sleep(state.model_latency.get(body.get("model"), state.latency))
+                if api_key in state.invalid_keys:
+                    self._send_error(401)
+                elif state.fail_status:
+                    self._send_error(state.fail_status)
+                elif body.get("stream"):
+                    self._send_stream(body)
+                else:
+                    self._send_json(body)
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+        def _send_json(self, body):
+            words = [word for message in body.get("messages", []) for word in message.get("content", "").split()]
+            prompt_tokens = len(words)
+            completion_tokens = len(state.content.split())
+            payload = json.dumps({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": state.content}, "finish_reason": "stop"}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_tokens_details": {"cached_tokens": state.cached_prompt_tokens(words)},
+                },
+            }).encode("utf-8")
+            self.send_response(200)
+            self._send_limit_headers()
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_limit_headers(self):
+            for name, value in getattr(self, "_limit_headers", {}).items():
+                self.send_header(name, value)
+
+        def _send_error(self, status):
+            payload = json.dumps({"error": {"message": f"Stub error {status}", "type": "stub_error", "code": None}}).encode("utf-8")
+            self.send_response(status)
+            self._send_limit_headers()
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_stream(self, body):
+            self.send_response(200)
+            self._send_limit_headers()
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(state.content), state.chunk_size):
+                event = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "delta": {"content": state.content[start:start + state.chunk_size]}, "finish_reason": None}],
+                }
+                self._write_chunk(f"data: {json.dumps(event)}\n\n")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                # As the real API does: a final event with no choices, carrying the token counts
+                prompt_tokens = sum(len(message.get("content", "").split()) for message in body.get("messages", []))
+                completion_tokens = len(state.content.split())
+                event = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                }
+                self._write_chunk(f"data: {json.dumps(event)}\n\n")
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, text):
+            data = text.encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+    return ChatCompletionsHandler
+
+
+class _StubServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that hang up mid-stream (a cancelled job, a closed session) are expected
+        if not isinstance(sys.exc_info()[1], (ConnectionError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+# Start the stub on a background thread; port=0 picks a free port
+def start_stub_server(port=0, latency=0.0, content=CANNED_ANALYSIS, model_latency=None, rpm=None, tpm=None):
+    state = StubState(latency=latency, content=content, model_latency=model_latency, rpm=rpm, tpm=tpm)
+    server = _StubServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI chat-completions stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--rpm", type=int, help="Requests per minute allowed per API key")
+    parser.add_argument("--tpm", type=int, help="Tokens (prompt words plus max_tokens) per minute allowed per API key")
+    args = parser.parse_args()
+    stub = start_stub_server(args.port, args.latency, rpm=args.rpm, tpm=args.tpm)
+    print(f"OpenAI stub listening on {stub.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.shutdown()
@@ -0,0 +1,81 @@
+# Generate simple multi-page text PDFs for benchmarks, without extra dependencies
+import random
+
+LINES_PER_PAGE = 40
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_text_pdf(page_count, lines_per_page=LINES_PER_PAGE):
+    return make_pages_pdf([
+        [f"Page {page_number} line {line}: Led data platform migration, improved latency by {line}%."
+         for line in range(lines_per_page)]
+        for page_number in range(1, page_count + 1)
+    ])
+
+
+# A PDF with the given lines of text on each page (a list of lists of lines)
+def make_pages_pdf(pages):
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages object, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for lines in pages:
+        content = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        content_bytes = content.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content_bytes), content_bytes))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    return _write_pdf(objects, page_ids)
+
+
+def _write_pdf(objects, page_ids):
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+
+# A "scanned" document: every page is one large image (random bytes) plus a line of text,
+# so the file is big while the extractable text stays small
+def make_scanned_pdf(page_count, image_bytes=1024 * 1024):
+    side = int(image_bytes ** 0.5)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    pixels = random.Random(0).randbytes(side * side)
+    for page_number in range(1, page_count + 1):
+        objects.append(b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                       b"/BitsPerComponent 8 /Length %d >>\nstream\n%s\nendstream" % (side, side, len(pixels), pixels))
+        image_id = len(objects)
+        content = (f"q 515 0 0 700 40 80 cm /Im1 Do Q BT /F1 10 Tf 40 800 Td "
+                   f"({_escape(f'Portfolio page {page_number}: scanned project drawing.')}) Tj ET").encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> "
+            b"/XObject << /Im1 %d 0 R >> >> /Contents %d 0 R >>" % (image_id, content_id)
+        )
+        page_ids.append(len(objects))
+    return _write_pdf(objects, page_ids)
@@ -0,0 +1,112 @@
+# A local stand-in for public profile pages, serving benchmarks/fixtures/profiles over HTTP.
+# /in/<name>/ returns <name>.html with an ETag and Last-Modified and answers conditional
+# requests with 304. Paths listed in blocked_paths answer 999 (as LinkedIn does) to the first
+# request with desktop headers, so the fetcher's mobile-header retry can be exercised.
+# Run standalone: python benchmarks/profile_server.py --port 8766 --latency 0.2
+import argparse
+import hashlib
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "profiles")
+# Fixed timestamp so Last-Modified is stable across server restarts
+LAST_MODIFIED = formatdate(1700000000, usegmt=True)
+
+
+class ProfileServerState:
+    def __init__(self, latency=0.0, blocked_paths=()):
+        self.latency = latency
+        self.blocked_paths = set(blocked_paths)
+        self.requests = 0
+        self.full_responses = 0
+        self.not_modified = 0
+        self.max_in_flight = 0
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+
+def load_page(name):
+    path = os.path.join(FIXTURES_DIR, f"{name}.html")
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def make_handler(state):
+    class ProfileHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            with state.lock:
+                state.requests += 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                time.sleep(state.latency)
+                self._respond()
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+        def _respond(self):
+            path = self.path.split("?")[0]
+            name = path.rstrip("/").rsplit("/", 1)[-1]
+            body = load_page(name)
+            if body is None:
+                return self._send(404, b"Not found")
+            if path in state.blocked_paths and "iPhone" not in self.headers.get("User-Agent", ""):
+                return self._send(999, b"Request denied")
+
+            etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+            if self.headers.get("If-None-Match") == etag or (
+                    "If-None-Match" not in self.headers and self.headers.get("If-Modified-Since") == LAST_MODIFIED):
+                with state.lock:
+                    state.not_modified += 1
+                return self._send(304, b"", etag=etag)
+            with state.lock:
+                state.full_responses += 1
+            self._send(200, body, etag=etag)
+
+        def _send(self, status, body, etag=None):
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", LAST_MODIFIED)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return ProfileHandler
+
+
+# Start the server on a background thread; port=0 picks a free port
+def start_profile_server(port=0, latency=0.0, blocked_paths=()):
+    state = ProfileServerState(latency=latency, blocked_paths=blocked_paths)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local profile page server")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    args = parser.parse_args()
+    server = start_profile_server(args.port, args.latency)
+    print(f"Profile server listening on {server.base_url}/in/<name>/")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,268 @@
+"""Recruiter ranking: one job description against a folder of resumes, in two stages.
+
+Example:
+    python candidate_ranking.py resumes/ --jd jobs/data_engineer.txt --top-k 20 --output ranking.jsonl
+
+Stage one runs locally over every resume. Files are read by a shared pool of worker processes
+(each extracting its PDFs in-process) and tokenized there; then all candidates are scored at
+once as one product of a candidate x job-term presence matrix with the job's keyword weights,
+the same weighting as keyword_score.keyword_match, so a candidate's local score is its Keyword
+Match score. Stage two sends only the top-K candidates to the LLM for the full ATS analysis and
+scores, RERANK_CONCURRENCY at a time, and yields each result as it completes. Each line of the
+output file is one candidate of the final ranking.
+"""
+import argparse
+import contextvars
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import metrics
+from analysis_parser import SCORE_LABELS, parse_analysis
+from auditor_core import analyze_profile
+from batch_audit import list_documents, read_document
+from keyword_score import keyword_match, tokenize
+from openai_clients import LLMError
+from pdf_extract import extract_pdf_text, worker_process_context
+
+RANKING_WORKERS = int(os.getenv("RANKING_WORKERS", str(os.cpu_count() or 1)))
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "20"))
+# Upper bound on the candidates sent to the LLM in one ranking, so one run cannot run up an unbounded bill
+MAX_RERANK = int(os.getenv("RERANK_LIMIT", "50"))
+RERANK_CONCURRENCY = int(os.getenv("RERANK_CONCURRENCY", "4"))
+# Fewer resumes than this are read in-process; starting the worker processes costs more
+PARALLEL_MIN_DOCUMENTS = 16
+# Rows scored per matrix product, which bounds the presence matrix to about 8k x job terms
+SCORE_BLOCK_ROWS = 8192
+
+_ingest_pool = None
+_ingest_pool_workers = None
+_ingest_pool_lock = threading.Lock()
+
+
+# Runs in a worker process: (name, text, the resume's distinct terms), or (name, error message, None).
+# PDFs are extracted in this process (max_workers=1), so workers never start pools of their own.
+def _ingest_document(document):
+    name, source = document
+    if name.lower().endswith(".pdf"):
+        try:
+            text = extract_pdf_text(source, max_workers=1)
+        except Exception as e:
+            text = f"Error extracting text from PDF: {str(e)}"
+    elif isinstance(source, bytes):
+        text = source.decode("utf-8", errors="replace")
+    else:
+        text = read_document(source)
+    if text.startswith("Error"):
+        return name, text, None
+    return name, text, list(set(tokenize(text)))
+
+
+# One pool for every ranking in the process, started like pdf_extract's (never a plain fork)
+def _get_ingest_pool(workers):
+    global _ingest_pool, _ingest_pool_workers
+    with _ingest_pool_lock:
+        if _ingest_pool_workers != workers:
+            if _ingest_pool is not None:
+                _ingest_pool.shutdown(wait=False)
+            _ingest_pool = ProcessPoolExecutor(max_workers=workers, mp_context=worker_process_context())
+            _ingest_pool_workers = workers
+        return _ingest_pool
+
+
+def ingest_resumes(documents, workers=None):
+    """Read and tokenize (name, path or file bytes) documents in parallel, in input order"""
+    workers = workers or RANKING_WORKERS
+    if workers <= 1 or len(documents) < PARALLEL_MIN_DOCUMENTS:
+        return [_ingest_document(document) for document in documents]
+    chunk_size = max(1, min(64, len(documents) // (workers * 4)))
+    return list(_get_ingest_pool(workers).map(_ingest_document, documents, chunksize=chunk_size))
+
+
+def score_candidates(term_lists, job_description):
+    """Keyword Match scores (0-1) of many candidates for one job, as a NumPy array; None when the job has no keywords"""
+    import numpy as np
+
+    job_counts = Counter(tokenize(job_description))
+    if not job_counts:
+        return None
+    columns = {term: column for column, term in enumerate(job_counts)}
+    weights = 1.0 + np.log(np.fromiter(job_counts.values(), dtype=np.float64, count=len(job_counts)))
+    weights /= weights.sum()
+
+    scores = np.zeros(len(term_lists))
+    for block_start in range(0, len(term_lists), SCORE_BLOCK_ROWS):
+        block = term_lists[block_start:block_start + SCORE_BLOCK_ROWS]
+        rows, hits = [], []
+        for row, terms in enumerate(block):
+            row_hits = [columns[term] for term in terms if term in columns]
+            rows.extend([row] * len(row_hits))
+            hits.extend(row_hits)
+        presence = np.zeros((len(block), len(columns)))
+        presence[rows, hits] = 1.0
+        scores[block_start:block_start + len(block)] = presence @ weights
+    return scores
+
+
+# Stage two for one shortlisted candidate: the full analysis, with Keyword Match from the local engine
+def _rerank(candidate, text, job_description, api_key, structured):
+    with metrics.trace("rerank_candidate", candidate=candidate["name"]):
+        try:
+            analysis_result = analyze_profile(text, job_description, api_key, structured=structured)
+        except LLMError as e:
+            return {**candidate, "error": str(e)}
+        with metrics.span("parse"):
+            parsed = parse_analysis(analysis_result)
+    scores = parsed.numeric_scores
+    keyword_report = keyword_match(text, job_description)
+    scores["Keyword Match"] = keyword_report["score"]
+    return {**candidate, "scores": scores, "ats_score": scores["ATS"], "missing_keywords": keyword_report["missing"],
+            "sections": {"general": parsed.general_text, "ats": parsed.ats_text}}
+
+
+def final_ranking(ranking, reranked):
+    """The local ranking with the reranked candidates ({local_rank: candidate}) first, by LLM ATS score and then local rank"""
+    shortlist = sorted(reranked.values(), key=lambda candidate: (
+        candidate.get("ats_score") is None, -(candidate.get("ats_score") or 0), candidate["local_rank"]))
+    rest = [candidate for candidate in ranking if candidate["local_rank"] not in reranked]
+    return [{**candidate, "rank": rank} for rank, candidate in enumerate(shortlist + rest, start=1)]
+
+
+def rank_candidates(documents, job_description, top_k=None, api_key=None, workers=None, concurrency=None,
+                    structured=False):
+    """Rank (name, path or file bytes) resumes for a job in two stages; a generator of events.
+
+    Yields {'event': 'shortlist', 'ranking', 'failed', 'stats'} once every resume has a local
+    score ('ranking' holds all candidates by local score, 'stats' the stage-one timings and
+    resumes_per_second), then {'event': 'reranked', 'candidate'} for each of the top_k as its
+    analysis completes; a failed analysis has an 'error' and no scores. Returns the final
+    ranking (see final_ranking). Raises ValueError when the job description has no keywords.
+    """
+    import numpy as np
+
+    top_k = min(RERANK_TOP_K if top_k is None else top_k, MAX_RERANK)
+    start = time.perf_counter()
+    with metrics.span("extract", step="ranking"):
+        ingested = ingest_resumes(documents, workers)
+    ingest_seconds = time.perf_counter() - start
+    candidates = [(name, text, terms) for name, text, terms in ingested if terms is not None]
+    failed = [{"name": name, "error": text} for name, text, terms in ingested if terms is None]
+    with metrics.span("rank", step="local"):
+        scores = score_candidates([terms for _, _, terms in candidates], job_description)
+        if scores is None:
+            raise ValueError("The job description has no keywords to rank candidates against.")
+        order = np.lexsort((np.arange(len(candidates)), -scores))
+    stage_seconds = time.perf_counter() - start
+    ranking = [
+        {"local_rank": rank, "name": candidates[index][0], "local_score": int(round(float(scores[index]) * 100))}
+        for rank, index in enumerate(order.tolist(), start=1)
+    ]
+    yield {"event": "shortlist", "ranking": ranking, "failed": failed, "stats": {
+        "resumes": len(documents),
+        "ranked": len(candidates),
+        "failed": len(failed),
+        "ingest_seconds": round(ingest_seconds, 3),
+        "score_seconds": round(stage_seconds - ingest_seconds, 3),
+        "stage_one_seconds": round(stage_seconds, 3),
+        "resumes_per_second": round(len(documents) / stage_seconds, 1) if stage_seconds else None,
+    }}
+
+    # Candidates are keyed by local rank, since file names need not be unique
+    texts = {rank: candidates[index][1] for rank, index in enumerate(order.tolist()[:top_k], start=1)}
+    reranked = {}
+    executor = ThreadPoolExecutor(max_workers=concurrency or RERANK_CONCURRENCY, thread_name_prefix="rerank")
+    try:
+        # Each analysis runs in this context, so it joins the caller's metrics trace and rate-limit queue
+        futures = [
+            executor.submit(contextvars.copy_context().run, _rerank, candidate, texts[candidate["local_rank"]],
+                            job_description, api_key, structured)
+            for candidate in ranking[:top_k]
+        ]
+        for future in as_completed(futures):
+            candidate = future.result()
+            reranked[candidate["local_rank"]] = candidate
+            yield {"event": "reranked", "candidate": candidate}
+    finally:
+        # A closed generator (e.g. a cancelled job) drops the analyses that have not started
+        executor.shutdown(wait=False, cancel_futures=True)
+    return final_ranking(ranking, reranked)
+
+
+def ranking_csv(ranking):
+    """The ranking as CSV text: rank, resume, local keyword score, then the LLM scores of the reranked candidates"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["rank", "resume", "local_score"] + SCORE_LABELS + ["error"])
+    for candidate in ranking:
+        scores = candidate.get("scores") or {}
+        writer.writerow([candidate["rank"], candidate["name"], candidate["local_score"]]
+                        + [scores.get(label, "") for label in SCORE_LABELS] + [candidate.get("error", "")])
+    return output.getvalue()
+
+
+def _score_text(score):
+    return "N/A" if score is None else f"{score}%"
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Rank a folder of resumes for one job description")
+    parser.add_argument("resumes", help="Directory (or single file) of .pdf, .txt or .md resumes")
+    parser.add_argument("--jd", required=True, help="Job description file")
+    parser.add_argument("--top-k", type=int, default=RERANK_TOP_K,
+                        help=f"Candidates to analyze with the LLM after local scoring (at most {MAX_RERANK})")
+    parser.add_argument("--output", help="JSONL file for the final ranking, one candidate per line")
+    parser.add_argument("--workers", type=int, default=RANKING_WORKERS, help="Processes reading resumes")
+    parser.add_argument("--concurrency", type=int, default=RERANK_CONCURRENCY, help="Concurrent LLM analyses")
+    parser.add_argument("--api-key", help="OpenAI API key (defaults to OPENAI_API_KEY)")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint, e.g. a local stub")
+    parser.add_argument("--structured", action="store_true", help="Ask for JSON output following the analysis schema")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    if args.base_url:
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+    documents = [(path, path) for path in list_documents(args.resumes)]
+    events = rank_candidates(documents, read_document(args.jd), args.top_k, args.api_key, args.workers,
+                             args.concurrency, args.structured)
+    try:
+        while True:
+            event = next(events)
+            if event["event"] == "shortlist":
+                stats = event["stats"]
+                print(f"Stage 1: scored {stats['ranked']} resume(s) in {stats['stage_one_seconds']:.2f}s "
+                      f"({stats['resumes_per_second']} resumes/s; {stats['failed']} could not be read)")
+                for candidate in event["ranking"][:args.top_k]:
+                    print(f"{candidate['local_rank']:>5}. {candidate['local_score']:>3}%  {candidate['name']}")
+                print(f"Stage 2: analyzing the top {min(args.top_k, MAX_RERANK)} with the LLM")
+            else:
+                candidate = event["candidate"]
+                result = (f"error: {candidate['error']}" if "error" in candidate else
+                          "  ".join(f"{label} {_score_text(score)}" for label, score in candidate["scores"].items()))
+                print(f"  #{candidate['local_rank']:<5} {candidate['name']}: {result}", flush=True)
+    except StopIteration as stop:
+        ranking = stop.value
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    print("Final ranking:")
+    for candidate in ranking[:min(args.top_k, MAX_RERANK)]:
+        print(f"{candidate['rank']:>5}. ATS {_score_text(candidate.get('ats_score')):>4}  "
+              f"keywords {candidate['local_score']:>3}%  {candidate['name']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            for candidate in ranking:
+                output_file.write(json.dumps(candidate, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
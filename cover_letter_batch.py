@@ -0,0 +1,114 @@
+import asyncio
+import csv
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import as_completed
+
+from auditor_core import async_cached_chat_completion, async_client_for, build_cover_letter_request
+from openai_clients import LLMError, run_async
+
+# Batch cover letters: one profile, many (company, job posting) pairs. Every request starts with
+# the same instructions and profile text (see build_cover_letter_request), so after the first
+# letter the provider can serve that prefix from its prompt cache. Letters are requested
+# concurrently, at most COVER_LETTER_CONCURRENCY at a time, and yielded as each one completes.
+
+COVER_LETTER_CONCURRENCY = int(os.getenv("COVER_LETTER_CONCURRENCY", "4"))
+# Upper bound on the pairs accepted in one batch, so one paste cannot run up an unbounded bill
+MAX_BATCH_JOBS = int(os.getenv("COVER_LETTER_BATCH_LIMIT", "50"))
+
+COMPANY_COLUMNS = ("company", "company name", "company_name")
+POSTING_COLUMNS = ("job posting", "job_posting", "posting", "job description", "job_description", "description")
+ENTRY_SEPARATOR = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+
+
+def _csv_columns(header):
+    columns = [name.strip().lower() for name in header]
+    company = next((columns.index(name) for name in COMPANY_COLUMNS if name in columns), None)
+    posting = next((columns.index(name) for name in POSTING_COLUMNS if name in columns), None)
+    return company, posting
+
+
+def parse_job_list(text):
+    """Return [(company_name, job_posting)] from a pasted list or CSV.
+
+    CSV needs a header with a company column and a job posting (or description) column; quoted
+    postings may span lines. Otherwise entries are separated by lines of "---", and the first
+    line of each entry is the company name and the rest its posting. Raises ValueError for an
+    incomplete entry or more than MAX_BATCH_JOBS entries.
+    """
+    text = text.lstrip("\ufeff").strip()
+    if not text:
+        return []
+    rows = list(csv.reader(io.StringIO(text)))
+    company_column, posting_column = _csv_columns(rows[0])
+    if company_column is not None and posting_column is not None:
+        width = max(company_column, posting_column) + 1
+        entries = []
+        for row in rows[1:]:
+            if any(cell.strip() for cell in row):
+                row = row + [""] * (width - len(row))
+                entries.append((row[company_column].strip(), row[posting_column].strip()))
+    else:
+        entries = []
+        for block in ENTRY_SEPARATOR.split(text):
+            if block.strip():
+                company, _, posting = block.strip().partition("\n")
+                entries.append((company.strip(), posting.strip()))
+
+    for number, (company, posting) in enumerate(entries, start=1):
+        if not company or not posting:
+            raise ValueError(f"Entry {number} ({company or 'no company name'}) needs both a company name and a job posting.")
+    if len(entries) > MAX_BATCH_JOBS:
+        raise ValueError(f"{len(entries)} entries given; at most {MAX_BATCH_JOBS} cover letters are generated per batch.")
+    return entries
+
+
+async def _bounded_letter(semaphore, client, profile_text, company_name, job_posting, usage):
+    async with semaphore:
+        return await async_cached_chat_completion(
+            "generate_cover_letter", client, usage=usage,
+            **build_cover_letter_request(profile_text, company_name, job_posting)
+        )
+
+
+def iter_cover_letters(profile_text, jobs, api_key=None, concurrency=None, usage=None):
+    """Yield (index, company_name, letter, error) for each (company_name, job_posting) in jobs as it completes.
+
+    A failed letter has letter None and the LLMError as error; the other letters are unaffected.
+    Token counts of all letters are added to usage, including the prompt tokens the provider
+    served from its cache (cached_prompt_tokens).
+    """
+    client = async_client_for(api_key, "generate_cover_letter")
+    semaphore = asyncio.Semaphore(concurrency or COVER_LETTER_CONCURRENCY)
+    letter_usage = [{} for _ in jobs]
+    futures = {
+        run_async(_bounded_letter(semaphore, client, profile_text, company, posting, letter_usage[index])): index
+        for index, (company, posting) in enumerate(jobs)
+    }
+    for future in as_completed(futures):
+        index = futures[future]
+        try:
+            letter, error = future.result(), None
+        except LLMError as e:
+            letter, error = None, e
+        if usage is not None:
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens", "cached_prompt_tokens"):
+                usage[key] = usage.get(key, 0) + letter_usage[index].get(key, 0)
+        yield index, jobs[index][0], letter, error
+
+
+def letter_file_name(index, company_name):
+    slug = re.sub(r"[^a-z0-9]+", "_", company_name.lower()).strip("_") or "company"
+    return f"{index + 1:02d}_{slug[:60]}_cover_letter.txt"
+
+
+def build_cover_letter_zip(letters):
+    """Zip archive (bytes) of {index: (company_name, letter)}, one text file per letter in input order"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for index in sorted(letters):
+            company_name, letter = letters[index]
+            archive.writestr(letter_file_name(index, company_name), letter)
+    return buffer.getvalue()
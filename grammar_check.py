@@ -0,0 +1,139 @@
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from result_cache import ResultCache
+
+# Grammar checking against a local LanguageTool server (or LANGUAGETOOL_URL if set).
+# The checker starts once per process; results are cached per sentence, so re-analysis
+# after a small edit only sends the sentences that changed.
+
+LANGUAGE = "en-US"
+SENTENCE_PATTERN = re.compile(r"[^.!?\n]+(?:[.!?]+|$)", re.MULTILINE)
+# Sentences are sent to LanguageTool in one request, separated by blank lines
+BATCH_SEPARATOR = "\n\n"
+
+_sentence_cache = ResultCache(max_entries=10000, ttl=7 * 24 * 60 * 60, name="grammar")
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="grammar")
+_tool = None
+_tool_error = None
+_check_error = None  # Why the last check failed, if it did (e.g. the server crashed or timed out)
+_tool_lock = threading.Lock()
+_warm_up = None
+
+
+# Start (once) and return the shared LanguageTool instance, or None if it cannot run here
+def get_grammar_tool():
+    global _tool, _tool_error
+    with _tool_lock:
+        if _tool is None and _tool_error is None:
+            try:
+                import language_tool_python
+
+                remote_server = os.getenv("LANGUAGETOOL_URL")
+                if remote_server:
+                    _tool = language_tool_python.LanguageTool(LANGUAGE, remote_server=remote_server)
+                else:
+                    # Downloads LanguageTool on first use and runs it as a local Java process
+                    _tool = language_tool_python.LanguageTool(LANGUAGE)
+            except Exception as e:
+                _tool_error = str(e)
+        return _tool
+
+
+# Warm the checker up on the grammar thread pool so the first analysis does not wait for it
+def start_grammar_tool():
+    global _warm_up
+    with _tool_lock:
+        if _warm_up is None:
+            _warm_up = _executor.submit(get_grammar_tool)
+
+
+def grammar_unavailable_reason():
+    return _tool_error or _check_error
+
+
+# Split text into (start offset, sentence) pairs, skipping markdown headings such as "# SKILLS"
+def split_sentences(text):
+    sentences = []
+    for match in SENTENCE_PATTERN.finditer(text):
+        sentence = match.group(0).strip()
+        if len(sentence) > 1 and not sentence.startswith("#"):
+            sentences.append((match.start() + match.group(0).index(sentence), sentence))
+    return sentences
+
+
+def _sentence_key(sentence):
+    return hashlib.sha256(f"{LANGUAGE}\0{sentence}".encode("utf-8")).hexdigest()
+
+
+def _match_to_issue(match, sentence, offset):
+    return {
+        "sentence": sentence,
+        "offset": offset,
+        "length": getattr(match, "error_length", None) or getattr(match, "errorLength", 0),
+        "message": match.message,
+        "replacements": list(match.replacements[:3]),
+        "rule_id": getattr(match, "rule_id", None) or getattr(match, "ruleId", ""),
+    }
+
+
+# Check only the sentences missing from the cache, in a single LanguageTool request
+def _check_uncached(tool, sentences):
+    batch_text = BATCH_SEPARATOR.join(sentences)
+    starts = []
+    position = 0
+    for sentence in sentences:
+        starts.append(position)
+        position += len(sentence) + len(BATCH_SEPARATOR)
+
+    issues = {sentence: [] for sentence in sentences}
+    sentence_index = 0
+    for match in sorted(tool.check(batch_text), key=lambda match: match.offset):
+        while sentence_index + 1 < len(starts) and match.offset >= starts[sentence_index + 1]:
+            sentence_index += 1
+        sentence = sentences[sentence_index]
+        issues[sentence].append(_match_to_issue(match, sentence, match.offset - starts[sentence_index]))
+    return issues
+
+
+def check_grammar(text):
+    """Return grammar issues for text, or None when no checker is available or the check failed"""
+    global _check_error
+    tool = get_grammar_tool()
+    if tool is None:
+        return None
+
+    sentences = [sentence for _, sentence in split_sentences(text)]
+    results = {}
+    uncached = []
+    for sentence in dict.fromkeys(sentences):
+        cached = _sentence_cache.get(_sentence_key(sentence))
+        if cached is None:
+            uncached.append(sentence)
+        else:
+            results[sentence] = cached
+
+    if uncached:
+        try:
+            checked = _check_uncached(tool, uncached)
+        except Exception as e:
+            _check_error = str(e) or type(e).__name__
+            return None
+        _check_error = None
+        for sentence, sentence_issues in checked.items():
+            _sentence_cache.set(_sentence_key(sentence), sentence_issues)
+            results[sentence] = sentence_issues
+
+    return [issue for sentence in sentences for issue in results[sentence]]
+
+
+# Run the check on the grammar thread pool, e.g. while the OpenAI call is in flight
+def submit_grammar_check(text):
+    return _executor.submit(check_grammar, text)
+
+
+def grammar_cache_stats():
+    return _sentence_cache.stats()
@@ -0,0 +1,172 @@
+import hashlib
+import time
+
+from auditor_core import (
+    ANALYSIS_INSTRUCTIONS,
+    ANALYSIS_SYSTEM_PROMPT,
+    async_cached_chat_completion,
+    async_client_for,
+    build_analysis_context,
+    cached_chat_completion,
+    client_for,
+    model_for,
+)
+from openai_clients import run_async
+from token_budget import (
+    JOB_DESCRIPTION_TOKEN_BUDGET,
+    MAX_CHUNKS,
+    PROFILE_TOKEN_BUDGET,
+    count_tokens,
+    split_sections,
+    truncate_to_tokens,
+)
+
+# Incremental re-analysis: each profile section (ABOUT ME, EXPERIENCE, SKILLS, or the headings
+# of an uploaded resume) is reviewed on its own, and the full analysis is then written from
+# those reviews plus the job description. Every request is keyed by a hash of its inputs and
+# the previous run's state is passed back in, so an edit re-requests only the reviews of the
+# sections that changed; when nothing changed the previous analysis is reused as is. The final
+# analysis is one request over all the reviews, so any changed section re-requests it in full;
+# what an edit saves is the reviews of the sections it did not touch.
+
+SECTION_REVIEW_INSTRUCTIONS = """The text above is the "{heading}" section of a LinkedIn profile or resume.
+Do not write the full analysis yet. Review only this section in concise bullet points:
+
+- Tone, clarity and professional vocabulary
+- Grammar and spelling problems (quote them verbatim)
+- Action verbs and quantified achievements, or their absence
+- Passive or vague phrasing and buzzwords (quote them verbatim)
+- Keywords and skills an Applicant Tracking System would pick up
+- Specific improvements for this section
+
+Keep the review under 250 words.
+"""
+SECTION_REVIEW_MAX_TOKENS = 350
+# Used when the profile text has no headings at all
+UNTITLED_SECTION = "PROFILE"
+
+
+def fingerprint(*parts):
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def split_profile_sections(profile_text):
+    """Return [(heading, text)] for the non-empty sections, at most MAX_CHUNKS of them.
+
+    Reviews are keyed by heading, so a repeated heading is numbered: "EXPERIENCE", "EXPERIENCE (2)".
+    """
+    sections = []
+    used = set()
+    for heading, body in split_sections(profile_text):
+        if not body.strip():
+            continue
+        heading = base = heading or UNTITLED_SECTION
+        number = 1
+        while heading in used:
+            number += 1
+            heading = f"{base} ({number})"
+        used.add(heading)
+        sections.append((heading, body))
+    if len(sections) > MAX_CHUNKS:
+        # Keep the request count bounded: the trailing sections are reviewed together
+        tail = "\n\n".join(f"# {heading}\n{body}" for heading, body in sections[MAX_CHUNKS - 1:])
+        sections = sections[:MAX_CHUNKS - 1] + [(sections[MAX_CHUNKS - 1][0] + " (and later sections)", tail)]
+    return sections
+
+
+async def _timed_review(client, heading, text):
+    usage = {}
+    start = time.perf_counter()
+    review = await async_cached_chat_completion(
+        "review_profile_section",
+        client,
+        model=model_for("review_profile_section"),
+        messages=[
+            {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": f"# {heading}\n{truncate_to_tokens(text, PROFILE_TOKEN_BUDGET)}\n\n"
+                + SECTION_REVIEW_INSTRUCTIONS.format(heading=heading)}
+        ],
+        temperature=0.3,
+        max_tokens=SECTION_REVIEW_MAX_TOKENS,
+        usage=usage,
+    )
+    return review, usage.get("total_tokens", 0), time.perf_counter() - start
+
+
+def analyze_profile_incremental(profile_text, job_description=None, api_key=None, previous=None):
+    """Analyse a profile, re-requesting only what changed since `previous`.
+
+    Returns (analysis_text, state, report). Pass `state` back as `previous` on the next run.
+    The report counts reused section reviews and the tokens and seconds they saved, estimated
+    from what those requests cost when they last ran.
+    """
+    start = time.perf_counter()
+    # Trimmed like the other analysis paths (see auditor_core.fit_analysis_inputs)
+    if job_description and count_tokens(job_description) > JOB_DESCRIPTION_TOKEN_BUDGET:
+        job_description = truncate_to_tokens(job_description, JOB_DESCRIPTION_TOKEN_BUDGET)
+    client = client_for(api_key, "analyze_profile_incremental")
+    previous = previous or {}
+    previous_sections = previous.get("sections", {})
+    sections = split_profile_sections(profile_text)
+
+    reviews = {}
+    futures = {}
+    for heading, text in sections:
+        section_hash = fingerprint(heading, text)
+        earlier = previous_sections.get(heading)
+        if earlier and earlier["hash"] == section_hash:
+            reviews[heading] = dict(earlier, reused=True)
+        else:
+            review_client = async_client_for(api_key, "review_profile_section")
+            futures[heading] = (section_hash, run_async(_timed_review(review_client, heading, text)))
+    for heading, (section_hash, future) in futures.items():
+        review, tokens, seconds = future.result()
+        reviews[heading] = {"hash": section_hash, "review": review, "tokens": tokens, "seconds": seconds, "reused": False}
+
+    condensed = "The profile was reviewed section by section; the reviews follow.\n\n" + "\n\n".join(
+        f"### {heading}\n{reviews[heading]['review'].strip()}" for heading, _ in sections
+    )
+    synthesis_hash = fingerprint(condensed, job_description or "")
+    earlier = previous.get("synthesis")
+    if earlier and earlier["hash"] == synthesis_hash:
+        synthesis = dict(earlier, reused=True)
+    else:
+        usage = {}
+        synthesis_start = time.perf_counter()
+        text = cached_chat_completion(
+            "analyze_profile_incremental",
+            client,
+            model=model_for("analyze_profile_incremental"),
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": build_analysis_context(condensed, job_description) + ANALYSIS_INSTRUCTIONS}
+            ],
+            temperature=0.7,
+            max_tokens=2500,
+            usage=usage,
+        )
+        synthesis = {"hash": synthesis_hash, "text": text, "tokens": usage.get("total_tokens", 0),
+                     "seconds": time.perf_counter() - synthesis_start, "reused": False}
+
+    elapsed = time.perf_counter() - start
+    all_requests = list(reviews.values())
+    # Reviews run concurrently, so a full run takes about the slowest review plus the synthesis
+    full_seconds = max((review["seconds"] for review in all_requests), default=0.0) + synthesis["seconds"]
+    reused = [review for review in all_requests if review["reused"]] + ([synthesis] if synthesis["reused"] else [])
+    report = {
+        "sections": len(sections),
+        "sections_reused": sum(review["reused"] for review in all_requests),
+        "synthesis_reused": synthesis["reused"],
+        "tokens_used": sum(request["tokens"] for request in all_requests + [synthesis] if not request["reused"]),
+        "tokens_saved": sum(request["tokens"] for request in reused),
+        "seconds": elapsed,
+        "seconds_saved": max(0.0, full_seconds - elapsed),
+    }
+    state = {
+        "sections": {
+            heading: {key: review[key] for key in ("hash", "review", "tokens", "seconds")}
+            for heading, review in reviews.items()
+        },
+        "synthesis": {key: synthesis[key] for key in ("hash", "text", "tokens", "seconds")},
+    }
+    return synthesis["text"], state, report
@@ -0,0 +1,326 @@
+"""Persistent job-description corpus with an inverted index and top-N matching for a profile.
+
+Example:
+    python job_corpus.py add jobs/*.txt
+    python job_corpus.py match resume.pdf --top 20
+    python job_corpus.py remove 42
+
+Jobs are stored in SQLite (JOB_CORPUS_PATH, default job_corpus.sqlite3) with one posting per
+(term, job) holding the term's log-scaled frequency in that job. Adding or removing a job only
+touches its own rows, and a process that has the corpus open picks up other processes' changes
+on its next query. Scores use the same weighting as keyword_score.keyword_match with the
+corpus IDF: the share of a job's keyword weight that the profile covers.
+"""
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+from keyword_score import keyword_match, tokenize
+
+
+class JobCorpus:
+    """SQLite-backed job store; ranking runs over posting arrays kept in memory and updated in place"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("JOB_CORPUS_PATH", "job_corpus.sqlite3")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY, title TEXT NOT NULL, company TEXT NOT NULL,
+                text TEXT NOT NULL, added_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL, job_id INTEGER NOT NULL, weight REAL NOT NULL,
+                PRIMARY KEY (term, job_id)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_by_job ON postings (job_id);
+        """)
+        self._db.commit()
+        self._index = None
+        self._data_version = None
+
+    # Log-scaled term frequencies for a job description: the precomputed term vector
+    @staticmethod
+    def term_vector(text):
+        return {term: 1.0 + math.log(count) for term, count in Counter(tokenize(text)).items()}
+
+    def add_job(self, text, title="", company="", job_id=None):
+        """Store one job (replacing job_id if it exists) and return its id"""
+        return self.add_jobs([{"text": text, "title": title, "company": company, "id": job_id}])[0]
+
+    def add_jobs(self, jobs):
+        """Store many jobs in one transaction; each is a dict with text and optional title/company/id"""
+        ids = []
+        with self._lock:
+            for job in jobs:
+                if job.get("id") is not None:
+                    self._delete(job["id"])
+                cursor = self._db.execute(
+                    "INSERT INTO jobs (id, title, company, text, added_at) VALUES (?, ?, ?, ?, ?)",
+                    (job.get("id"), job.get("title") or "", job.get("company") or "", job["text"], time.time()),
+                )
+                job_id = cursor.lastrowid
+                vector = self.term_vector(job["text"])
+                self._db.executemany(
+                    "INSERT INTO postings (term, job_id, weight) VALUES (?, ?, ?)",
+                    [(term, job_id, weight) for term, weight in vector.items()],
+                )
+                if self._index is not None:
+                    self._index.add(job_id, vector)
+                ids.append(job_id)
+            self._db.commit()
+        return ids
+
+    def remove_job(self, job_id):
+        """Delete a job; returns False if it was not in the corpus"""
+        with self._lock:
+            removed = self._delete(job_id)
+            self._db.commit()
+        return removed
+
+    def _delete(self, job_id):
+        cursor = self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        self._db.execute("DELETE FROM postings WHERE job_id = ?", (job_id,))
+        if cursor.rowcount and self._index is not None:
+            self._index.remove(job_id)
+        return bool(cursor.rowcount)
+
+    def get_job(self, job_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, title, company, text FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return dict(zip(("id", "title", "company", "text"), row)) if row else None
+
+    def list_jobs(self):
+        with self._lock:
+            rows = self._db.execute("SELECT id, title, company FROM jobs ORDER BY id").fetchall()
+        return [dict(zip(("id", "title", "company"), row)) for row in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def idf(self, terms=None):
+        """Smoothed IDF over the corpus (same formula as keyword_score.compute_idf)"""
+        with self._lock:
+            index = self._get_index()
+            return index.idf(terms)
+
+    def top_matches(self, profile_text, n=20, details=True):
+        """Return the n best-matching jobs as dicts with id, title, company and score (0-100).
+
+        With details=True each match also carries the matched and missing keywords, computed
+        with keyword_match for the returned jobs only.
+        """
+        profile_terms = set(tokenize(profile_text))
+        with self._lock:
+            index = self._get_index()
+            ranked = index.rank(profile_terms, n)
+            idf = index.idf() if details else None
+        matches = []
+        for job_id, score in ranked:
+            job = self.get_job(job_id)
+            if job is None:
+                continue  # Removed by another process since the ranking
+            match = {"id": job_id, "title": job["title"], "company": job["company"], "score": int(round(score * 100))}
+            if details:
+                report = keyword_match(profile_text, job["text"], idf=idf)
+                match.update(matched=report["matched"], missing=report["missing"])
+            matches.append(match)
+        return matches
+
+    # The index follows this connection's writes in place; writes from other connections (e.g. the
+    # CLI while the app runs) change SQLite's data_version, and the index is then rebuilt
+    def _get_index(self):
+        data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._index = None
+            self._data_version = data_version
+        if self._index is None:
+            self._index = _PostingIndex()
+            self._index.load(self._db.execute("SELECT job_id, term, weight FROM postings ORDER BY job_id"))
+        return self._index
+
+
+class _PostingIndex:
+    """Postings as flat NumPy arrays (job row, term id, weight); appends and removals are in place"""
+
+    def __init__(self):
+        import numpy as np
+
+        self.term_ids = {}
+        self.document_frequency = np.zeros(0, dtype=np.int64)
+        self.job_rows = {}  # job id -> row
+        self.row_jobs = []  # row -> job id, or None once removed
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.terms = np.zeros(0, dtype=np.int64)
+        self.weights = np.zeros(0, dtype=np.float64)
+        self.alive = np.zeros(0, dtype=bool)
+        self._pending = []
+        self._removed_postings = 0
+
+    def add(self, job_id, vector):
+        row = len(self.row_jobs)
+        self.row_jobs.append(job_id)
+        self.job_rows[job_id] = row
+        term_ids = [self.term_ids.setdefault(term, len(self.term_ids)) for term in vector]
+        self._pending.append(([row] * len(term_ids), term_ids, list(vector.values())))
+
+    # Bulk-load (job_id, term, weight) rows ordered by job_id
+    def load(self, postings):
+        rows, terms, weights = [], [], []
+        term_ids = self.term_ids
+        for job_id, term, weight in postings:
+            row = self.job_rows.get(job_id)
+            if row is None:
+                row = self.job_rows[job_id] = len(self.row_jobs)
+                self.row_jobs.append(job_id)
+            rows.append(row)
+            terms.append(term_ids.setdefault(term, len(term_ids)))
+            weights.append(weight)
+        self._pending.append((rows, terms, weights))
+        self._flush()
+
+    def remove(self, job_id):
+        import numpy as np
+
+        self._flush()
+        row = self.job_rows.pop(job_id, None)
+        if row is None:
+            return
+        self.row_jobs[row] = None
+        mask = self.rows == row
+        np.subtract.at(self.document_frequency, self.terms[mask], 1)
+        self.alive[mask] = False
+        self._removed_postings += int(mask.sum())
+        # Reclaim space once a quarter of the postings belong to removed jobs
+        if self._removed_postings * 4 > len(self.rows):
+            keep = self.alive
+            self.rows, self.terms, self.weights = self.rows[keep], self.terms[keep], self.weights[keep]
+            self.alive = np.ones(len(self.rows), dtype=bool)
+            self._removed_postings = 0
+
+    # Merge postings added since the last query into the arrays
+    def _flush(self):
+        import numpy as np
+
+        if not self._pending:
+            return
+        rows = np.concatenate([np.asarray(rows, dtype=np.int64) for rows, _, _ in self._pending])
+        terms = np.concatenate([np.asarray(terms, dtype=np.int64) for _, terms, _ in self._pending])
+        weights = np.concatenate([np.asarray(weights, dtype=np.float64) for _, _, weights in self._pending])
+        self._pending = []
+        frequency = np.zeros(len(self.term_ids), dtype=np.int64)
+        frequency[:len(self.document_frequency)] = self.document_frequency
+        np.add.at(frequency, terms, 1)
+        self.document_frequency = frequency
+        self.rows = np.concatenate([self.rows, rows])
+        self.terms = np.concatenate([self.terms, terms])
+        self.weights = np.concatenate([self.weights, weights])
+        self.alive = np.concatenate([self.alive, np.ones(len(rows), dtype=bool)])
+
+    def _idf_array(self):
+        import numpy as np
+
+        document_count = len(self.job_rows)
+        frequency = self.document_frequency
+        return np.log(1.0 + (document_count - frequency + 0.5) / (frequency + 0.5))
+
+    def idf(self, terms=None):
+        self._flush()
+        idf = self._idf_array()
+        names = self.term_ids if terms is None else [term for term in terms if term in self.term_ids]
+        return {term: float(idf[self.term_ids[term]]) for term in names}
+
+    def rank(self, profile_terms, n):
+        import numpy as np
+
+        self._flush()
+        if not self.job_rows:
+            return []
+        in_profile = np.zeros(len(self.term_ids), dtype=bool)
+        profile_ids = [self.term_ids[term] for term in profile_terms if term in self.term_ids]
+        in_profile[profile_ids] = True
+
+        weighted = self.weights * self._idf_array()[self.terms] * self.alive
+        row_count = len(self.row_jobs)
+        total = np.bincount(self.rows, weights=weighted, minlength=row_count)
+        covered = np.bincount(self.rows, weights=weighted * in_profile[self.terms], minlength=row_count)
+        scores = np.divide(covered, total, out=np.zeros(row_count), where=total > 0)
+
+        live_rows = np.fromiter(self.job_rows.values(), dtype=np.int64, count=len(self.job_rows))
+        n = min(n, len(live_rows))
+        live_scores = scores[live_rows]
+        top = np.argpartition(-live_scores, n - 1)[:n]
+        top = top[np.lexsort((live_rows[top], -live_scores[top]))]
+        return [(self.row_jobs[live_rows[index]], float(live_scores[index])) for index in top]
+
+
+_corpus = None
+_corpus_lock = threading.Lock()
+
+
+# Process-wide corpus at JOB_CORPUS_PATH; returns None if the file does not exist and create is False
+def get_job_corpus(create=False):
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            path = os.getenv("JOB_CORPUS_PATH", "job_corpus.sqlite3")
+            if not create and not os.path.exists(path):
+                return None
+            _corpus = JobCorpus(path)
+        return _corpus
+
+
+def main(argv=None):
+    from batch_audit import read_document
+
+    parser = argparse.ArgumentParser(description="Manage the job-description corpus and rank jobs for a profile")
+    parser.add_argument("--corpus", default=None, help="SQLite file (default: JOB_CORPUS_PATH or job_corpus.sqlite3)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Add job descriptions (.txt/.md/.pdf); the file name becomes the title")
+    add.add_argument("paths", nargs="+")
+    add.add_argument("--company", default="")
+    remove = commands.add_parser("remove", help="Remove jobs by id")
+    remove.add_argument("ids", nargs="+", type=int)
+    commands.add_parser("list", help="List stored jobs")
+    match = commands.add_parser("match", help="Rank stored jobs for a profile or resume")
+    match.add_argument("profile")
+    match.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    corpus = JobCorpus(args.corpus)
+    if args.command == "add":
+        jobs = [
+            {"text": read_document(path), "title": os.path.splitext(os.path.basename(path))[0], "company": args.company}
+            for path in args.paths
+        ]
+        ids = corpus.add_jobs(jobs)
+        print(f"Added {len(ids)} job(s); corpus now holds {len(corpus)}")
+    elif args.command == "remove":
+        removed = sum(corpus.remove_job(job_id) for job_id in args.ids)
+        print(f"Removed {removed} job(s); corpus now holds {len(corpus)}")
+    elif args.command == "list":
+        for job in corpus.list_jobs():
+            print(f"{job['id']:>6}  {job['title']}" + (f" ({job['company']})" if job['company'] else ""))
+    else:
+        profile_text = read_document(args.profile)
+        start = time.perf_counter()
+        matches = corpus.top_matches(profile_text, args.top)
+        elapsed = time.perf_counter() - start
+        for match in matches:
+            print(f"{match['score']:>4}%  #{match['id']:<6} {match['title']}"
+                  + (f" ({match['company']})" if match['company'] else "")
+                  + (f"  missing: {', '.join(match['missing'][:5])}" if match['missing'] else ""))
+        print(f"Ranked {len(corpus)} job(s) in {elapsed * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
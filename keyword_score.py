@@ -0,0 +1,86 @@
+import math
+import re
+from collections import Counter
+
+# Local, deterministic keyword matching between a profile and a job description.
+# Job-description terms are weighted TF-IDF style (log-scaled term frequency x optional IDF)
+# and the score is the share of that weight covered by terms present in the profile.
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+# Common English words plus words every job description and profile uses
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each etc few for from further had has have
+having he her here hers him his how i if in into is it its itself just me more most my no nor not now of
+off on once only or other our ours out over own same she should so some such than that the their them then
+there these they this those through to too under until up very was we were what when where which while who
+whom why will with would you your yours per via well within across using use used including include
+ability able candidate candidates company experience experienced job looking plus preferred required
+requirements responsibilities role skill skills strong team teams work working year years knowledge
+understanding new good great excellent etc me summary
+""".split())
+
+# Light normalisation so "APIs"/"API" and "pipelines"/"pipeline" match
+_KEEP_TRAILING_S = ("ss", "us", "is", "os")
+
+
+def normalize_term(token):
+    token = token.strip(".")
+    if len(token) > 3 and token.endswith("s") and not token.endswith(_KEEP_TRAILING_S):
+        token = token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [term for term, _ in tokenize_with_surface(text)]
+
+
+# Normalised terms paired with the word as written, so reports show "kubernetes" rather than "kubernete"
+def tokenize_with_surface(text):
+    pairs = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        term = normalize_term(token)
+        if len(term) > 1 and term not in STOPWORDS and not term.isdigit():
+            pairs.append((term, token.strip(".")))
+    return pairs
+
+
+def keyword_match(profile_text, job_description, idf=None, top_missing=15):
+    """Return {'score', 'matched', 'missing'} for how well the profile covers the job's keywords"""
+    import numpy as np
+
+    jd_pairs = tokenize_with_surface(job_description)
+    if not jd_pairs:
+        return {"score": None, "matched": [], "missing": []}
+    jd_counts = Counter(term for term, _ in jd_pairs)
+    surface = {}
+    for term, word in jd_pairs:
+        surface.setdefault(term, word)
+    profile_counts = Counter(tokenize(profile_text))
+
+    terms = list(jd_counts)
+    jd_tf = np.fromiter((jd_counts[term] for term in terms), dtype=np.float64, count=len(terms))
+    profile_tf = np.fromiter((profile_counts.get(term, 0) for term in terms), dtype=np.float64, count=len(terms))
+    idf_weights = np.fromiter(
+        ((idf or {}).get(term, 1.0) for term in terms), dtype=np.float64, count=len(terms)
+    )
+
+    weights = (1.0 + np.log(jd_tf)) * idf_weights
+    present = profile_tf > 0
+    score = float(weights[present].sum() / weights.sum())
+
+    order = np.argsort(-weights, kind="stable")
+    matched = [surface[terms[index]] for index in order if present[index]]
+    missing = [surface[terms[index]] for index in order if not present[index]][:top_missing]
+    return {"score": int(round(score * 100)), "matched": matched, "missing": missing}
+
+
+# Smoothed inverse document frequency over a list of documents, for callers with a JD corpus
+def compute_idf(documents):
+    document_count = len(documents)
+    frequencies = Counter(term for document in documents for term in set(tokenize(document)))
+    return {
+        term: math.log(1.0 + (document_count - count + 0.5) / (count + 0.5))
+        for term, count in frequencies.items()
+    }
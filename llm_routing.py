@@ -0,0 +1,112 @@
+import json
+import os
+
+# Per-task routing of LLM requests: which OpenAI-compatible endpoint and model each function uses.
+# Routes are read once from LLM_ROUTES (inline JSON) or the JSON file at LLM_ROUTES_PATH, e.g.
+#
+#   {
+#     "default": {"model": "gpt-3.5-turbo"},
+#     "prescore": {"base_url": "http://127.0.0.1:11434/v1", "model": "llama3.2:1b"},
+#     "generate_resume": {"model": "gpt-4o"},
+#     "generate_cover_letter": {"base_url": "https://api.groq.com/openai/v1", "model": "llama-3.1-8b-instant",
+#                               "api_key_env": "GROQ_API_KEY"}
+#   }
+#
+# A function without a route of its own uses its task's route (see TASKS), then "default"; fields
+# a route leaves out come from "default", except that a route to another base_url only takes the
+# model (so the default's key is not sent there). base_url falls back to OPENAI_BASE_URL and then the
+# public OpenAI endpoint. The API key is read from the api_key_env variable when given. A route
+# to another base_url than the default's and no api_key_env (a local server) sends a placeholder
+# key, never the user's OpenAI key; other routes, the default one included, use the user's key.
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+# Quick pre-scores use this small, fast model unless "prescore" is routed elsewhere or the
+# default route or OPENAI_BASE_URL points at another endpoint (which may not serve it)
+FAST_MODEL = "gpt-4o-mini"
+# Helper requests route with the task they belong to unless they have a route of their own
+TASKS = {
+    "analyze_profile_fanout": "analyze_profile",
+    "analyze_profile_chunk": "analyze_profile",
+    "analyze_profile_incremental": "analyze_profile",
+    "review_profile_section": "analyze_profile",
+}
+ROUTE_FIELDS = ("model", "base_url", "api_key_env")
+LOCAL_API_KEY = "local"
+
+
+class Route:
+    def __init__(self, model=DEFAULT_MODEL, base_url=None, api_key_env=None, other_endpoint=False):
+        self.model = model
+        self.base_url = base_url
+        self.api_key_env = api_key_env
+        # Set for a route to another endpoint than the default route's (e.g. a local server)
+        self.other_endpoint = other_endpoint
+
+    def __repr__(self):
+        return f"Route(model={self.model!r}, base_url={self.base_url!r}, api_key_env={self.api_key_env!r})"
+
+    def api_key(self, api_key=None):
+        """The key to send on this route, or None when there is none"""
+        if self.api_key_env:
+            return os.getenv(self.api_key_env)
+        if self.other_endpoint:
+            # The user's OpenAI key is never sent to another endpoint
+            return LOCAL_API_KEY
+        return api_key
+
+
+def parse_routes(config):
+    """{name: Route} from a routes mapping; raises ValueError for unknown fields"""
+    for name, fields in config.items():
+        unknown = set(fields) - set(ROUTE_FIELDS)
+        if unknown:
+            raise ValueError(f"Route {name!r} has unknown fields: {', '.join(sorted(unknown))}")
+    config = dict(config)
+    default = {"model": DEFAULT_MODEL, **config.get("default", {})}
+    default_url = default.get("base_url") or os.getenv("OPENAI_BASE_URL")
+    if "prescore" not in config and not default_url:
+        config["prescore"] = {"model": FAST_MODEL}
+    config["default"] = default
+    routes = {}
+    for name, fields in config.items():
+        if fields.get("base_url") and fields["base_url"] != default_url:
+            # A route to another endpoint takes only the model from "default", never its key
+            routes[name] = Route(**{"model": default["model"], **fields}, other_endpoint=True)
+        else:
+            routes[name] = Route(**{**default, **fields})
+    return routes
+
+
+def load_routes():
+    inline = os.getenv("LLM_ROUTES")
+    if inline:
+        return parse_routes(json.loads(inline))
+    path = os.getenv("LLM_ROUTES_PATH")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return parse_routes(json.load(f))
+    return parse_routes({})
+
+
+_routes = None
+
+
+def get_routes():
+    global _routes
+    if _routes is None:
+        _routes = load_routes()
+    return _routes
+
+
+def reload_routes():
+    """Re-read the routing configuration (e.g. after changing LLM_ROUTES)"""
+    global _routes
+    _routes = load_routes()
+    return _routes
+
+
+def get_route(function_name=None):
+    routes = get_routes()
+    if function_name in routes:
+        return routes[function_name]
+    return routes.get(TASKS.get(function_name), routes["default"])
@@ -0,0 +1,361 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+
+# Lightweight, in-process instrumentation: per-stage latency histograms, token and cost
+# counters per function, cache lookups and error counts, exported in the Prometheus text
+# format (an HTTP endpoint, a file, or render_prometheus()) plus optional per-request traces.
+#
+# Disabled unless METRICS_ENABLED=1 (or METRICS_PORT, METRICS_FILE or METRICS_TRACE_PATH is set).
+# While disabled, span() returns a shared no-op context manager and the record_* functions
+# return before taking any lock, so instrumented code pays one global lookup per call.
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# USD per million (prompt, completion) tokens; models missing here are counted with zero cost
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+METRIC_PREFIX = "auditor"
+
+
+def _env_enabled():
+    if os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes"):
+        return True
+    return any(os.getenv(name) for name in ("METRICS_PORT", "METRICS_FILE", "METRICS_TRACE_PATH"))
+
+
+_enabled = _env_enabled()
+_trace_path = os.getenv("METRICS_TRACE_PATH") or None
+_metrics_file = os.getenv("METRICS_FILE") or None
+
+
+class _Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # (stage, labels) -> [bucket counts..., sum, count]
+        self.counters = {}  # (name, labels) -> value
+        self.collectors = {}  # name -> function returning {key: number}
+
+    def observe(self, stage, seconds, labels):
+        key = (stage, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram[index] += 1
+                    break
+            histogram[-2] += seconds
+            histogram[-1] += 1
+
+    def add(self, name, labels, value):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+_registry = _Registry()
+# The trace (see trace()) that spans on this thread or task belong to, if any
+_current_trace = contextvars.ContextVar("metrics_trace", default=None)
+
+
+def enabled():
+    return _enabled
+
+
+def configure(enabled=None, trace_path=None, metrics_file=None):
+    """Override the environment settings, e.g. from a CLI or a benchmark"""
+    global _enabled, _trace_path, _metrics_file
+    if enabled is not None:
+        _enabled = enabled
+    if trace_path is not None:
+        _trace_path = trace_path or None
+    if metrics_file is not None:
+        _metrics_file = metrics_file or None
+    _enabled = _enabled or bool(_trace_path or _metrics_file)
+
+
+def reset():
+    _registry.reset()
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("stage", "labels", "start")
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        observe(self.stage, time.perf_counter() - self.start, self.labels, self.start)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            record_error(exc_type.__name__, stage=self.stage)
+        return False
+
+
+def span(stage, **labels):
+    """Context manager timing one stage: extract, scrape, prompt_build, llm_call, parse, render..."""
+    if not _enabled:
+        return _NOOP
+    return _Span(stage, labels)
+
+
+def observe(stage, seconds, labels=None, start=None):
+    if not _enabled:
+        return
+    labels = labels or {}
+    _registry.observe(stage, seconds, _label_key(labels))
+    trace = _current_trace.get()
+    if trace is not None:
+        offset = (start - trace["start"]) if start is not None else None
+        trace["spans"].append({"stage": stage, "seconds": round(seconds, 6),
+                               "offset": None if offset is None else round(offset, 6), **labels})
+
+
+def count(name, value=1, **labels):
+    if not _enabled:
+        return
+    _registry.add(name, _label_key(labels), value)
+
+
+def record_tokens(function_name, model, prompt_tokens, completion_tokens):
+    """Count the tokens and estimated cost of one upstream completion"""
+    if not _enabled:
+        return
+    labels = _label_key({"function": function_name, "model": model})
+    _registry.add("llm_prompt_tokens_total", labels, prompt_tokens)
+    _registry.add("llm_completion_tokens_total", labels, completion_tokens)
+    _registry.add("llm_requests_total", labels, 1)
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    _registry.add("llm_cost_usd_total", labels, (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace["tokens"] += prompt_tokens + completion_tokens
+
+
+def record_cache(cache, result):
+    """Count one cache lookup; result is 'hit', 'miss' or 'shared' (joined an in-flight request)"""
+    if not _enabled:
+        return
+    _registry.add("cache_lookups_total", _label_key({"cache": cache, "result": result}), 1)
+
+
+def record_error(error_type, **labels):
+    if not _enabled:
+        return
+    _registry.add("errors_total", _label_key({"type": error_type, **labels}), 1)
+
+
+def register_collector(name, function):
+    """Export function()'s {key: number} as gauges named <prefix>_<name>_<key> on every render"""
+    _registry.collectors[name] = function
+
+
+class trace:
+    """Context manager grouping the spans of one request (an analysis, a generation...).
+
+    With METRICS_TRACE_PATH set, each trace is appended to that file as one JSON line with
+    its spans, their offsets from the start of the trace, and the tokens spent.
+    """
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+        self.record = None
+
+    def __enter__(self):
+        if _enabled:
+            self.record = {"trace_id": uuid.uuid4().hex, "name": self.name, **self.labels,
+                           "start": time.perf_counter(), "spans": [], "tokens": 0}
+            self.token = _current_trace.set(self.record)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.record is None:
+            return False
+        _current_trace.reset(self.token)
+        seconds = time.perf_counter() - self.record["start"]
+        observe("request", seconds, {"name": self.name})
+        if exc_type is not None and issubclass(exc_type, Exception):
+            record_error(exc_type.__name__, stage=self.name)
+        if _trace_path:
+            entry = dict(self.record, seconds=round(seconds, 6), error=exc_type.__name__ if exc_type else None,
+                         timestamp=time.time())
+            del entry["start"]
+            with _trace_lock, open(_trace_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if _metrics_file:
+            write_metrics_file(_metrics_file)
+        return False
+
+
+_trace_lock = threading.Lock()
+
+
+def carry_trace(coroutine):
+    """Wrap a coroutine so its spans join the caller's trace when it runs on another thread's loop"""
+    current = _current_trace.get()
+    if current is None:
+        return coroutine
+
+    async def in_trace():
+        # Each task runs in its own copy of the context, so this does not leak into other tasks
+        _current_trace.set(current)
+        return await coroutine
+
+    return in_trace()
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for key, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+COUNTER_HELP = {
+    "llm_prompt_tokens_total": "Prompt tokens sent upstream, by function and model",
+    "llm_completion_tokens_total": "Completion tokens received, by function and model",
+    "llm_requests_total": "Upstream completions, by function and model",
+    "llm_cost_usd_total": "Estimated spend in USD, by function and model (see metrics.MODEL_PRICES)",
+    "cache_lookups_total": "Cache lookups by cache and result (hit, miss, shared)",
+    "errors_total": "Errors by exception type and stage",
+}
+
+
+def render_prometheus():
+    """Return all metrics in the Prometheus text exposition format"""
+    with _registry.lock:
+        histograms = sorted(_registry.histograms.items())
+        counters = sorted(_registry.counters.items())
+        collectors = list(_registry.collectors.items())
+    lines = []
+
+    name = f"{METRIC_PREFIX}_stage_seconds"
+    lines += [f"# HELP {name} Time spent per stage", f"# TYPE {name} histogram"]
+    for (stage, labels), histogram in histograms:
+        series = (("stage", stage),) + labels
+        cumulative = 0
+        for bound, bucket in zip(LATENCY_BUCKETS, histogram):
+            cumulative += bucket
+            lines.append(f"{name}_bucket{_format_labels(series, [('le', repr(bound))])} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(series, [('le', '+Inf')])} {histogram[-1]}")
+        lines.append(f"{name}_sum{_format_labels(series)} {histogram[-2]:.6f}")
+        lines.append(f"{name}_count{_format_labels(series)} {histogram[-1]}")
+
+    by_name = {}
+    for (counter, labels), value in counters:
+        by_name.setdefault(counter, []).append((labels, value))
+    for counter, series in by_name.items():
+        name = f"{METRIC_PREFIX}_{counter}"
+        lines += [f"# HELP {name} {COUNTER_HELP.get(counter, counter)}", f"# TYPE {name} counter"]
+        lines += [f"{name}{_format_labels(labels)} {value:g}" for labels, value in series]
+
+    # Hit ratio per cache, derived from the lookup counters
+    lookups = {}
+    for labels, value in by_name.get("cache_lookups_total", []):
+        labels = dict(labels)
+        totals = lookups.setdefault(labels["cache"], [0, 0])
+        totals[0] += value if labels["result"] in ("hit", "shared") else 0
+        totals[1] += value
+    if lookups:
+        name = f"{METRIC_PREFIX}_cache_hit_ratio"
+        lines += [f"# HELP {name} Share of lookups served without new work", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{cache="{cache}"}} {hits / total:.4f}' for cache, (hits, total) in sorted(lookups.items())]
+
+    for collector_name, function in collectors:
+        try:
+            values = function()
+        except Exception:
+            continue
+        for key, value in values.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                name = f"{METRIC_PREFIX}_{collector_name}_{key}"
+                lines += [f"# TYPE {name} gauge", f"{name} {value:g}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path):
+    """Write render_prometheus() to path atomically (e.g. for node_exporter's textfile collector)"""
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(temporary, path)
+
+
+_server = None
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve render_prometheus() at http://host:port/metrics on a daemon thread (once per process)"""
+    global _server
+    if _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            payload = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    _server = ThreadingHTTPServer((host, port), MetricsHandler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
+
+
+# Start the export surfaces configured in the environment: METRICS_PORT (and METRICS_HOST) for
+# the HTTP endpoint, METRICS_FILE for a file rewritten after every trace and at exit
+def start_from_env():
+    port = os.getenv("METRICS_PORT")
+    if port:
+        start_http_server(int(port), os.getenv("METRICS_HOST", "127.0.0.1"))
+    if _metrics_file:
+        import atexit
+
+        atexit.register(write_metrics_file, _metrics_file)
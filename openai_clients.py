@@ -0,0 +1,349 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+import metrics
+from rate_limiter import RATE_LIMIT_ENABLED, RateLimiter, RateLimitTimeoutError, carry_owner
+
+# Retry policy for transient failures (429, 5xx, timeouts, dropped connections)
+MAX_ATTEMPTS = 4
+BASE_DELAY = 0.5
+MAX_DELAY = 8.0
+REQUEST_TIMEOUT = 60.0
+# Clients are kept for this many recently used keys and endpoints (per kind, sync and async); the
+# least recently used beyond that are closed, so a long-running server does not hold one per key forever
+MAX_CLIENTS = int(os.getenv("OPENAI_CLIENT_LIMIT", "64"))
+
+
+class LLMError(Exception):
+    """Base class for errors raised instead of returning 'Error: ...' strings"""
+
+
+class MissingAPIKeyError(LLMError):
+    def __init__(self, message="No OpenAI API key provided. Please enter your API key in the sidebar."):
+        super().__init__(message)
+
+
+class LLMRequestError(LLMError):
+    def __init__(self, message, status_code=None, retryable=False, attempts=1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.attempts = attempts
+
+
+class RateLimitQueueError(LLMRequestError):
+    def __init__(self, message):
+        super().__init__(message, status_code=429, retryable=True)
+
+
+class _ClientStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clients_created = 0
+        self.client_reuses = 0
+        self.clients_evicted = 0
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=1000)
+
+
+_clients = OrderedDict()  # (api_key, base_url) -> OpenAI client, least recently used first
+_stats = _ClientStats()
+# One rate limiter per key and endpoint, shared by its sync and async clients (see rate_limiter.py);
+# it is dropped with the last of them
+_rate_limiters = OrderedDict()
+_client_limiters = {}  # id(client) -> its key's RateLimiter
+
+
+def get_rate_limiter(api_key, base_url=None):
+    """The process-wide RateLimiter for this key and endpoint, or None when RATE_LIMIT_ENABLED=0"""
+    base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+    with _stats.lock:
+        return _rate_limiter((api_key, base_url))
+
+
+# Caller holds _stats.lock
+def _rate_limiter(registry_key):
+    if not RATE_LIMIT_ENABLED:
+        return None
+    limiter = _rate_limiters.get(registry_key)
+    if limiter is None:
+        limiter = _rate_limiters[registry_key] = RateLimiter()
+        # Limiters asked for without a client (get_rate_limiter) are kept for the most recent keys only
+        for stale_key in [key for key in _rate_limiters if key not in _clients and key not in _async_clients]:
+            if len(_rate_limiters) <= 2 * MAX_CLIENTS:
+                break
+            del _rate_limiters[stale_key]
+    else:
+        _rate_limiters.move_to_end(registry_key)
+    return limiter
+
+
+# Caller holds _stats.lock: add a client to its registry and return the least recently used
+# clients evicted to make room, for _close_clients to close once the lock is released
+def _remember_client(registry, registry_key, client, limiter):
+    registry[registry_key] = client
+    _client_limiters[id(client)] = limiter
+    _stats.clients_created += 1
+    evicted = []
+    while len(registry) > MAX_CLIENTS:
+        evicted_key, evicted_client = registry.popitem(last=False)
+        _client_limiters.pop(id(evicted_client), None)
+        if evicted_key not in _clients and evicted_key not in _async_clients:
+            _rate_limiters.pop(evicted_key, None)
+        _stats.clients_evicted += 1
+        evicted.append(evicted_client)
+    return evicted
+
+
+# Close evicted clients' connection pools; async clients are closed on the loop they run on
+def _close_clients(clients):
+    for client in clients:
+        close = client.close()
+        if asyncio.iscoroutine(close):
+            if _background_loop is None:
+                close.close()  # Never used, so there is no connection to close
+            else:
+                asyncio.run_coroutine_threadsafe(close, _background_loop)
+
+
+def rate_limiter_for(client):
+    """The RateLimiter of a client created by get_client or get_async_client, if any"""
+    return _client_limiters.get(id(client))
+
+
+# Client keyword arguments that report every response's status and rate-limit headers to the limiter
+def _limiter_hooks(limiter, asynchronous=False):
+    if limiter is None:
+        return {}
+    import openai
+
+    if asynchronous:
+        async def observe(response):
+            limiter.observe_response(response.status_code, response.headers)
+
+        return {"http_client": openai.DefaultAsyncHttpxClient(event_hooks={"response": [observe]})}
+
+    def observe(response):
+        limiter.observe_response(response.status_code, response.headers)
+
+    return {"http_client": openai.DefaultHttpxClient(event_hooks={"response": [observe]})}
+
+
+# Return the shared client for this key and endpoint, so keep-alive connections are reused
+def get_client(api_key, base_url=None):
+    base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+    registry_key = (api_key, base_url)
+    with _stats.lock:
+        client = _clients.get(registry_key)
+        if client is not None:
+            _clients.move_to_end(registry_key)
+            _stats.client_reuses += 1
+            return client
+        # The SDK is imported on first use; it is the slowest import in the app
+        from openai import OpenAI
+
+        limiter = _rate_limiter(registry_key)
+        # Retries are handled by call_with_retries, so the SDK's own retries are disabled
+        client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=REQUEST_TIMEOUT,
+                        **_limiter_hooks(limiter))
+        evicted = _remember_client(_clients, registry_key, client, limiter)
+    _close_clients(evicted)
+    return client
+
+
+def is_retryable(error):
+    import openai
+
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+# Honour Retry-After when the server sends it, otherwise use full-jitter exponential backoff
+def backoff_delay(attempt, error=None):
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+
+
+# Decide what to do after a failed attempt: return the delay before retrying, or raise LLMRequestError
+def _after_failure(error, attempt, max_attempts):
+    retryable = is_retryable(error)
+    metrics.record_error(type(error).__name__, stage="llm_attempt")
+    if retryable and attempt + 1 < max_attempts:
+        with _stats.lock:
+            _stats.retries += 1
+        return backoff_delay(attempt, error)
+    with _stats.lock:
+        _stats.failures += 1
+    raise LLMRequestError(
+        str(error),
+        status_code=getattr(error, "status_code", None),
+        retryable=retryable,
+        attempts=attempt + 1,
+    ) from error
+
+
+def _record_attempt():
+    with _stats.lock:
+        _stats.requests += 1
+
+
+def _record_success(start):
+    with _stats.lock:
+        _stats.latencies.append(time.perf_counter() - start)
+
+
+# After a 429 the limiter holds every request for the key until Retry-After, so retries only wait in its queue
+def _retry_delay(error, attempt, max_attempts, limiter):
+    import openai
+
+    delay = _after_failure(error, attempt, max_attempts)
+    return 0.0 if limiter is not None and isinstance(error, openai.RateLimitError) else delay
+
+
+def _queue_error(error):
+    with _stats.lock:
+        _stats.failures += 1
+    metrics.record_error(type(error).__name__, stage="rate_limit")
+    return RateLimitQueueError(str(error))
+
+
+# Call request() and retry transient failures; anything else surfaces as an LLMRequestError.
+# With a limiter (see rate_limiter_for), each attempt first waits for a rate-limit slot for a
+# request of about `tokens` tokens and holds it until the response (or its headers) arrive.
+def call_with_retries(request, max_attempts=MAX_ATTEMPTS, limiter=None, tokens=0):
+    import openai
+
+    start = time.perf_counter()
+    for attempt in range(max_attempts):
+        try:
+            permit = limiter.acquire(tokens) if limiter is not None else None
+        except RateLimitTimeoutError as e:
+            raise _queue_error(e) from e
+        _record_attempt()
+        try:
+            result = request()
+        except openai.OpenAIError as e:
+            time.sleep(_retry_delay(e, attempt, max_attempts, limiter))
+            continue
+        finally:
+            if permit is not None:
+                permit.release()
+        _record_success(start)
+        return result
+
+
+# Async counterpart of call_with_retries; request() returns an awaitable
+async def async_call_with_retries(request, max_attempts=MAX_ATTEMPTS, limiter=None, tokens=0):
+    import openai
+
+    start = time.perf_counter()
+    for attempt in range(max_attempts):
+        try:
+            permit = await limiter.acquire_async(tokens) if limiter is not None else None
+        except RateLimitTimeoutError as e:
+            raise _queue_error(e) from e
+        _record_attempt()
+        try:
+            result = await request()
+        except openai.OpenAIError as e:
+            await asyncio.sleep(_retry_delay(e, attempt, max_attempts, limiter))
+            continue
+        finally:
+            if permit is not None:
+                permit.release()
+        _record_success(start)
+        return result
+
+
+_async_clients = OrderedDict()  # (api_key, base_url) -> AsyncOpenAI client, least recently used first
+_background_loop = None
+
+
+# One event loop per process on a daemon thread; async clients stay bound to it, so their
+# connection pools survive across Streamlit reruns and sessions
+def _get_background_loop():
+    global _background_loop
+    with _stats.lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="openai-async", daemon=True).start()
+        return _background_loop
+
+
+# Schedule a coroutine on the background loop and return a concurrent.futures.Future
+# (its metrics spans join the caller's trace, if one is open, and it queues for rate limits as the caller)
+def run_async(coroutine):
+    return asyncio.run_coroutine_threadsafe(metrics.carry_trace(carry_owner(coroutine)), _get_background_loop())
+
+
+# Shared AsyncOpenAI client for this key and endpoint; only use it from coroutines passed to run_async
+def get_async_client(api_key, base_url=None):
+    base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+    registry_key = (api_key, base_url)
+    with _stats.lock:
+        client = _async_clients.get(registry_key)
+        if client is not None:
+            _async_clients.move_to_end(registry_key)
+            _stats.client_reuses += 1
+            return client
+        from openai import AsyncOpenAI
+
+        limiter = _rate_limiter(registry_key)
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=REQUEST_TIMEOUT,
+                             **_limiter_hooks(limiter, asynchronous=True))
+        evicted = _remember_client(_async_clients, registry_key, client, limiter)
+    _close_clients(evicted)
+    return client
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+# Connection-reuse, retry and latency figures for the sidebar and the batch CLI
+def get_client_stats():
+    with _stats.lock:
+        latencies = sorted(_stats.latencies)
+        return {
+            "clients_created": _stats.clients_created,
+            "client_reuses": _stats.client_reuses,
+            "clients_evicted": _stats.clients_evicted,
+            "requests": _stats.requests,
+            "retries": _stats.retries,
+            "failures": _stats.failures,
+            "latency_p50_s": _percentile(latencies, 0.50),
+            "latency_p99_s": _percentile(latencies, 0.99),
+        }
+
+
+# Queue depth, waits and adaptive limits summed (or maxed) over every key's limiter; keys are not exported
+def get_rate_limit_stats():
+    with _stats.lock:
+        limiters = list(_rate_limiters.values())
+    totals = {"limiters": len(limiters), "queued": 0, "in_flight": 0, "granted": 0, "rate_limited": 0,
+              "timeouts": 0, "wait_p50_s": 0.0, "wait_p99_s": 0.0, "wait_max_s": 0.0}
+    for limiter_stats in (limiter.stats() for limiter in limiters):
+        for name in ("queued", "in_flight", "granted", "rate_limited", "timeouts"):
+            totals[name] += limiter_stats[name]
+        for name in ("wait_p50_s", "wait_p99_s", "wait_max_s"):
+            totals[name] = max(totals[name], limiter_stats[name])
+    return totals
+
+
+metrics.register_collector("openai", get_client_stats)
+metrics.register_collector("rate_limit", get_rate_limit_stats)
@@ -0,0 +1,295 @@
+import hashlib
+import io
+import mmap
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from result_cache import ResultCache
+
+# Documents with fewer pages than this are extracted in-process; spinning up workers costs more
+PARALLEL_MIN_PAGES = 16
+# Worker processes for large documents, shared by every upload in the process
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Uploads larger than this are copied to a temporary file and memory-mapped instead of parsed in memory
+SPILL_THRESHOLD_BYTES = int(os.getenv("PDF_SPILL_BYTES", str(8 * 1024 * 1024)))
+# Extraction stops after this many pages or characters, whichever comes first
+MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "200"))
+MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "400000"))
+# Pages shown in the app's preview of an upload
+PREVIEW_PAGES = int(os.getenv("PDF_PREVIEW_PAGES", "3"))
+COPY_CHUNK_BYTES = 1024 * 1024
+# Parsed streams larger than this (scanned page images) are not kept between pages
+LARGE_STREAM_BYTES = 64 * 1024
+
+# Extracted text keyed by the SHA-256 of the uploaded bytes
+_extraction_cache = ResultCache(max_entries=64, ttl=60 * 60, name="pdf_text")
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+class PdfSource:
+    """A PDF as one seekable stream plus its SHA-256, without a second in-memory copy of large uploads.
+
+    Accepts bytes, a file path or a binary file object. In-memory uploads (bytes, BytesIO,
+    Streamlit's UploadedFile) up to spill_threshold bytes are parsed in place; larger ones, and
+    streams of unknown size, are copied in chunks to a temporary file. Files on disk are
+    memory-mapped, so their pages are read from the page cache rather than the heap, and
+    `path` is set for worker processes to map the same file.
+    """
+
+    def __init__(self, pdf, spill_threshold=SPILL_THRESHOLD_BYTES):
+        self.path = None
+        self.digest = None
+        self.spilled = False
+        self._temp_path = None
+        self._file = None
+        self._map = None
+        if isinstance(pdf, (str, os.PathLike)):
+            self._open_mapped(os.fspath(pdf))
+        elif isinstance(pdf, (bytes, bytearray, memoryview)):
+            self._from_buffer(memoryview(pdf), spill_threshold)
+            if not self.spilled:
+                self.stream = io.BytesIO(pdf)
+        elif hasattr(pdf, "getbuffer"):
+            with pdf.getbuffer() as view:
+                self._from_buffer(view, spill_threshold)
+            if not self.spilled:
+                pdf.seek(0)
+                self.stream = pdf
+        elif isinstance(getattr(pdf, "name", None), str) and os.path.isfile(pdf.name):
+            self._open_mapped(pdf.name)
+        else:
+            self._spool(pdf, spill_threshold)
+
+    def _from_buffer(self, view, spill_threshold):
+        self.size = view.nbytes
+        self.digest = hashlib.sha256(view).hexdigest()
+        if self.size > spill_threshold:
+            with self._temp_file() as temp_file:
+                for start in range(0, self.size, COPY_CHUNK_BYTES):
+                    temp_file.write(view[start:start + COPY_CHUNK_BYTES])
+            self._open_mapped(self._temp_path)
+
+    # Read a stream of unknown size in chunks, moving to a temporary file once it passes the threshold
+    def _spool(self, pdf, spill_threshold):
+        hasher = hashlib.sha256()
+        buffer = io.BytesIO()
+        temp_file = None
+        while True:
+            chunk = pdf.read(COPY_CHUNK_BYTES)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            if temp_file is None and buffer.tell() + len(chunk) > spill_threshold:
+                temp_file = self._temp_file()
+                temp_file.write(buffer.getbuffer())
+                buffer = None
+            (buffer if temp_file is None else temp_file).write(chunk)
+        self.digest = hasher.hexdigest()
+        if temp_file is None:
+            self.size = buffer.tell()
+            buffer.seek(0)
+            self.stream = buffer
+        else:
+            temp_file.close()
+            self._open_mapped(self._temp_path)
+
+    def _temp_file(self):
+        temp_file = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", delete=False)
+        self._temp_path = temp_file.name
+        self.spilled = True
+        return temp_file
+
+    def _open_mapped(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.digest is None:
+            # Hashed with reads rather than through the map, which would make the whole file resident
+            hasher = hashlib.sha256()
+            for chunk in iter(lambda: self._file.read(COPY_CHUNK_BYTES), b""):
+                hasher.update(chunk)
+            self.digest = hasher.hexdigest()
+        if self.size == 0:
+            # An empty file cannot be mapped; PdfReader reports it as not a PDF
+            self.stream = self._file
+        else:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.stream = self._map
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        if self._temp_path is not None:
+            try:
+                os.remove(self._temp_path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_pdf_reader(stream):
+    import PyPDF2
+
+    return PyPDF2.PdfReader(stream)
+
+
+# Unmap the file pages read so far; they stay in the page cache but leave this process's RSS
+def _release_mapped_pages(pdf_reader):
+    if isinstance(pdf_reader.stream, mmap.mmap) and hasattr(mmap, "MADV_DONTNEED"):
+        pdf_reader.stream.madvise(mmap.MADV_DONTNEED)
+
+
+# The reader keeps every object it resolved, including image streams it only looked at. Large
+# streams are dropped after each page, so memory stays at about one page's objects while small
+# shared ones (fonts) stay cached. PyPDF2 has no public API for its object cache, so this reaches
+# into the pinned release's (see requirements.txt); a reader without one is left alone.
+def _drop_large_streams(pdf_reader):
+    cache = getattr(pdf_reader, "resolved_objects", None)
+    if not isinstance(cache, dict):
+        return
+    for key in [key for key, value in cache.items() if len(getattr(value, "_data", b"")) > LARGE_STREAM_BYTES]:
+        del cache[key]
+
+
+def iter_page_texts(pdf_reader, start=0, stop=None):
+    """Yield the text of pages start..stop-1, parsing each one only when it is requested"""
+    stop = len(pdf_reader.pages) if stop is None else min(stop, len(pdf_reader.pages))
+    for index in range(start, stop):
+        text = pdf_reader.pages[index].extract_text() or ""
+        _drop_large_streams(pdf_reader)
+        _release_mapped_pages(pdf_reader)
+        yield text + "\n"
+
+
+# Extract one contiguous page range; runs inside a worker process.
+# A path is mapped by the worker itself, so large documents are not pickled to every worker.
+def _extract_page_range(pdf, start, stop):
+    if isinstance(pdf, str):
+        with open(pdf, "rb") as pdf_file, mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map:
+            return list(iter_page_texts(open_pdf_reader(pdf_map), start, stop))
+    return list(iter_page_texts(open_pdf_reader(io.BytesIO(pdf)), start, stop))
+
+
+# Split page indices into one contiguous range per worker
+def split_page_ranges(page_count, workers):
+    workers = max(1, min(workers, page_count))
+    size, remainder = divmod(page_count, workers)
+    ranges = []
+    start = 0
+    for worker in range(workers):
+        stop = start + size + (1 if worker < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def worker_process_context():
+    """Start method for worker pools: never a plain fork of this process.
+
+    The app server runs other threads (the async client loop, caches, job workers) whose locks a
+    fork would copy in whatever state they are in, which can deadlock the child. Workers start
+    from a forkserver (or spawn, where there is none) with pdf_extract already imported.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["pdf_extract"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _get_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=worker_process_context())
+        return _process_pool
+
+
+# Take page texts in order until max_chars; returns (pages kept, truncated)
+def _cap_pages(page_texts, max_chars):
+    kept = []
+    total = 0
+    for text in page_texts:
+        if total + len(text) > max_chars:
+            kept.append(text[:max_chars - total])
+            return kept, True
+        kept.append(text)
+        total += len(text)
+    return kept, False
+
+
+def extract_pdf_pages(source, max_workers=None, parallel_min_pages=PARALLEL_MIN_PAGES,
+                      max_pages=MAX_PAGES, max_chars=MAX_CHARS):
+    """Return (page_texts, page_count, truncated) for an open PdfSource.
+
+    Pages are read lazily and extraction stops after max_pages pages or max_chars characters.
+    Large documents are split across a process pool; workers map the file when there is one.
+    """
+    pdf_reader = open_pdf_reader(source.stream)
+    page_count = len(pdf_reader.pages)
+    _release_mapped_pages(pdf_reader)
+    pages_to_read = min(page_count, max_pages)
+    workers = min(max_workers or PDF_WORKERS, PDF_WORKERS)
+
+    if pages_to_read < parallel_min_pages or workers == 1:
+        page_texts, truncated = _cap_pages(iter_page_texts(pdf_reader, 0, pages_to_read), max_chars)
+    else:
+        pdf = source.path
+        if pdf is None:
+            pdf = source.stream.getvalue()
+        pool = _get_process_pool()
+        futures = [
+            pool.submit(_extract_page_range, pdf, start, stop)
+            for start, stop in split_page_ranges(pages_to_read, workers)
+        ]
+        # Futures are joined in submission order, so pages stay in document order
+        page_texts, truncated = _cap_pages((text for future in futures for text in future.result()), max_chars)
+        for future in futures:
+            future.cancel()
+    return page_texts, page_count, truncated or pages_to_read < page_count
+
+
+def _join_pages(page_texts, page_count, truncated):
+    text = "".join(page_texts)
+    if truncated:
+        text += (f"\n[Extraction stopped after {len(page_texts)} of {page_count} pages "
+                 f"({len(text)} characters); the rest of the PDF was not read.]\n")
+    return text
+
+
+# Extract text from a PDF (bytes, path or file object), splitting large documents across a process pool
+def extract_pdf_text(pdf, max_workers=None, parallel_min_pages=PARALLEL_MIN_PAGES, max_pages=MAX_PAGES,
+                     max_chars=MAX_CHARS):
+    with PdfSource(pdf) as source:
+        return _join_pages(*extract_pdf_pages(source, max_workers, parallel_min_pages, max_pages, max_chars))
+
+
+# Cached entry point: repeated reruns with the same upload skip parsing entirely.
+# Returns (text, preview), the preview being the text of the first preview_pages pages.
+def extract_pdf_text_and_preview_cached(pdf, max_workers=None, preview_pages=PREVIEW_PAGES):
+    with PdfSource(pdf) as source:
+        preview_key = f"{source.digest}:preview:{preview_pages}"
+        text = _extraction_cache.get(source.digest)
+        preview = _extraction_cache.get(preview_key) if text is not None else None
+        if preview is None:
+            page_texts, page_count, truncated = extract_pdf_pages(source, max_workers)
+            text = _join_pages(page_texts, page_count, truncated)
+            preview = "".join(page_texts[:preview_pages])
+            _extraction_cache.set(source.digest, text)
+            _extraction_cache.set(preview_key, preview)
+    return text, preview
+
+
+def extract_pdf_text_cached(pdf, max_workers=None):
+    return extract_pdf_text_and_preview_cached(pdf, max_workers)[0]
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import metrics
+from openai_clients import run_async
+
+# Concurrent fetcher for profile pages (LinkedIn and others).
+# All requests share one pooled requests.Session and run as coroutines on the background
+# event loop, with a per-host concurrency cap and minimum spacing between requests. Backoff
+# waits with asyncio.sleep, never on the caller's thread. Pages are stored in an on-disk
+# cache and revalidated with If-None-Match / If-Modified-Since, so unchanged pages are not
+# downloaded again.
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0'
+}
+# Used for the retry after LinkedIn blocks the desktop headers
+MOBILE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+BLOCKED_STATUSES = {999, 403}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+MAX_ATTEMPTS = 3
+BASE_DELAY = 1.0
+MAX_DELAY = 10.0
+REQUEST_TIMEOUT = 10.0
+PER_HOST_CONCURRENCY = 2
+# Minimum seconds between request starts to the same host
+PER_HOST_MIN_INTERVAL = 0.5
+POOL_SIZE = 20
+
+
+class HttpCache:
+    """On-disk page cache keyed by URL, holding the validators needed for conditional requests"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, status INTEGER NOT NULL, etag TEXT,"
+            " last_modified TEXT, body TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, etag, last_modified, body, stored_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("status", "etag", "last_modified", "body", "stored_at"), row))
+
+    def store(self, url, status, etag, last_modified, body):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (url, status, etag, last_modified, body, time.time()),
+            )
+            self._db.commit()
+
+    # A 304 confirms the stored copy; record when it was last confirmed
+    def touch(self, url):
+        with self._lock:
+            self._db.execute("UPDATE pages SET stored_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.commit()
+
+
+class _HostLimiter:
+    """Caps concurrent requests to one host and spaces their start times"""
+
+    def __init__(self, concurrency, min_interval):
+        self.min_interval = min_interval
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.min_interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+def _retry_delay(attempt, response=None):
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+
+
+class ProfileFetcher:
+    """Fetch many pages concurrently; each result reports status, cache use, attempts and timing"""
+
+    def __init__(self, cache=None, per_host_concurrency=PER_HOST_CONCURRENCY,
+                 min_interval=PER_HOST_MIN_INTERVAL, max_attempts=MAX_ATTEMPTS,
+                 timeout=REQUEST_TIMEOUT, fresh_for=0):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.cache = cache
+        self.per_host_concurrency = per_host_concurrency
+        self.min_interval = min_interval
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        # Cached pages younger than this many seconds are served without revalidation
+        self.fresh_for = fresh_for
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Blocking session.get calls run here, sized to the connection pool
+        self._executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="profile-fetch")
+        self._limiters = {}
+
+    def _limiter(self, url):
+        host = urlsplit(url).netloc
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = _HostLimiter(self.per_host_concurrency, self.min_interval)
+        return limiter
+
+    async def fetch(self, url):
+        import requests
+
+        start = time.perf_counter()
+        result = {"url": url, "status": None, "text": None, "from_cache": False, "attempts": 0, "error": None}
+        cached = self.cache.get(url) if self.cache is not None else None
+        if cached is not None and time.time() - cached["stored_at"] < self.fresh_for:
+            result.update(status=cached["status"], text=cached["body"], from_cache=True,
+                          elapsed_s=time.perf_counter() - start)
+            metrics.record_cache("http", "hit")
+            return result
+
+        conditional = {}
+        if cached is not None:
+            if cached["etag"]:
+                conditional["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                conditional["If-Modified-Since"] = cached["last_modified"]
+
+        headers = dict(conditional)
+        for attempt in range(self.max_attempts):
+            result["attempts"] = attempt + 1
+            response = None
+            try:
+                async with self._limiter(url):
+                    response = await asyncio.get_running_loop().run_in_executor(
+                        self._executor, lambda: self.session.get(url, headers=headers, timeout=self.timeout)
+                    )
+            except requests.exceptions.RequestException as e:
+                result["error"] = f"Network Error: {e}"
+            else:
+                result["status"] = response.status_code
+                if response.status_code == 304 and cached is not None:
+                    self.cache.touch(url)
+                    result.update(text=cached["body"], from_cache=True, error=None)
+                    break
+                if response.status_code == 200:
+                    text = response.text
+                    if self.cache is not None:
+                        self.cache.store(url, 200, response.headers.get("ETag"),
+                                         response.headers.get("Last-Modified"), text)
+                    result.update(text=text, error=None)
+                    break
+                result["error"] = f"Status code: {response.status_code}"
+                if response.status_code in BLOCKED_STATUSES:
+                    # LinkedIn often lets mobile clients through when it blocks desktop ones
+                    headers = {**MOBILE_HEADERS, **conditional}
+                elif response.status_code not in RETRY_STATUSES:
+                    break
+            if attempt + 1 < self.max_attempts:
+                await asyncio.sleep(_retry_delay(attempt, response))
+
+        result["elapsed_s"] = time.perf_counter() - start
+        metrics.observe("fetch", result["elapsed_s"], {"status": str(result["status"])})
+        if result["text"] is not None:
+            metrics.record_cache("http", "hit" if result["from_cache"] else "miss")
+        else:
+            metrics.record_error("HTTP " + str(result["status"] or "network"), stage="fetch")
+        return result
+
+    async def fetch_all(self, urls):
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+
+def fetch_urls(urls, fetcher=None):
+    """Fetch urls concurrently on the background event loop; results are returned in input order"""
+    fetcher = fetcher or get_profile_fetcher()
+    return run_async(fetcher.fetch_all(list(urls))).result()
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+# Process-wide fetcher; the page cache lives at HTTP_CACHE_PATH (default .http_cache.sqlite3)
+def get_profile_fetcher():
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            cache_path = os.getenv("HTTP_CACHE_PATH", ".http_cache.sqlite3")
+            _fetcher = ProfileFetcher(cache=HttpCache(cache_path) if cache_path else None)
+        return _fetcher
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fetch a list of profile URLs into a JSONL file")
+    parser.add_argument("urls", help="Text file with one URL per line")
+    parser.add_argument("--output", default="profiles.jsonl")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_CONCURRENCY, help="Concurrent requests per host")
+    parser.add_argument("--interval", type=float, default=PER_HOST_MIN_INTERVAL, help="Seconds between requests to a host")
+    parser.add_argument("--cache", default=os.getenv("HTTP_CACHE_PATH", ".http_cache.sqlite3"))
+    args = parser.parse_args(argv)
+
+    with open(args.urls, encoding="utf-8") as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    fetcher = ProfileFetcher(cache=HttpCache(args.cache), per_host_concurrency=args.per_host, min_interval=args.interval)
+    start = time.perf_counter()
+    results = fetch_urls(urls, fetcher)
+    with open(args.output, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            print(f"{result['status']!s:>4} {result['elapsed_s'] * 1000:8.1f} ms "
+                  f"{'cache' if result['from_cache'] else 'fetch'} {result['url']}")
+    failures = sum(1 for result in results if result["error"])
+    print(f"{len(results)} URL(s) in {time.perf_counter() - start:.2f}s, {failures} failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+import json
+import os
+import re
+
+# Extract the about/experience/skills sections from a profile page in one pass.
+# Selectors are plain data, compiled once into predicates; the page is parsed with lxml and
+# only candidate elements (the tags the selectors name) are visited, in document order.
+# For each section the first selector in its list wins, and within a selector the first
+# matching element, the same result as trying soup.select_one for each selector in turn.
+
+# Checked in order; earlier selectors take precedence. Override with PROFILE_SELECTORS_PATH
+# (a JSON file with the same shape) or by passing selectors to extract_profile_sections.
+SECTION_SELECTORS = {
+    'about': [
+        'section.summary',
+        'section.about',
+        'div[data-section="summary"]',
+        'div[data-section="about"]',
+        'div[class*="summary"]',
+        'div[class*="about"]'
+    ],
+    'experience': [
+        'section#experience',
+        'section.experience',
+        'div[data-section="experience"]',
+        'div[class*="experience"]'
+    ],
+    'skills': [
+        'section#skills',
+        'section.skills',
+        'div[data-section="skills"]',
+        'div[class*="skills"]'
+    ],
+}
+
+# The subset of CSS the selector lists use: tag, tag.class, tag#id, tag[attr="v"], tag[attr*="v"]
+SELECTOR_PATTERN = re.compile(
+    r'^(?P<tag>[a-zA-Z][a-zA-Z0-9]*)?'
+    r'(?:\.(?P<class_name>[\w-]+)|#(?P<id>[\w-]+)|\[(?P<attr>[\w-]+)(?P<op>\*?=)"(?P<value>[^"]*)"\])?$'
+)
+
+
+def compile_selector(selector):
+    """Return (tag or None, predicate(element)) for one selector; raises ValueError if unsupported"""
+    match = SELECTOR_PATTERN.match(selector.strip())
+    if not match or not any(match.groupdict().values()):
+        raise ValueError(f"Unsupported profile selector: {selector!r}")
+    tag = match.group('tag').lower() if match.group('tag') else None
+    if match.group('class_name'):
+        class_name = match.group('class_name')
+        return tag, lambda element: class_name in element.get('class', '').split()
+    if match.group('id'):
+        element_id = match.group('id')
+        return tag, lambda element: element.get('id') == element_id
+    if match.group('attr'):
+        attr, value = match.group('attr'), match.group('value')
+        if match.group('op') == '*=':
+            return tag, lambda element: value in element.get(attr, '')
+        return tag, lambda element: element.get(attr) == value
+    return tag, lambda element: True
+
+
+_html_parser = None
+
+
+def _get_html_parser():
+    global _html_parser
+    if _html_parser is None:
+        import lxml.html
+
+        _html_parser = lxml.html.HTMLParser(encoding='utf-8')
+    return _html_parser
+
+
+class SectionExtractor:
+    """Compiled selector lists for extract(); build once and reuse across pages"""
+
+    def __init__(self, selectors=None):
+        selectors = selectors or load_selectors()
+        self.section_names = list(selectors)
+        # tag -> [(section, priority, predicate)]; None collects selectors without a tag
+        self.rules = {}
+        for section, section_selectors in selectors.items():
+            for priority, selector in enumerate(section_selectors):
+                tag, predicate = compile_selector(selector)
+                self.rules.setdefault(tag, []).append((section, priority, predicate))
+        self.candidate_tags = None if None in self.rules else tuple(self.rules)
+
+    def extract(self, html):
+        """Return {section: text} with '' for sections that were not found"""
+        import lxml.html
+
+        if not html or not html.strip():
+            return {section: '' for section in self.section_names}
+        if isinstance(html, str):
+            # Encode first: lxml rejects str input that carries an XML encoding declaration
+            html = html.encode('utf-8')
+        root = lxml.html.fromstring(html, parser=_get_html_parser())
+        best = {}  # section -> (priority, element)
+        untagged = self.rules.get(None, ())
+        iterator = root.iter(*self.candidate_tags) if self.candidate_tags else root.iter()
+        for element in iterator:
+            if not isinstance(element.tag, str):
+                continue
+            for rules in (self.rules.get(element.tag, ()), untagged):
+                for section, priority, predicate in rules:
+                    found = best.get(section)
+                    if (found is None or priority < found[0]) and predicate(element):
+                        best[section] = (priority, element)
+            # Every section already matched its first-choice selector; nothing can beat that
+            if len(best) == len(self.section_names) and all(found[0] == 0 for found in best.values()):
+                break
+        return {
+            section: element_text(best[section][1]) if section in best else ''
+            for section in self.section_names
+        }
+
+
+# Text of an element with each string stripped and joined, as BeautifulSoup's get_text(strip=True).
+# Comments and script/style contents are skipped; the text after them is kept.
+def element_text(element):
+    parts = []
+    for node in element.iter():
+        if isinstance(node.tag, str) and node.tag not in ('script', 'style') and node.text:
+            parts.append(node.text.strip())
+        if node is not element and node.tail:
+            parts.append(node.tail.strip())
+    return ''.join(parts)
+
+
+def load_selectors():
+    path = os.getenv("PROFILE_SELECTORS_PATH")
+    if not path:
+        return SECTION_SELECTORS
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+_default_extractor = None
+
+
+def extract_profile_sections(html, selectors=None):
+    """Return {'about', 'experience', 'skills'} text from a profile page"""
+    global _default_extractor
+    if selectors is not None:
+        return SectionExtractor(selectors).extract(html)
+    if _default_extractor is None:
+        _default_extractor = SectionExtractor()
+    return _default_extractor.extract(html)
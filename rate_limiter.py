@@ -0,0 +1,353 @@
+import asyncio
+import contextvars
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import metrics
+
+# Process-wide rate limiting of LLM requests, one limiter per API key and endpoint (see
+# openai_clients.get_rate_limiter). Each request takes one request from a requests-per-minute
+# bucket and its estimated size (prompt tokens plus max_tokens, which providers count up front)
+# from a tokens-per-minute bucket, and holds one slot of an adaptive concurrency window while it
+# waits for a response. Requests that cannot start yet wait in a queue per owner (the Streamlit
+# session, see set_owner) and are granted round-robin across owners, so one session's burst does
+# not starve the others. The concurrency window grows by one per window of successful responses
+# and halves on a 429 (AIMD). The buckets follow the provider's x-ratelimit-* headers and stop
+# granting until a 429's Retry-After has passed, so queued requests wait instead of failing.
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") != "0"
+# Starting limits; the provider's x-ratelimit-limit-* headers replace them after the first response
+REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TPM_LIMIT", "200000"))
+# Providers enforce per-minute limits over shorter intervals, so bursts are capped at this many seconds' worth.
+# Token budgets get a longer window: one analysis request alone can be a second's worth of tokens.
+BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", "1"))
+TOKEN_BURST_SECONDS = float(os.getenv("RATE_LIMIT_TOKEN_BURST_SECONDS", "6"))
+INITIAL_CONCURRENCY = int(os.getenv("OPENAI_INITIAL_CONCURRENCY", "8"))
+MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "64"))
+MIN_CONCURRENCY = 1
+DECREASE_FACTOR = 0.5
+# Seconds a request may wait in the queue before it fails with RateLimitTimeoutError
+MAX_QUEUE_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "120"))
+# 429s within this many seconds of the last decrease belong to the same burst and shrink the window once
+DECREASE_INTERVAL = 1.0
+# The window stops growing once fewer than this share of the requests or tokens remain
+LOW_REMAINING_FRACTION = 0.1
+# How long to wait after a 429 without Retry-After or reset headers
+DEFAULT_PAUSE_SECONDS = 1.0
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+# Fair-queueing key of the current caller (a Streamlit session id); None shares one queue
+_owner = contextvars.ContextVar("rate_limit_owner", default=None)
+
+
+def set_owner(owner):
+    _owner.set(owner)
+
+
+def carry_owner(coroutine):
+    """Wrap a coroutine so it queues as the caller's owner when it runs on another thread's loop"""
+    owner = _owner.get()
+    if owner is None:
+        return coroutine
+
+    async def as_owner():
+        _owner.set(owner)
+        return await coroutine
+
+    return as_owner()
+
+
+def parse_duration(value):
+    """Seconds in a header value such as "20ms", "1.5s" or "6m0s" (or a bare number of seconds)"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parts = DURATION_PART.findall(value)
+        return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts) if parts else None
+
+
+class RateLimitTimeoutError(Exception):
+    """Raised when a request waited longer than its timeout for a rate-limit slot"""
+
+
+class TokenBucket:
+    """A per-minute budget refilled continuously; a request larger than a burst may take it below zero"""
+
+    def __init__(self, per_minute, burst_seconds=BURST_SECONDS):
+        self.burst_seconds = burst_seconds
+        self.updated = time.monotonic()
+        self.set_limit(per_minute)
+        self.available = self.capacity
+
+    def set_limit(self, per_minute):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * self.burst_seconds)
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount (at most one full burst) can be taken"""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.available
+        return max(0.0, missing / self.rate) if self.rate else float("inf")
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.available -= amount
+
+    def sync(self, remaining, now):
+        """Take the provider's remaining count into account; never raises the local estimate"""
+        self._refill(now)
+        self.available = min(self.available, remaining)
+
+
+class _Ticket:
+    def __init__(self, owner, tokens, loop=None):
+        self.owner = owner
+        self.tokens = tokens
+        self.granted = False
+        self.enqueued = time.monotonic()
+        self._loop = loop
+        self._event = asyncio.Event() if loop is not None else threading.Event()
+
+    def wake(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._event.set)
+        else:
+            self._event.set()
+
+
+class Permit:
+    """One granted request; release() frees its concurrency slot once the response has arrived"""
+
+    def __init__(self, limiter, waited):
+        self.waited = waited
+        self._limiter = limiter
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._limiter._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class RateLimiter:
+    """Requests-per-minute, tokens-per-minute and AIMD concurrency limits for one API key"""
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE,
+                 initial_concurrency=INITIAL_CONCURRENCY, max_concurrency=MAX_CONCURRENCY, max_wait=MAX_QUEUE_WAIT):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute, TOKEN_BURST_SECONDS)
+        self.concurrency = float(initial_concurrency)
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+        self._queues = {}  # owner -> deque of waiting tickets
+        self._turns = deque()  # owners with waiting tickets, in round-robin order
+        self._last_decrease = 0.0
+        self._growth_held = False
+        self.granted = 0
+        self.rate_limited = 0
+        self.timeouts = 0
+        self.waits = deque(maxlen=1000)
+
+    # --- Queueing ---
+
+    def _enqueue(self, tokens, loop=None):
+        ticket = _Ticket(_owner.get(), tokens, loop)
+        with self._lock:
+            if ticket.owner not in self._queues:
+                self._queues[ticket.owner] = deque()
+                self._turns.append(ticket.owner)
+            self._queues[ticket.owner].append(ticket)
+        return ticket
+
+    def _remove(self, ticket):
+        queue = self._queues.get(ticket.owner)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.owner]
+                self._turns.remove(ticket.owner)
+        # The next ticket may have been waiting behind this one
+        self._wake_next()
+
+    def _dispatch(self, now):
+        """Grant waiting tickets in round-robin order while the limits allow (caller holds the lock).
+
+        Returns the seconds until the next ticket could be granted, or None when it waits for a
+        concurrency slot to be released (or nothing is waiting).
+        """
+        while self._turns:
+            if self.in_flight >= int(self.concurrency):
+                return None
+            owner = self._turns[0]
+            ticket = self._queues[owner][0]
+            wait = max(self.paused_until - now, self.requests.wait_time(1, now),
+                       self.tokens.wait_time(ticket.tokens, now))
+            if wait > 0:
+                return wait
+            self.requests.take(1, now)
+            self.tokens.take(ticket.tokens, now)
+            self.in_flight += 1
+            self.granted += 1
+            self._queues[owner].popleft()
+            self._turns.rotate(-1)
+            if not self._queues[owner]:
+                del self._queues[owner]
+                self._turns.remove(owner)
+            ticket.granted = True
+            ticket.wake()
+        return None
+
+    def _wake_next(self):
+        # Let the ticket at the head of the queue recompute its wait (it may now be timed, not blocked)
+        if self._turns:
+            self._queues[self._turns[0]][0].wake()
+
+    def _grant_or_wait(self, ticket, deadline):
+        """(granted, seconds to wait) for one pass of a waiting ticket; removes it when past the deadline"""
+        now = time.monotonic()
+        with self._lock:
+            if not ticket.granted:
+                wait = self._dispatch(now)
+            if ticket.granted:
+                return True, 0.0
+            if now >= deadline:
+                self._remove(ticket)
+                self.timeouts += 1
+                raise RateLimitTimeoutError(
+                    f"Waited {now - ticket.enqueued:.0f}s for the API rate limit; too many requests are queued for this key.")
+            return False, min(wait, deadline - now) if wait is not None else deadline - now
+
+    def _granted(self, ticket):
+        waited = time.monotonic() - ticket.enqueued
+        with self._lock:
+            self.waits.append(waited)
+        metrics.observe("rate_limit_wait", waited, {})
+        return Permit(self, waited)
+
+    def acquire(self, tokens, timeout=None):
+        """Wait for a slot for a request of about `tokens` tokens; returns a Permit to release afterwards"""
+        ticket = self._enqueue(tokens)
+        deadline = ticket.enqueued + (self.max_wait if timeout is None else timeout)
+        while True:
+            granted, wait = self._grant_or_wait(ticket, deadline)
+            if granted:
+                return self._granted(ticket)
+            ticket._event.wait(wait)
+            ticket._event.clear()
+
+    async def acquire_async(self, tokens, timeout=None):
+        """acquire() for coroutines; waits without blocking the event loop"""
+        ticket = self._enqueue(tokens, loop=asyncio.get_running_loop())
+        deadline = ticket.enqueued + (self.max_wait if timeout is None else timeout)
+        while True:
+            granted, wait = self._grant_or_wait(ticket, deadline)
+            if granted:
+                return self._granted(ticket)
+            try:
+                await asyncio.wait_for(ticket._event.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                self._abandon(ticket)
+                raise
+            ticket._event.clear()
+
+    def _abandon(self, ticket):
+        # A cancelled waiter leaves the queue, or frees the slot it was granted while being cancelled
+        with self._lock:
+            if not ticket.granted:
+                self._remove(ticket)
+                return
+        self._release()
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._dispatch(time.monotonic())
+            self._wake_next()
+
+    # --- Feedback from responses ---
+
+    def observe_response(self, status_code, headers):
+        """Adapt to one response: x-ratelimit-* headers, and AIMD on success or 429"""
+        now = time.monotonic()
+        with self._lock:
+            self._sync_buckets(headers, now)
+            if status_code == 429:
+                self.rate_limited += 1
+                retry_after = parse_duration(headers.get("retry-after"))
+                if retry_after is None:
+                    resets = [parse_duration(headers.get(name)) for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")]
+                    retry_after = max([reset for reset in resets if reset is not None], default=DEFAULT_PAUSE_SECONDS)
+                self.paused_until = max(self.paused_until, now + retry_after)
+                if now - self._last_decrease >= DECREASE_INTERVAL:
+                    self.concurrency = max(MIN_CONCURRENCY, self.concurrency * DECREASE_FACTOR)
+                    self._last_decrease = now
+            elif status_code < 400 and not self._growth_held:
+                # About +1 per window of successful responses
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+            # Newly free capacity (or a pause) changes what the head of the queue waits for
+            self._dispatch(now)
+            self._wake_next()
+
+    def _sync_buckets(self, headers, now):
+        low = False
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            limit = _header_number(headers, f"x-ratelimit-limit-{kind}")
+            remaining = _header_number(headers, f"x-ratelimit-remaining-{kind}")
+            if limit:
+                if limit != bucket.per_minute:
+                    bucket.set_limit(limit)
+                if remaining is not None:
+                    # The provider's remaining count covers the minute; this bucket holds at most one burst
+                    bucket.sync(remaining * bucket.capacity / limit, now)
+                    low = low or remaining < limit * LOW_REMAINING_FRACTION
+        self._growth_held = low
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self.waits)
+            return {
+                "queued": sum(len(queue) for queue in self._queues.values()),
+                "queued_owners": len(self._queues),
+                "in_flight": self.in_flight,
+                "concurrency": round(self.concurrency, 2),
+                "requests_per_minute": self.requests.per_minute,
+                "tokens_per_minute": self.tokens.per_minute,
+                "granted": self.granted,
+                "rate_limited": self.rate_limited,
+                "timeouts": self.timeouts,
+                "wait_p50_s": waits[len(waits) // 2] if waits else 0.0,
+                "wait_p99_s": waits[min(len(waits) - 1, int(0.99 * len(waits)))] if waits else 0.0,
+                "wait_max_s": waits[-1] if waits else 0.0,
+            }
+
+
+def _header_number(headers, name):
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+# Expired rows are deleted from the backing store once every this many writes; reads skip them meanwhile
+PURGE_EVERY_WRITES = 100
+
+
+# Build a content-addressed cache key from everything that influences a completion
+def make_cache_key(function_name, model, messages, **params):
+    payload = json.dumps(
+        {"function": function_name, "model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """In-memory LRU cache with TTLs and an optional SQLite backing store"""
+
+    # name labels this cache's lookups in the exported metrics
+    def __init__(self, max_entries=256, ttl=24 * 60 * 60, path=None, name="result"):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._writes = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            # WAL mode lets several server processes read and write the same file
+            self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_by_expiry ON results (expires_at)")
+            self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    metrics.record_cache(self.name, "hit")
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    # Promote the disk entry so the next lookup stays in memory
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    metrics.record_cache(self.name, "hit")
+                    return row[0]
+
+            self.misses += 1
+            metrics.record_cache(self.name, "miss")
+            return None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                self._writes += 1
+                if self._writes % PURGE_EVERY_WRITES == 0:
+                    self._db.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+# Return the process-wide cache, configured from the environment on first use.
+# Streamlit re-executes app.py on every rerun, but imported modules persist, so the
+# cache lives here rather than in the script.
+def get_result_cache():
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(
+                max_entries=int(os.getenv("RESULT_CACHE_SIZE", "256")),
+                ttl=float(os.getenv("RESULT_CACHE_TTL", str(24 * 60 * 60))),
+                path=os.getenv("RESULT_CACHE_PATH") or None,
+            )
+        return _result_cache
@@ -0,0 +1,183 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import metrics
+
+# Single-flight coalescing of identical in-flight requests within this process.
+# Streamlit serves every session from one process, so when several sessions submit the same
+# prompt at the same time, the first caller (the leader) makes the upstream request and the
+# others wait for its result or error instead of sending their own. Callers arriving after
+# the request completes are served by the result cache instead. Only errors the waiters' own
+# requests would hit too are passed on (see _shared_error); otherwise a waiter tries again,
+# becoming the leader of a new call.
+
+
+# A leader's error reaches its waiters only when their identical request would fail the same way:
+# not when the leader was cancelled or interrupted (a BaseException), nor for failures marked
+# retryable, such as timeouts, exhausted retries or the leader's own rate-limit queue timeout
+def _shared_error(error):
+    return isinstance(error, Exception) and not getattr(error, "retryable", False)
+
+
+# Whether a waiter's exception is the leader's error, rather than the waiter's own cancellation
+def _leader_failed(call, error):
+    return call.done() and call.exception() is error
+
+
+class _StreamBroadcast:
+    """Chunks of one upstream stream, replayed to every subscriber as they arrive"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def publish(self, chunk):
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def finish(self, error=None):
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def subscribe(self):
+        position = 0
+        while True:
+            with self.condition:
+                while position == len(self.chunks) and not self.done:
+                    self.condition.wait()
+                pending = self.chunks[position:]
+                position = len(self.chunks)
+                done, error = self.done, self.error
+            yield from pending
+            if done and position == len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key"""
+
+    def __init__(self, stream_workers=32):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future (plain calls) or _StreamBroadcast (streams)
+        # Streams are pumped here, so a session that stops reading (e.g. a Streamlit rerun)
+        # does not cut the stream short for the others
+        self._stream_pump = ThreadPoolExecutor(max_workers=stream_workers, thread_name_prefix="single-flight")
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    def _join(self, key, make_call):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = make_call()
+            self.upstream_calls += 1
+            return call, True
+
+    def _leave(self, key):
+        with self._lock:
+            self._calls.pop(key, None)
+
+    # The leader leaves before settling its call, so a waiter that tries again starts a new one
+    def _settle(self, key, call, result=None, error=None):
+        self._leave(key)
+        if error is not None:
+            call.set_exception(error)
+        else:
+            call.set_result(result)
+
+    def do(self, key, function):
+        """Return (result, shared): function()'s result, or that of an identical call already in flight"""
+        while True:
+            call, leader = self._join(key, Future)
+            if leader:
+                break
+            try:
+                return call.result(), True
+            except BaseException as e:
+                if not _leader_failed(call, e) or _shared_error(e):
+                    raise
+        try:
+            result = function()
+        except BaseException as e:
+            self._settle(key, call, error=e)
+            raise
+        self._settle(key, call, result)
+        return result, False
+
+    async def do_async(self, key, coroutine_function):
+        """Async counterpart of do(); coroutine_function() is awaited by the leader only"""
+        while True:
+            call, leader = self._join(key, Future)
+            if leader:
+                break
+            try:
+                # Shielded, so a waiter being cancelled does not cancel the leader's call
+                return await asyncio.shield(asyncio.wrap_future(call)), True
+            except BaseException as e:
+                if not _leader_failed(call, e) or _shared_error(e):
+                    raise
+        try:
+            result = await coroutine_function()
+        except BaseException as e:
+            self._settle(key, call, error=e)
+            raise
+        self._settle(key, call, result)
+        return result, False
+
+    def stream(self, key, generator_function):
+        """Iterate generator_function() once per key; every concurrent caller receives all chunks"""
+        while True:
+            broadcast, leader = self._join(key, _StreamBroadcast)
+            if leader:
+                # Run in the leader's context, so the upstream call is timed within its metrics trace
+                self._stream_pump.submit(contextvars.copy_context().run, self._pump, key, broadcast, generator_function)
+            received = 0
+            try:
+                for chunk in broadcast.subscribe():
+                    received += 1
+                    yield chunk
+                return
+            except BaseException as e:
+                # A waiter that has not received anything yet can start the stream over itself
+                if leader or received or _shared_error(e):
+                    raise
+
+    def _pump(self, key, broadcast, generator_function):
+        try:
+            for chunk in generator_function():
+                broadcast.publish(chunk)
+        except BaseException as e:
+            self._leave(key)
+            broadcast.finish(e)
+        else:
+            self._leave(key)
+            broadcast.finish()
+
+    def stats(self):
+        with self._lock:
+            return {"upstream_calls": self.upstream_calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight():
+    return _single_flight
+
+
+def single_flight_stats():
+    return _single_flight.stats()
+
+
+metrics.register_collector("single_flight", single_flight_stats)
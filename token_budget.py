@@ -0,0 +1,156 @@
+import math
+import os
+import re
+from functools import lru_cache
+
+# Token counting and section-aligned chunking for prompts built from long resumes.
+# Counts use tiktoken when it is installed and a ~4 characters/token estimate otherwise,
+# so budgeting never blocks an analysis.
+
+MODEL_CONTEXT_TOKENS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+}
+DEFAULT_CONTEXT_TOKENS = 16385
+CHARS_PER_TOKEN = 4
+# Chat formatting adds a few tokens per message on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Profile text above this size is analysed map-reduce style instead of pasted verbatim
+PROFILE_TOKEN_BUDGET = int(os.getenv("PROFILE_TOKEN_BUDGET", "6000"))
+# Job descriptions are trimmed to this size (the local keyword score still uses the full text)
+JOB_DESCRIPTION_TOKEN_BUDGET = int(os.getenv("JOB_DESCRIPTION_TOKEN_BUDGET", "1500"))
+CHUNK_TOKEN_BUDGET = 2500
+# Caps the number of map requests, so cost and latency stay bounded however long the input is
+MAX_CHUNKS = 8
+MAX_CHUNK_TOKENS = 6000
+
+# "# EXPERIENCE", "## Projects" or an all-caps line such as "WORK HISTORY" starts a new section
+SECTION_HEADING_PATTERN = re.compile(r"^(?:#{1,6}\s+\S.*|[A-Z][A-Z0-9 &/,\-]{2,60}:?)\s*$")
+
+
+@lru_cache(maxsize=8)
+def get_encoding(model):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text, model="gpt-3.5-turbo"):
+    encoding = get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages, model="gpt-3.5-turbo"):
+    return sum(count_tokens(message["content"], model) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def context_window(model):
+    return MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+
+
+# True when the prompt plus the requested completion fits the model's context window
+def fits_context(messages, max_tokens, model="gpt-3.5-turbo"):
+    return count_message_tokens(messages, model) + max_tokens <= context_window(model)
+
+
+# Cut text to at most max_tokens, on a token boundary when tiktoken is available
+def truncate_to_tokens(text, max_tokens, model="gpt-3.5-turbo"):
+    encoding = get_encoding(model)
+    if encoding is None:
+        limit = max_tokens * CHARS_PER_TOKEN
+        return text if len(text) <= limit else text[:limit]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+# Split text into (heading, body) sections; text before the first heading has heading ""
+def split_sections(text):
+    sections = []
+    heading, lines = "", []
+    for line in text.splitlines():
+        if SECTION_HEADING_PATTERN.match(line.strip()):
+            if heading or any(part.strip() for part in lines):
+                sections.append((heading, "\n".join(lines).strip()))
+            heading, lines = line.strip().lstrip("#").strip(), []
+        else:
+            lines.append(line)
+    if heading or any(part.strip() for part in lines):
+        sections.append((heading, "\n".join(lines).strip()))
+    return sections
+
+
+# Break an oversized block into paragraphs, then lines, then hard token cuts
+def _split_block(text, max_tokens, model):
+    for separator in ("\n\n", "\n"):
+        parts = [part for part in text.split(separator) if part.strip()]
+        if len(parts) > 1:
+            pieces = []
+            for part in parts:
+                if count_tokens(part, model) > max_tokens:
+                    pieces.extend(_split_block(part, max_tokens, model))
+                else:
+                    pieces.append(part)
+            return pieces
+    pieces = []
+    while text:
+        piece = truncate_to_tokens(text, max_tokens, model)
+        pieces.append(piece)
+        text = text[len(piece):]
+    return pieces
+
+
+def chunk_token_budget(total_tokens):
+    """Chunk size for a document: CHUNK_TOKEN_BUDGET, grown so there are at most MAX_CHUNKS chunks"""
+    return min(MAX_CHUNK_TOKENS, max(CHUNK_TOKEN_BUDGET, math.ceil(total_tokens / MAX_CHUNKS)))
+
+
+def split_into_chunks(text, max_tokens=CHUNK_TOKEN_BUDGET, model="gpt-3.5-turbo"):
+    """Pack whole sections into chunks of at most max_tokens; each chunk is (headings, text).
+
+    Sections are kept together where possible; a section larger than a chunk is split on
+    paragraph and line boundaries and its heading repeated on every piece.
+    """
+    chunks = []
+    headings, parts, size = [], [], 0
+
+    def flush():
+        nonlocal headings, parts, size
+        if parts:
+            chunks.append((headings, "\n\n".join(parts)))
+        headings, parts, size = [], [], 0
+
+    for heading, body in split_sections(text):
+        block = f"# {heading}\n{body}" if heading else body
+        block_tokens = count_tokens(block, model)
+        if block_tokens > max_tokens:
+            flush()
+            heading_tokens = count_tokens(f"# {heading}\n", model) if heading else 0
+            for piece in _split_block(body, max_tokens - heading_tokens, model):
+                piece_block = f"# {heading}\n{piece}" if heading else piece
+                piece_tokens = count_tokens(piece_block, model)
+                if size + piece_tokens > max_tokens:
+                    flush()
+                if heading and heading not in headings:
+                    headings.append(heading)
+                parts.append(piece_block)
+                size += piece_tokens
+            flush()
+            continue
+        if size + block_tokens > max_tokens:
+            flush()
+        if heading:
+            headings.append(heading)
+        parts.append(block)
+        size += block_tokens
+    flush()
+    return chunks